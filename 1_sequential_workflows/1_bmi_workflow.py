@@ -1,5 +1,6 @@
 from langgraph.graph import StateGraph, START, END
 from typing import TypedDict
+from functools import cache
 
 
 # define state
@@ -52,15 +53,20 @@ graph.add_edge('category', END)
 
 
 # complie the graph
-workflow = graph.compile()
+@cache
+def get_workflow():
+    return graph.compile()
 
 
-# execute the graph
-initial_state = {'weight_kg': 67, 'height_m': 1.75}
-final_state = workflow.invoke(initial_state)
-print(final_state)
+if __name__ == '__main__':
+    workflow = get_workflow()
 
+    # execute the graph
+    initial_state = {'weight_kg': 67, 'height_m': 1.75}
+    final_state = workflow.invoke(initial_state)
+    print(final_state)
 
-# visualize graph
-print(workflow.get_graph().print_ascii())
+
+    # visualize graph
+    print(workflow.get_graph().print_ascii())
 
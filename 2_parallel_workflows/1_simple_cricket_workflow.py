@@ -1,5 +1,6 @@
 from langgraph.graph import StateGraph, START, END
 from typing import TypedDict
+from functools import cache
 
 
 # define state
@@ -64,26 +65,31 @@ graph.add_edge('summary', END)
 
 
 # complie graph
-workflow = graph.compile()
-
-
-# execute graph
-initial_state = {
-    'runs': 101,
-    'balls': 69,
-    'fours': 8,
-    'sixes': 4,
-    'sr': 0,
-    'bpb': 0,
-    'boundary_perct': 0,
-    'summary': ''
-}
-final_state = workflow.invoke(initial_state)
-print(final_state)
-
-
-# visualize grpah
-print(workflow.get_graph().print_ascii())
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # execute graph
+    initial_state = {
+        'runs': 101,
+        'balls': 69,
+        'fours': 8,
+        'sixes': 4,
+        'sr': 0,
+        'bpb': 0,
+        'boundary_perct': 0,
+        'summary': ''
+    }
+    final_state = workflow.invoke(initial_state)
+    print(final_state)
+
+
+    # visualize grpah
+    print(workflow.get_graph().print_ascii())
 
 
 '''
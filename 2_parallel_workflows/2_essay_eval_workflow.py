@@ -1,18 +1,24 @@
 from langgraph.graph import StateGraph, START, END
 from typing import TypedDict, Annotated
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from functools import cache
 import os
+import sys
 import operator
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
+
 
 load_dotenv()
+enable_llm_cache()
 api_key = os.getenv("GOOGLE_API_KEY")
 
 
 # llm model
-llm = ChatGoogleGenerativeAI(
+llm = get_chat_model(
     model="gemini-2.5-flash-lite",
     api_key=api_key
 )
@@ -112,7 +118,9 @@ graph.add_edge("final_eval", END)
 
 
 # compile the graph
-workflow = graph.compile()
+@cache
+def get_workflow():
+    return graph.compile()
 
 
 # test the graph
@@ -126,23 +134,26 @@ In the 1st millennium, Islam, Christianity, Judaism, and Zoroastrianism became e
 India has been a federal republic since 1950, governed through a democratic parliamentary system. It is a pluralistic, multilingual and multi-ethnic society. India's population grew from 361 million in 1951 to over 1.4 billion in 2023.[59] During this time, its nominal per capita income increased from US$64 annually to US$2,601, and its literacy rate from 16.6% to 74%. A comparatively destitute country in 1951,[60] India has become a fast-growing major economy and a hub for information technology services, with an expanding middle class.[61] India has reduced its poverty rate, though at the cost of increasing economic inequality.[62] It is a nuclear-weapon state that ranks high in military expenditure. It has disputes over Kashmir with its neighbours, Pakistan and China, unresolved since the mid-20th century.[63] Among the socio-economic challenges India faces are gender inequality, child malnutrition,[64] and rising levels of air pollution.[65] India's land is megadiverse with four biodiversity hotspots. India's wildlife, which has traditionally been viewed with tolerance in its culture,[66] is supported in protected habitats.
 '''
 
-initial_state = {
-    "essay": essay,
-    "cot_feedback": "",
-    "doa_feedback": "",
-    "g_feedback": "",
-    "summarized_feedback": "",
-    "scores": [],
-    "avg_score": 0.0
-}
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    initial_state = {
+        "essay": essay,
+        "cot_feedback": "",
+        "doa_feedback": "",
+        "g_feedback": "",
+        "summarized_feedback": "",
+        "scores": [],
+        "avg_score": 0.0
+    }
 
-final_state = workflow.invoke(initial_state)
+    final_state = workflow.invoke(initial_state)
 
-print(final_state)
+    print(final_state)
 
 
-# visualize graph
-print(workflow.get_graph().print_ascii())
+    # visualize graph
+    print(workflow.get_graph().print_ascii())
 
 
 '''
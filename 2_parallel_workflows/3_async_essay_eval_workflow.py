@@ -0,0 +1,208 @@
+from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableConfig
+from typing import TypedDict, Annotated
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+from functools import cache
+import asyncio
+import time
+import os
+import sys
+import operator
+import weakref
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
+
+
+load_dotenv()
+enable_llm_cache()
+api_key = os.getenv("GOOGLE_API_KEY")
+
+# global limit on in-flight LLM requests, shared by every essay in a batch
+MAX_LLM_CONCURRENCY = int(os.getenv("MAX_LLM_CONCURRENCY", "16"))
+
+
+# llm model
+llm = get_chat_model(
+    model="gemini-2.5-flash-lite",
+    api_key=api_key
+)
+
+
+# structured output
+class Llm_struct_op(BaseModel):
+    feedback: str = Field(description="Give honest feedback")
+    score: int = Field(description="Score out of 10", ge=0, le=10)
+
+struct_llm = llm.with_structured_output(Llm_struct_op)
+
+
+# state
+class Essay_state(TypedDict):
+    essay: str
+    cot_feedback: str # clarity of thought
+    doa_feedback: str # depth of analysis
+    g_feedback: str # grammer
+    summarized_feedback: str
+    scores: Annotated[list[int], operator.add]
+    avg_score: float
+
+
+# fallback when the caller passes no semaphore (e.g. utils.task_queue calls ainvoke(state) without a config)
+# -> one asyncio.Semaphore(MAX_LLM_CONCURRENCY) per event loop, a semaphore is bound to the loop it first waits on
+# (the task queue runs every task of a worker on one shared loop, so that is one semaphore per process)
+llm_semaphores = weakref.WeakKeyDictionary()
+
+def default_llm_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in llm_semaphores:
+        llm_semaphores[loop] = asyncio.Semaphore(MAX_LLM_CONCURRENCY)
+    return llm_semaphores[loop]
+
+
+# every model call waits for a slot of the shared semaphore before going out
+async def limited_ainvoke(runnable, prompt, config: RunnableConfig):
+    async with config.get("configurable", {}).get("llm_semaphore") or default_llm_semaphore():
+        return await runnable.ainvoke(prompt)
+
+
+# define functions (async, so the event loop can overlap the network waits)
+async def cot(state: Essay_state, config: RunnableConfig):
+    result = await limited_ainvoke(
+        struct_llm, f"Evaluate clarity of thought:\n{state['essay']}", config
+    )
+    return {
+        "cot_feedback": result.feedback,
+        "scores": [result.score]
+    }
+
+async def doa(state: Essay_state, config: RunnableConfig):
+    result = await limited_ainvoke(
+        struct_llm, f"Evaluate depth of analysis:\n{state['essay']}", config
+    )
+    return {
+        "doa_feedback": result.feedback,
+        "scores": [result.score]
+    }
+
+async def g(state: Essay_state, config: RunnableConfig):
+    result = await limited_ainvoke(
+        struct_llm, f"Evaluate grammar:\n{state['essay']}", config
+    )
+    return {
+        "g_feedback": result.feedback,
+        "scores": [result.score]
+    }
+
+#  merge barrier
+async def merge(state: Essay_state):
+    return {}
+
+async def final_eval(state: Essay_state, config: RunnableConfig):
+    avg_score = sum(state["scores"]) / len(state["scores"])
+
+    summary_prompt = f"""
+Summarize the following feedback:
+
+Clarity: {state['cot_feedback']}
+Depth: {state['doa_feedback']}
+Grammar: {state['g_feedback']}
+"""
+
+    result = await limited_ainvoke(llm, summary_prompt, config)
+
+    return {
+        "summarized_feedback": result.content,
+        "avg_score": round(avg_score, 2)
+    }
+
+
+# define graph
+graph = StateGraph(Essay_state)
+
+
+# graph nodes
+graph.add_node("cot", cot)
+graph.add_node("doa", doa)
+graph.add_node("g", g)
+graph.add_node("merge_barrier", merge)
+graph.add_node("final_eval", final_eval)
+
+
+# graph edges
+graph.add_edge(START, "cot")
+graph.add_edge(START, "doa")
+graph.add_edge(START, "g")
+graph.add_edge("cot", "merge_barrier")
+graph.add_edge("doa", "merge_barrier")
+graph.add_edge("g", "merge_barrier")
+graph.add_edge("merge_barrier", "final_eval")
+graph.add_edge("final_eval", END)
+
+
+# compile the graph
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+# batch entry point -> grades many essays at once, bounded by max_concurrency in-flight LLM requests
+async def grade_essays(essays: list[str], max_concurrency: int = MAX_LLM_CONCURRENCY) -> list[Essay_state]:
+    config = {"configurable": {"llm_semaphore": asyncio.Semaphore(max_concurrency)}}
+
+    inputs = [
+        {
+            "essay": essay,
+            "cot_feedback": "",
+            "doa_feedback": "",
+            "g_feedback": "",
+            "summarized_feedback": "",
+            "scores": [],
+            "avg_score": 0.0
+        }
+        for essay in essays
+    ]
+
+    # return_exceptions -> one failed essay does not throw away the rest of the class set
+    return await get_workflow().abatch(inputs, config=config, return_exceptions=True)
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # test the graph
+    essays = [
+        "Climate change is the defining challenge of our time. Rising temperatures are melting glaciers, raising sea levels and making droughts and floods more frequent. Governments must cut emissions quickly, but individuals also matter: how we travel, what we eat and what we buy all add up.",
+        "Social media has changed how young people make friends. It lets them stay in touch across distances, but it also replaces face to face conversation and can harm self esteem through constant comparison. Schools should teach students how to use it with care.",
+        "Public libraries are more important today than ever. They offer free internet, quiet places to study and programs for children and older people. A city that closes its libraries is saving money today and paying for it in lost opportunity tomorrow.",
+    ]
+
+    start = time.perf_counter()
+    results = asyncio.run(grade_essays(essays))
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if isinstance(result, Exception):
+            print("failed:", result)
+        else:
+            print(result["scores"], result["avg_score"])
+
+    print(f"graded {len(essays)} essays in {elapsed:.2f}s with at most {MAX_LLM_CONCURRENCY} requests in flight")
+
+
+    # visualize graph
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Why async + a global semaphore?
+
+- In 2_essay_eval_workflow.py every node blocks its thread on struct_llm.invoke, and every essay waits for the previous workflow.invoke to finish
+- Here the nodes are 'async def' and use ainvoke, so while one request waits on the network the event loop sends the others
+- workflow.abatch runs all essays of the batch at the same time on one event loop
+- The asyncio.Semaphore passed through config['configurable'] is shared by every node of every essay, so at most max_concurrency requests are in flight
+- Without a semaphore in the config (e.g. a task queue worker) a module-level semaphore of MAX_LLM_CONCURRENCY slots per event loop is used, so the limit still holds per process
+- Throughput is therefore set by max_concurrency (and the provider's rate limit), not by the number of essays: 500 essays x 4 calls with 16 slots takes about 2000/16 round-trips instead of 2000
+'''
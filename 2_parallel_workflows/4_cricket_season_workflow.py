@@ -0,0 +1,199 @@
+from langgraph.graph import StateGraph, START, END
+from typing import TypedDict, Annotated
+from functools import cache
+import numpy as np
+import operator
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.loader import ROOT_DIR
+from utils.shared_columns import SharedColumns, process_pool, run_kernel
+
+
+SCRIPT = os.path.relpath(os.path.abspath(__file__), ROOT_DIR)
+
+INPUT_COLUMNS = {'runs': np.int32, 'balls': np.int32, 'fours': np.int32, 'sixes': np.int32}
+OUTPUT_COLUMNS = ('sr', 'bpb', 'boundary_perct')
+
+
+# define state -> only the shared-memory specs of the columns travel through the graph, never the data
+class Season_State(TypedDict):
+    inputs: dict
+    outputs: dict
+    n_innings: int
+
+    undefined: Annotated[dict[str, int], operator.or_]  # branch -> innings where its ratio is undefined (x/0)
+    summary: str
+
+
+# define graph
+graph = StateGraph(Season_State)
+
+
+# one worker process per branch, started once and reused by every run
+@cache
+def get_pool():
+    return process_pool(max_workers=len(OUTPUT_COLUMNS))
+
+
+# kernels -> run in the worker, plain numpy on views of the shared columns.
+# np.divide(..., where=den != 0) skips the rows that would divide by zero, they keep the NaN they start with
+def sr_kernel(runs, balls, out) -> int:
+    out[:] = np.nan
+    np.divide(runs, balls, out=out, where=balls != 0)
+    out *= 100
+
+    return int(np.count_nonzero(balls == 0))
+
+def bpb_kernel(balls, fours, sixes, out) -> int:
+    boundaries = fours + sixes
+
+    out[:] = np.nan
+    np.divide(balls, boundaries, out=out, where=boundaries != 0)
+
+    return int(np.count_nonzero(boundaries == 0))
+
+def boundary_perct_kernel(runs, fours, sixes, out) -> int:
+    out[:] = np.nan
+    np.divide(fours * 4 + sixes * 6, runs, out=out, where=runs != 0)
+    out *= 100
+
+    return int(np.count_nonzero(runs == 0))
+
+
+# define functions -> each branch hands its kernel to the pool and waits, the three run in parallel processes
+def branch(kernel: str, columns: list[str], output: str):
+    def node(state: Season_State) -> Season_State:
+        undefined = get_pool().submit(run_kernel, SCRIPT, kernel, state['inputs'], columns, state['outputs'], output).result()
+
+        return {'undefined': {output: undefined}}
+
+    return node
+
+calculate_sr = branch('sr_kernel', ['runs', 'balls'], 'sr')
+calculate_bpb = branch('bpb_kernel', ['balls', 'fours', 'sixes'], 'bpb')
+calculate_boundary_perct = branch('boundary_perct_kernel', ['runs', 'fours', 'sixes'], 'boundary_perct')
+
+def summary(state: Season_State) -> Season_State:
+    inputs, outputs = SharedColumns.attach(state['inputs']), SharedColumns.attach(state['outputs'])
+
+    try:
+        runs, balls = int(inputs['runs'].sum(dtype=np.int64)), int(inputs['balls'].sum(dtype=np.int64))
+        fours, sixes = int(inputs['fours'].sum(dtype=np.int64)), int(inputs['sixes'].sum(dtype=np.int64))
+        mean_sr = float(np.nanmean(outputs['sr'])) if state['undefined']['sr'] < state['n_innings'] else float('nan')
+    finally:
+        inputs.close()
+        outputs.close()
+
+    season_sr = runs / balls * 100 if balls else float('nan')
+    season_bpb = balls / (fours + sixes) if fours + sixes else float('nan')
+    season_bp = (fours * 4 + sixes * 6) / runs * 100 if runs else float('nan')
+
+    text = f'Innings: {state["n_innings"]:,} \n Total runs scored: {runs:,} \n Total balls played: {balls:,} \n Total fours: {fours:,} \n Total sixes: {sixes:,} \n\n Season Strike Rate: {season_sr:.2f} (mean per innings {mean_sr:.2f}) \n Balls per Boundary: {season_bpb:.2f} \n Boundary percentage: {season_bp:.2f} \n\n Undefined rows (NaN): {state["undefined"]} \n\n Thank You'
+
+    return {'summary': text}
+
+
+# define nodes
+graph.add_node('calculate_sr', calculate_sr)
+graph.add_node('calculate_bpb', calculate_bpb)
+graph.add_node('calculate_boundary_perct', calculate_boundary_perct)
+graph.add_node('summary', summary)
+
+
+# define edges
+graph.add_edge(START, 'calculate_sr')
+graph.add_edge(START, 'calculate_bpb')
+graph.add_edge(START, 'calculate_boundary_perct')
+
+graph.add_edge('calculate_sr', 'summary')
+graph.add_edge('calculate_bpb', 'summary')
+graph.add_edge('calculate_boundary_perct', 'summary')
+
+graph.add_edge('summary', END)
+
+
+# complie graph
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+# entry point -> columns go into shared memory once, the result columns are copied out at the end
+def run_season(runs, balls, fours, sixes) -> tuple[dict[str, np.ndarray], Season_State]:
+    columns = {'runs': runs, 'balls': balls, 'fours': fours, 'sixes': sixes}
+    n = len(runs)
+
+    with SharedColumns.create({name: np.asarray(columns[name], dtype=dtype) for name, dtype in INPUT_COLUMNS.items()}) as inputs, \
+         SharedColumns.empty({name: (np.float64, n) for name in OUTPUT_COLUMNS}) as outputs:
+
+        final_state = get_workflow().invoke({'inputs': inputs.spec, 'outputs': outputs.spec, 'n_innings': n, 'undefined': {}})
+        results = {name: outputs[name].copy() for name in OUTPUT_COLUMNS}
+
+    return results, final_state
+
+
+def fake_season(n: int, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    balls = rng.integers(0, 120, n, dtype=np.int32)  # 0 balls -> did not face
+    fours = rng.binomial(balls // 6, 0.3).astype(np.int32)
+    sixes = rng.binomial(balls // 12, 0.2).astype(np.int32)
+    runs = (fours * 4 + sixes * 6 + rng.binomial(balls, 0.4)).astype(np.int32)
+
+    return {'runs': runs, 'balls': balls, 'fours': fours, 'sixes': sixes}
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # rows 2 and 3 would have raised ZeroDivisionError in 1_simple_cricket_workflow.py
+    results, final_state = run_season(runs=[101, 12, 0, 5], balls=[69, 10, 0, 7], fours=[8, 0, 0, 1], sixes=[4, 0, 0, 0])
+    print(results)
+    print(final_state['summary'])
+
+
+    # full season
+    n_innings = 5_000_000
+    season = fake_season(n_innings)
+
+    get_pool().submit(int).result()  # start the workers before timing
+
+    start = time.perf_counter()
+    results, final_state = run_season(**season)
+    pool_secs = time.perf_counter() - start
+    print(final_state['summary'])
+
+    # same math in this process, one column after the other
+    start = time.perf_counter()
+    expected = {}
+    for name, kernel, columns in [('sr', sr_kernel, ['runs', 'balls']), ('bpb', bpb_kernel, ['balls', 'fours', 'sixes']), ('boundary_perct', boundary_perct_kernel, ['runs', 'fours', 'sixes'])]:
+        expected[name] = np.empty(n_innings)
+        kernel(*(season[c] for c in columns), out=expected[name])
+    serial_secs = time.perf_counter() - start
+
+    for name in OUTPUT_COLUMNS:
+        assert np.array_equal(results[name], expected[name], equal_nan=True)
+
+    # the three branches only overlap with 3+ free cores, on fewer cores the pool just adds the hand-off cost
+    print(f'{n_innings:,} innings on {os.cpu_count()} cores: process-pool graph {pool_secs:.2f}s (incl. copy into shared memory), single process {serial_secs:.2f}s')
+
+
+    # visualize grpah
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Season-scale parallel workflow
+
+- Same fan-out as 1_simple_cricket_workflow.py, but every node works on whole columns (millions of innings) instead of one innings
+- The columns are copied once into multiprocessing shared memory (utils/shared_columns.py)
+    - the state only carries their specs (block name, dtype, length), so LangGraph never copies or pickles the data
+    - each branch sends its kernel to its own worker process, which maps the same memory and writes its output column in place
+    - so the three branches really run at the same time on different cores (no GIL between them)
+- summary reads the columns the branches wrote and merges them into season totals, the 'undefined' counts
+  of the branches are merged by the operator.or_ reducer (dict union), like scores with operator.add
+- Division by zero is handled per row: np.divide(..., where=den != 0) leaves NaN in the rows with 0 balls / no boundaries / 0 runs,
+  the rest of the batch is computed normally and the number of undefined rows is reported
+'''
@@ -0,0 +1,150 @@
+from langgraph.graph import StateGraph, START, END
+from typing import TypedDict, Annotated
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+from functools import cache
+import os
+import sys
+import operator
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
+from utils.loader import load_script
+
+
+load_dotenv()
+enable_llm_cache()
+api_key = os.getenv("GOOGLE_API_KEY")
+
+
+# llm model
+llm = get_chat_model(
+    model="gemini-2.5-flash-lite",
+    api_key=api_key
+)
+
+
+# structured output -> all three rubrics in one reply
+class Rubric_op(BaseModel):
+    feedback: str = Field(description="Give honest feedback")
+    score: int = Field(description="Score out of 10", ge=0, le=10)
+
+class Fused_struct_op(BaseModel):
+    clarity: Rubric_op = Field(description="Clarity of thought")
+    depth: Rubric_op = Field(description="Depth of analysis")
+    grammar: Rubric_op = Field(description="Grammar")
+
+fused_llm = llm.with_structured_output(Fused_struct_op)
+
+
+# state -> same shape as 2_essay_eval_workflow.py, so callers read the same fields
+class Essay_state(TypedDict):
+    essay: str
+    cot_feedback: str # clarity of thought
+    doa_feedback: str # depth of analysis
+    g_feedback: str # grammer
+    summarized_feedback: str
+    scores: Annotated[list[int], operator.add]
+    avg_score: float
+
+
+# summary template -> replaces the fourth model call of the fan-out graph
+SUMMARY_TEMPLATE = """Overall score: {avg_score}/10
+
+Clarity ({cot_score}/10): {cot_feedback}
+Depth ({doa_score}/10): {doa_feedback}
+Grammar ({g_score}/10): {g_feedback}"""
+
+
+# define functions
+def grade(state: Essay_state):
+    result = fused_llm.invoke(
+        "Evaluate the essay below on three rubrics: clarity of thought, depth of analysis and grammar. "
+        f"Give honest feedback and a score out of 10 for each:\n{state['essay']}"
+    )
+    return {
+        "cot_feedback": result.clarity.feedback,
+        "doa_feedback": result.depth.feedback,
+        "g_feedback": result.grammar.feedback,
+        "scores": [result.clarity.score, result.depth.score, result.grammar.score]
+    }
+
+def final_eval(state: Essay_state):
+    avg_score = round(sum(state["scores"]) / len(state["scores"]), 2)
+    cot_score, doa_score, g_score = state["scores"][-3:]
+
+    summary = SUMMARY_TEMPLATE.format(
+        avg_score=avg_score,
+        cot_score=cot_score, cot_feedback=state["cot_feedback"],
+        doa_score=doa_score, doa_feedback=state["doa_feedback"],
+        g_score=g_score, g_feedback=state["g_feedback"],
+    )
+
+    return {
+        "summarized_feedback": summary,
+        "avg_score": avg_score
+    }
+
+
+# define graph
+graph = StateGraph(Essay_state)
+
+
+# graph nodes
+graph.add_node("grade", grade)
+graph.add_node("final_eval", final_eval)
+
+
+# graph edges -> no fan-out, so no merge_barrier
+graph.add_edge(START, "grade")
+graph.add_edge("grade", "final_eval")
+graph.add_edge("final_eval", END)
+
+
+# compile the graph
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # same essay as the fan-out graph
+    essay = load_script('2_parallel_workflows/2_essay_eval_workflow.py').essay
+
+    initial_state = {
+        "essay": essay,
+        "cot_feedback": "",
+        "doa_feedback": "",
+        "g_feedback": "",
+        "summarized_feedback": "",
+        "scores": [],
+        "avg_score": 0.0
+    }
+
+    final_state = workflow.invoke(initial_state)
+
+    print(final_state["scores"], final_state["avg_score"])
+    print(final_state["summarized_feedback"])
+
+
+    # visualize graph
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Fused grading
+
+- 2_essay_eval_workflow.py makes 4 model calls per essay
+    - cot, doa and g each send the full essay (3× the input tokens of the essay)
+    - final_eval waits for all three, then makes a 4th call only to summarize → one more serial round-trip
+- Here one structured call (Fused_struct_op) returns the feedback and score of all three rubrics
+    - the essay is sent once → ~1/3 of the input tokens
+    - 1 model call on the critical path instead of 2 (fan-out + summary)
+    - the summary is built from SUMMARY_TEMPLATE, no model call
+- The output has the same Essay_state shape: cot/doa/g_feedback, scores (clarity, depth, grammar), summarized_feedback, avg_score
+- Trade-off: the three rubrics are judged in one answer, so they can influence each other
+  → benchmarks/bench_essay_fused.py compares latency, tokens and the score agreement with the fan-out graph
+'''
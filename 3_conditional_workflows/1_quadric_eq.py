@@ -1,5 +1,6 @@
 from langgraph.graph import StateGraph, START, END
 from typing import TypedDict, Literal
+from functools import cache
 
 
 class QE_State(TypedDict):
@@ -26,8 +27,9 @@ def calc_discri(state: QE_State) -> QE_State:
     return {'discriminent': d}
 
 def real_roots(state: QE_State) -> QE_State:
-    root1 = (-state['b'] + (state['discriminent'])**0.5)/2*state['a']
-    root2 = (-state['b'] - (state['discriminent'])**0.5)/2*state['a']
+    # the whole numerator is divided by 2a -> '/2*a' would divide by 2 and then multiply by a
+    root1 = (-state['b'] + (state['discriminent'])**0.5)/(2*state['a'])
+    root2 = (-state['b'] - (state['discriminent'])**0.5)/(2*state['a'])
 
     result = f'd>0 and roots are real: {root1} and {root2}'
 
@@ -71,17 +73,23 @@ graph.add_edge('repeating_roots', END)
 
 
 # complie graph
-workflow = graph.compile()
+@cache
+def get_workflow():
+    return graph.compile()
 
 
-initial_state = {
-    'a': 1,
-    'b': 2,
-    'c': 1
-}
-final_state = workflow.invoke(initial_state)
-print(final_state)
+if __name__ == '__main__':
+    workflow = get_workflow()
 
+    initial_state = {
+        'a': 1,
+        'b': 2,
+        'c': 1
+    }
+    final_state = workflow.invoke(initial_state)
+    print(final_state)
+
+
+    # visualize grpah
+    print(workflow.get_graph().print_ascii())
 
-# visualize grpah
-print(workflow.get_graph().print_ascii())
@@ -1,16 +1,22 @@
 from langgraph.graph import StateGraph, START, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from typing import TypedDict, Literal
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from functools import cache
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
 
 
 load_dotenv()
+enable_llm_cache()
 api_key = os.getenv('GEMINI_API_KEY')
 
 
-model = ChatGoogleGenerativeAI(
+model = get_chat_model(
     model='gemini-2.5-flash-lite',
     api_key=api_key
 )
@@ -38,29 +44,43 @@ class Main_State(TypedDict):
 graph = StateGraph(Main_State)
 
 
+# prompts -> also used by 4_speculative_diagnosis.py
+def sentiment_prompt(review: str) -> str:
+    return f'Tell the sentiment of this review is either positive or negative? \n {review}'
+
+def positive_prompt(review: str) -> str:
+    return f'Write a good response to this positive review and at the end ask user to also give feedback \n {review}'
+
+def diagnosis_prompt(review: str) -> str:
+    return f'According to this review tell the main_issue and urgency of this negative review and also mood of the user \n {review}'
+
+def negative_prompt(review: str, diagnosis: dict) -> str:
+    return f'Write a  response to this negative review according to these {diagnosis} and be respectful with user \n {review}'
+
+
 def sentiment(state: Main_State) -> Main_State:
-    prompt = f'Tell the sentiment of this review is either positive or negative? \n {state["review"]}'
+    prompt = sentiment_prompt(state['review'])
 
     response = struct_model1.invoke(prompt)
 
     return {'sentiment': response.sentiment}
 
 def positive_response(state: Main_State) -> Main_State:
-    prompt = f'Write a good response to this positive review and at the end ask user to also give feedback \n {state["review"]}'
+    prompt = positive_prompt(state['review'])
 
     response = model.invoke(prompt).content
 
     return {'response': response}
 
 def diagnosis(state: Main_State) -> Main_State:
-    prompt = f'According to this review tell the main_issue and urgency of this negative review and also mood of the user \n {state["review"]}'
+    prompt = diagnosis_prompt(state['review'])
 
     response = struct_model2.invoke(prompt)
 
     return {'diagnosis': response.model_dump()}
 
 def negative_response(state: Main_State) -> Main_State:
-    prompt = f'Write a  response to this negative review according to these {state["diagnosis"]} and be respectful with user \n {state["review"]}'
+    prompt = negative_prompt(state['review'], state['diagnosis'])
 
     response = model.invoke(prompt).content
 
@@ -91,15 +111,21 @@ graph.add_edge('negative_response', END)
 
 
 # complie graph
-workflow = graph.compile()
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
 
+    initial_state = {
+        'review': 'This website is is very good, very simple to use and so lite loved it'
+    }
+    final_state = workflow.invoke(initial_state)
+    print(final_state)
 
-initial_state = {
-    'review': 'This website is is very good, very simple to use and so lite loved it'
-}
-final_state = workflow.invoke(initial_state)
-print(final_state)
 
+    # visualize grpah
+    print(workflow.get_graph().print_ascii())
 
-# visualize grpah
-print(workflow.get_graph().print_ascii())
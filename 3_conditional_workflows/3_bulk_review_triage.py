@@ -0,0 +1,192 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from collections import Counter
+import threading
+import argparse
+import json
+import time
+import csv
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.loader import load_script
+
+
+# the sentiment -> response graph, its schemas and prompts come from 2_senti_response.py, this script only adds the batch runner
+senti_response = load_script('3_conditional_workflows/2_senti_response.py')
+get_workflow = senti_response.get_workflow
+condition_checker = senti_response.condition_checker
+
+
+# lazy readers -> one (offset, review) at a time, the file is never loaded whole.
+# A line that is not valid JSON or has no review field yields its error instead of a review, the rest of the file still runs
+def read_reviews(path: str, field: str = 'review') -> Iterator[tuple[int, str | None, str | None]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            for offset, row in enumerate(csv.DictReader(f)):
+                review = row.get(field)
+                yield (offset, review, None) if review is not None else (offset, None, f'missing {field!r} column')
+        else:
+            for offset, line in enumerate(f):
+                if not line.strip():
+                    continue
+                try:
+                    yield offset, json.loads(line)[field], None
+                except (json.JSONDecodeError, KeyError, TypeError) as e:
+                    yield offset, None, repr(e)
+
+
+# offsets already finished by an earlier run, kept as a high-water mark plus the gaps below it
+# -> memory grows with the reviews still missing (in flight at the crash, or failed), not with the file
+class Finished_Offsets:
+    def __init__(self):
+        self.high = 0  # every offset >= high is unfinished
+        self.gaps: set[int] = set()  # unfinished offsets below high
+        self.count = 0
+
+    def add(self, offset: int) -> None:
+        if offset >= self.high:
+            self.gaps.update(range(self.high, offset))
+            self.high = offset + 1
+        elif offset in self.gaps:
+            self.gaps.remove(offset)
+        else:
+            return  # already counted
+        self.count += 1
+
+    def __contains__(self, offset: int) -> bool:
+        return offset < self.high and offset not in self.gaps
+
+
+def cut_torn_line(f) -> None:
+    # a crash can leave a half-written last line, cut it off before appending again
+    end = f.seek(0, os.SEEK_END)
+    if not end:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b'\n':
+        return
+
+    position = end
+    while position > 0:
+        step = min(65536, position)
+        position -= step
+        f.seek(position)
+        block = f.read(step)
+        if (newline := block.rfind(b'\n')) >= 0:
+            f.truncate(position + newline + 1)
+            return
+    f.truncate(0)
+
+
+def finished_offsets(output_path: str) -> Finished_Offsets:
+    done = Finished_Offsets()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, 'rb+') as f:
+        cut_torn_line(f)
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                # failed reviews (429, timeout, ...) are not finished -> tried again on resume
+                if record['branch'] != 'error':
+                    done.add(record['offset'])
+
+    return done
+
+
+def run_pipeline(input_path: str, output_path: str, workers: int = 16, max_pending: int | None = None) -> dict:
+    done = finished_offsets(output_path)
+    if done.count:
+        print(f'resuming: {done.count} reviews already finished, {len(done.gaps)} unfinished below offset {done.high}')
+
+    # backpressure -> the reader blocks once max_pending reviews are queued or running
+    slots = threading.BoundedSemaphore(max_pending or workers * 2)
+    write_lock = threading.Lock()
+    stats = Counter()
+    start = time.perf_counter()
+
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def write(record: dict, branch: str) -> None:
+            # one line per finished review, flushed right away so a crash loses at most the in-flight ones
+            with write_lock:
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                stats[branch] += 1
+                stats['processed'] += 1
+                if stats['processed'] % 1000 == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{stats['processed']} reviews, {stats['processed'] / elapsed:.1f} reviews/sec")
+
+        def triage(offset: int, review: str):
+            try:
+                state = get_workflow().invoke({'review': review})
+                branch = condition_checker(state)
+                record = {'offset': offset, 'review': review, 'sentiment': state['sentiment'], 'branch': branch, 'diagnosis': state.get('diagnosis'), 'response': state['response']}
+            except Exception as e:
+                branch = 'error'
+                record = {'offset': offset, 'review': review, 'branch': branch, 'error': repr(e)}
+
+            try:
+                write(record, branch)
+            finally:
+                slots.release()
+
+        for offset, review, error in read_reviews(input_path):
+            if offset in done:
+                stats['skipped'] += 1
+                continue
+
+            # a malformed line -> an error record for its offset (tried again on resume, e.g. after fixing the file)
+            if error is not None:
+                write({'offset': offset, 'review': review, 'branch': 'error', 'error': error}, 'error')
+                continue
+
+            slots.acquire()
+            pool.submit(triage, offset, review)
+
+    elapsed = time.perf_counter() - start
+    processed = stats['processed']
+
+    return {
+        'processed': processed,
+        'skipped': stats['skipped'],
+        'errors': stats['error'],
+        'seconds': round(elapsed, 2),
+        'reviews_per_sec': round(processed / elapsed, 2) if elapsed else 0.0,
+        'positive_response': stats['positive_response'],
+        'diagnosis': stats['diagnosis'],
+        'negative_share': round(stats['diagnosis'] / processed, 3) if processed else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Triage a JSONL/CSV file of reviews with the sentiment workflow')
+    parser.add_argument('input', help="reviews file (.jsonl with a 'review' field per line, or .csv with a 'review' column)")
+    parser.add_argument('output', help='responses file (.jsonl), appended to and used to resume')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--max-pending', type=int, default=None, help='reviews queued or running at once (default 2 x workers)')
+    args = parser.parse_args()
+
+    print(run_pipeline(args.input, args.output, workers=args.workers, max_pending=args.max_pending))
+
+
+'''
+Bulk triage pipeline
+
+- The graph, schemas and prompts are the ones of 2_senti_response.py (loaded with utils.loader.load_script), this script is only the batch runner
+- read_reviews reads the JSONL/CSV file lazily, one review at a time; a line that is not valid JSON or has no review
+  is written as an error record for its offset and the run goes on
+- A ThreadPoolExecutor runs workflow.invoke for many reviews at the same time (the work is network bound, so threads are enough)
+- Backpressure: a BoundedSemaphore with max_pending slots is taken before every submit and given back when the review is written,
+  so the reader can never run ahead of the workers and memory stays flat for any file size
+- Every finished review is appended to the output file as one JSON line with its input offset and flushed immediately
+- Resume: on start the output file is streamed, a torn last line is cut off, and every offset with a result is skipped;
+  reviews that ended in an error are tried again. Finished offsets are a high-water mark plus the gaps below it, so resume
+  memory stays flat as well
+- Stats: throughput in reviews/sec and how many reviews went to positive_response vs diagnosis
+'''
@@ -0,0 +1,245 @@
+from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from typing import Literal
+from functools import cache
+import threading
+import asyncio
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.loader import load_script
+
+
+# model, schemas, prompts, state and the sync nodes all come from 2_senti_response.py
+senti_response = load_script('3_conditional_workflows/2_senti_response.py')
+model = senti_response.model
+struct_model1 = senti_response.struct_model1
+struct_model2 = senti_response.struct_model2
+Main_State = senti_response.Main_State
+
+
+# speculation metrics, shared by every run in this process
+# -> sync runs update them from LangGraph's executor threads, so every change and read goes through the lock
+class Speculation_Metrics:
+    def __init__(self):
+        self.started = 0  # speculative diagnosis calls started
+        self.used = 0  # ... whose result was used (negative review)
+        self.wasted = 0  # ... cancelled or discarded (positive review), or failed (diagnosis runs again)
+        self.saved_secs = 0.0  # latency removed from negative reviews
+        self.lock = threading.Lock()
+
+    def add(self, **deltas) -> None:
+        with self.lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def report(self) -> dict:
+        with self.lock:
+            started, used, wasted, saved_secs = self.started, self.used, self.wasted, self.saved_secs
+
+        return {
+            'speculative_calls': started,
+            'used': used,
+            'wasted': wasted,
+            'waste_rate': round(wasted / started, 3) if started else 0.0,
+            'latency_saved_ms': round(saved_secs * 1000, 1),
+            'avg_saved_ms_per_negative': round(saved_secs * 1000 / used, 1) if used else 0.0,
+        }
+
+metrics = Speculation_Metrics()
+
+# sync runs have no event loop -> their speculative diagnosis runs in one of these threads
+speculation_pool = ThreadPoolExecutor(max_workers=int(os.getenv('MAX_LLM_CONCURRENCY', '16')), thread_name_prefix='speculation')
+
+
+graph = StateGraph(Main_State)
+
+
+def run_diagnosis(review: str) -> tuple[dict, float]:
+    start = time.perf_counter()
+    response = struct_model2.invoke(senti_response.diagnosis_prompt(review))
+
+    return response.model_dump(), time.perf_counter() - start
+
+async def arun_diagnosis(review: str) -> tuple[dict, float]:
+    start = time.perf_counter()
+    response = await struct_model2.ainvoke(senti_response.diagnosis_prompt(review))
+
+    return response.model_dump(), time.perf_counter() - start
+
+
+def use_speculation(sentiment: str, sentiment_secs: float, outcome: tuple[dict, float] | None) -> Main_State:
+    # outcome None -> the guess failed (429, timeout, bad output): no diagnosis in the state, so condition_checker
+    # takes the normal sequential path and the diagnosis node calls the model again
+    if outcome is None:
+        metrics.add(wasted=1)
+        return {'sentiment': sentiment}
+
+    diagnosis, diagnosis_secs = outcome
+    # sequential path = sentiment + diagnosis, speculative path = max of the two
+    metrics.add(used=1, saved_secs=min(sentiment_secs, diagnosis_secs))
+
+    return {'sentiment': sentiment, 'diagnosis': diagnosis}
+
+
+def sentiment(state: Main_State, config: RunnableConfig) -> Main_State:
+    if not config['configurable'].get('speculative', False):
+        return senti_response.sentiment(state)
+
+    # speculative mode -> diagnosis starts at the same time as sentiment, in a thread
+    speculation = speculation_pool.submit(run_diagnosis, state['review'])
+    metrics.add(started=1)
+
+    start = time.perf_counter()
+    try:
+        response = struct_model1.invoke(senti_response.sentiment_prompt(state['review']))
+    except BaseException:
+        speculation.cancel()
+        raise
+    sentiment_secs = time.perf_counter() - start
+
+    if response.sentiment == 'positive':
+        # wrong guess -> a call already running in a thread cannot be cancelled, its result is dropped
+        speculation.cancel()
+        metrics.add(wasted=1)
+        return {'sentiment': response.sentiment}
+
+    try:
+        outcome = speculation.result()
+    except (Exception, CancelledError):
+        outcome = None
+    return use_speculation(response.sentiment, sentiment_secs, outcome)
+
+async def asentiment(state: Main_State, config: RunnableConfig) -> Main_State:
+    prompt = senti_response.sentiment_prompt(state['review'])
+
+    if not config['configurable'].get('speculative', False):
+        response = await struct_model1.ainvoke(prompt)
+        return {'sentiment': response.sentiment}
+
+    # speculative mode -> diagnosis starts at the same time as sentiment
+    speculation = asyncio.create_task(arun_diagnosis(state['review']))
+    speculation.add_done_callback(lambda task: task.cancelled() or task.exception())  # errors of a discarded guess are not re-raised
+    metrics.add(started=1)
+
+    start = time.perf_counter()
+    try:
+        response = await struct_model1.ainvoke(prompt)
+    except BaseException:
+        speculation.cancel()
+        raise
+    sentiment_secs = time.perf_counter() - start
+
+    if response.sentiment == 'positive':
+        # wrong guess -> cancel the request if it is still in flight, otherwise drop its result
+        speculation.cancel()
+        metrics.add(wasted=1)
+        return {'sentiment': response.sentiment}
+
+    try:
+        outcome = await speculation
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        outcome = None
+    return use_speculation(response.sentiment, sentiment_secs, outcome)
+
+async def apositive_response(state: Main_State) -> Main_State:
+    response = (await model.ainvoke(senti_response.positive_prompt(state['review']))).content
+
+    return {'response': response}
+
+async def adiagnosis(state: Main_State) -> Main_State:
+    diagnosis, _ = await arun_diagnosis(state['review'])
+
+    return {'diagnosis': diagnosis}
+
+async def anegative_response(state: Main_State) -> Main_State:
+    response = (await model.ainvoke(senti_response.negative_prompt(state['review'], state['diagnosis']))).content
+
+    return {'response': response}
+
+def condition_checker(state: Main_State) -> Literal['positive_response', 'diagnosis', 'negative_response']:
+    if state['sentiment'] == 'positive':
+        return 'positive_response'
+    elif state.get('diagnosis'):
+        # diagnosis already finished speculatively
+        return 'negative_response'
+    else:
+        return 'diagnosis'
+
+
+# define nodes -> a sync and an async body each, so invoke and ainvoke both work
+graph.add_node('sentiment', RunnableLambda(sentiment, afunc=asentiment, name='sentiment'))
+graph.add_node('positive_response', RunnableLambda(senti_response.positive_response, afunc=apositive_response, name='positive_response'))
+graph.add_node('diagnosis', RunnableLambda(senti_response.diagnosis, afunc=adiagnosis, name='diagnosis'))
+graph.add_node('negative_response', RunnableLambda(senti_response.negative_response, afunc=anegative_response, name='negative_response'))
+
+
+# define edges
+graph.add_edge(START, 'sentiment')
+
+graph.add_conditional_edges('sentiment', condition_checker)
+
+graph.add_edge('positive_response', END)
+graph.add_edge('diagnosis', 'negative_response')
+graph.add_edge('negative_response', END)
+
+
+# complie graph
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+async def timed_run(review: str, speculative: bool) -> tuple[Main_State, float]:
+    start = time.perf_counter()
+    final_state = await get_workflow().ainvoke({'review': review}, config={'configurable': {'speculative': speculative}})
+
+    return final_state, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # compare both modes on the same reviews
+    reviews = [
+        'This website is is very good, very simple to use and so lite loved it',
+        'Payment failed three times and the money was still taken from my account. Fix this now!',
+        'The app keeps crashing when I open my orders page, really annoying',
+        'Great support team, they solved my problem in minutes',
+    ]
+
+    for speculative in [False, True]:
+        print(f'\n--- speculative={speculative} ---')
+        for review in reviews:
+            final_state, secs = asyncio.run(timed_run(review, speculative))
+            print(f"{final_state['sentiment']:<8} {secs * 1000:8.1f} ms  {final_state.get('diagnosis')}")
+
+    print('\n', metrics.report())
+
+
+    # visualize grpah
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Speculative diagnosis
+
+- Normal path for a negative review: sentiment → diagnosis → negative_response, three LLM round-trips one after the other
+- With config {'configurable': {'speculative': True}} the sentiment node also starts the diagnosis call as an asyncio task
+    - negative review → the diagnosis is (almost) ready when sentiment returns, condition_checker sees state['diagnosis'] and jumps straight to negative_response
+    - positive review → the task is cancelled (or its result thrown away if it already finished), this is the wasted call
+    - a speculative call that fails also counts as wasted; the review then takes the normal diagnosis node, so an error
+      in the guess never fails a run that would have succeeded without speculation
+- Latency saved per negative review = min(sentiment time, diagnosis time), because the two calls now overlap
+- The price is one extra diagnosis call per positive review, so speculation pays off when negative reviews are common or urgent
+- It is opt-in: without 'speculative' the graph behaves exactly like 2_senti_response.py, whose model, schemas, prompts
+  and state it imports (utils.loader.load_script)
+- Every node has a sync and an async body (RunnableLambda(func, afunc=...)), so invoke and ainvoke both work
+    - ainvoke: the guess is an asyncio task and a wrong one is cancelled while in flight
+    - invoke: the guess runs in a thread of speculation_pool, a wrong one cannot be cancelled, only its result is dropped
+'''
@@ -0,0 +1,201 @@
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from typing import TypedDict, Annotated
+from functools import cache
+import numpy as np
+import operator
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.loader import load_script
+
+
+# batch state -> one row per equation, every field is a column
+class QE_Batch_State(TypedDict):
+    a: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+
+    discriminent: np.ndarray
+    parts: Annotated[list[dict], operator.add]  # one sub-batch result per branch, merged like scores in the essay workflow
+
+    kind: np.ndarray  # 'real' / 'non_real' / 'repeating' per row
+    root1: np.ndarray
+    root2: np.ndarray
+
+
+# what a branch receives through Send -> only its own rows and their positions in the batch
+class Sub_Batch(TypedDict):
+    idx: np.ndarray
+    a: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+    discriminent: np.ndarray
+
+
+graph = StateGraph(QE_Batch_State)
+
+
+def calc_discri(state: QE_Batch_State) -> QE_Batch_State:
+    d = state['b']**2 - (4*state['a']*state['c'])
+
+    return {'discriminent': d}
+
+def real_roots(batch: Sub_Batch) -> QE_Batch_State:
+    a, b, c = batch['a'], batch['b'], batch['c']
+
+    # q = -(b + sign(b)·√d)/2 never subtracts two close numbers, so a tiny root of a large b keeps its digits
+    # (the school formula (-b + √d)/2a loses them to cancellation). The two roots are q/a and c/q
+    q = -0.5 * (b + np.where(b >= 0, 1.0, -1.0) * np.sqrt(batch['discriminent']))
+    root1, root2 = q / a, c / q
+
+    return {'parts': [{'kind': 'real', 'idx': batch['idx'], 'root1': root1, 'root2': root2}]}
+
+def non_real_roots(batch: Sub_Batch) -> QE_Batch_State:
+    a, b = batch['a'], batch['b']
+
+    real = -b / (2*a)
+    imag = np.sqrt(-batch['discriminent']) / (2*np.abs(a))
+
+    return {'parts': [{'kind': 'non_real', 'idx': batch['idx'], 'root1': real + 1j*imag, 'root2': real - 1j*imag}]}
+
+def repeating_roots(batch: Sub_Batch) -> QE_Batch_State:
+    root = (-batch['b']) / (2 * batch['a'])
+
+    return {'parts': [{'kind': 'repeating', 'idx': batch['idx'], 'root1': root, 'root2': root}]}
+
+def collect(state: QE_Batch_State) -> QE_Batch_State:
+    n = len(state['a'])
+    # a row no part covers stays None / nan instead of whatever memory np.empty handed out
+    kind = np.full(n, None, dtype=object)
+    root1 = np.full(n, np.nan, dtype=np.complex128)
+    root2 = np.full(n, np.nan, dtype=np.complex128)
+
+    # every part knows its row positions -> scatter back into input order
+    for part in state['parts']:
+        kind[part['idx']] = part['kind']
+        root1[part['idx']] = part['root1']
+        root2[part['idx']] = part['root2']
+
+    return {'kind': kind, 'root1': root1, 'root2': root2}
+
+# not a node function -> splits the batch by the sign of d and sends each branch only its rows
+def condition_checker(state: QE_Batch_State) -> list[Send | str]:
+    d = state['discriminent']
+    sends = []
+
+    for branch, mask in [('real_roots', d > 0), ('non_real_roots', d < 0), ('repeating_roots', d == 0)]:
+        idx = np.flatnonzero(mask)
+        if len(idx):
+            sends.append(Send(branch, {'idx': idx, 'a': state['a'][idx], 'b': state['b'][idx], 'c': state['c'][idx], 'discriminent': d[idx]}))
+
+    # an empty batch sends nothing -> go straight to collect so the output still has (empty) kind/root1/root2
+    return sends or ['collect']
+
+
+graph.add_node('calc_discri', calc_discri)
+graph.add_node('real_roots', real_roots)
+graph.add_node('non_real_roots', non_real_roots)
+graph.add_node('repeating_roots', repeating_roots)
+graph.add_node('collect', collect)
+
+
+graph.add_edge(START, 'calc_discri')
+
+graph.add_conditional_edges('calc_discri', condition_checker, ['real_roots', 'non_real_roots', 'repeating_roots', 'collect'])
+
+graph.add_edge('real_roots', 'collect')
+graph.add_edge('non_real_roots', 'collect')
+graph.add_edge('repeating_roots', 'collect')
+
+graph.add_edge('collect', END)
+
+
+# complie graph
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+# entry point -> (a, b, c) columns in, roots out in the same order
+def solve_batch(a, b, c) -> QE_Batch_State:
+    a, b, c = (np.asarray(x, dtype=np.float64) for x in (a, b, c))
+
+    if not a.shape == b.shape == c.shape:
+        raise ValueError('a, b and c must have the same length')
+    if a.ndim != 1:
+        raise ValueError('a, b and c must be 1-D columns')
+    if not (finite := np.isfinite(a) & np.isfinite(b) & np.isfinite(c)).all():
+        raise ValueError(f'{np.count_nonzero(~finite)} rows have a NaN or infinite coefficient')
+    if np.any(a == 0):
+        raise ValueError(f'{np.count_nonzero(a == 0)} rows have a = 0 and are not quadratic equations')
+
+    return get_workflow().invoke({'a': a, 'b': b, 'c': c, 'parts': []})
+
+
+# reference solver -> np.roots (eigenvalues of the companion matrix), one equation at a time
+def reference_roots(a, b, c) -> np.ndarray:
+    return np.array([np.sort_complex(np.roots([ai, bi, ci]).astype(np.complex128)) for ai, bi, ci in zip(a, b, c)])
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # small batch -> one equation per branch, in mixed order
+    final_state = solve_batch(a=[1, 1, 2, 1], b=[2, -3, 1, 10_000], c=[1, 2, 5, 1])
+    for i in range(4):
+        print(f"row {i}: {final_state['kind'][i]:<10} {final_state['root1'][i]:.6g}  {final_state['root2'][i]:.6g}")
+
+
+    # check against the reference solver
+    rng = np.random.default_rng(0)
+    n_rows = 1_000_000
+    a = rng.integers(1, 20, n_rows) * rng.choice([-1, 1], n_rows)
+    b = rng.integers(-50, 50, n_rows)
+    c = rng.integers(-50, 50, n_rows)
+    b[:1000], c[:1000] = 2 * a[:1000], a[:1000]  # some exact d = 0 rows
+
+    start = time.perf_counter()
+    final_state = solve_batch(a, b, c)
+    batch_secs = time.perf_counter() - start
+
+    n_check = 20_000
+    ours = np.sort_complex(np.stack([final_state['root1'][:n_check], final_state['root2'][:n_check]], axis=1))
+    expected = reference_roots(a[:n_check], b[:n_check], c[:n_check])
+    assert np.allclose(ours, expected, rtol=1e-7, atol=1e-7)
+    print(f'{n_check:,} rows match np.roots, branch sizes: { {k: int(v) for k, v in zip(*np.unique(final_state["kind"], return_counts=True))} }')
+
+
+    # benchmark -> per-equation invoke of 1_quadric_eq.py vs one batch invoke
+    row_workflow = load_script('3_conditional_workflows/1_quadric_eq.py').get_workflow()
+
+    n_loop = 2_000
+    start = time.perf_counter()
+    for i in range(n_loop):
+        row_workflow.invoke({'a': int(a[i]), 'b': int(b[i]), 'c': int(c[i])})
+    loop_secs = time.perf_counter() - start
+
+    print(f'per-row invoke loop: {n_loop/loop_secs:,.0f} equations/sec')
+    print(f'batch invoke:        {n_rows/batch_secs:,.0f} equations/sec ({n_rows:,} in {batch_secs:.2f}s)')
+
+
+    # visualize grpah
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Batch-partitioned routing
+
+- 1_quadric_eq.py routes one equation per invoke: condition_checker returns one branch name
+- Here the state holds columns of (a, b, c) and condition_checker returns a list of Send objects
+    - the rows are split into sub-batches by the sign of d (d > 0, d < 0, d = 0)
+    - each branch gets only its own rows plus their positions (idx) and solves them with vectorized numpy
+    - branches with no rows are not sent at all
+- The branches add their results to 'parts' (operator.add), and 'collect' scatters every part back by idx → output in input order
+- solve_batch rejects rows with a = 0 or a NaN/inf coefficient; an empty batch goes straight to 'collect' and returns empty columns
+- Real roots use the cancellation-free form q = -(b + sign(b)√d)/2, roots q/a and c/q; non-real roots are returned as complex numbers
+- The results are checked against np.roots as the reference solver
+- The real-root formula in 1_quadric_eq.py was (-b ± √d)/2*a, which is ((-b ± √d)/2)·a → fixed to (-b ± √d)/(2a)
+'''
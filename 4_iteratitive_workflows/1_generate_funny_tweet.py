@@ -1,25 +1,41 @@
 from langgraph.graph import StateGraph, START, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from typing import TypedDict, Literal, Annotated
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from functools import cache
+import threading
 import operator
+import hashlib
+import re
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
 
 
 load_dotenv()
+enable_llm_cache()
 api_key = os.getenv('GEMINI_API_KEY')
 
+# a rewrite this similar (0-1) to an earlier tweet ends the loop, and evaluations kept per process
+NEAR_DUPLICATE_RATIO = float(os.getenv('TWEET_NEAR_DUPLICATE_RATIO', '0.9'))
+EVAL_MEMO_SIZE = 1024
+
 
 # define llm models
-generator_model = ChatGoogleGenerativeAI(model='gemini-2.5-flash', api_key=api_key)
-eval_model = ChatGoogleGenerativeAI(model='gemini-2.5-flash', api_key=api_key)
-optimize_model = ChatGoogleGenerativeAI(model='gemini-2.5-flash', api_key=api_key)
+generator_model = get_chat_model(model='gemini-2.5-flash', api_key=api_key)
+eval_model = get_chat_model(model='gemini-2.5-flash', api_key=api_key)
+optimize_model = get_chat_model(model='gemini-2.5-flash', api_key=api_key)
 
 class eval_schema(BaseModel):
     status: Literal['approved', 'needs_improvements'] = Field(description='status approved or needs_improvements based on feedback')
     feedback: str = Field(description='feedback of the tweet')
+    score: int = Field(description='overall quality of the tweet from 1 to 10', ge=1, le=10)
 struct_eval_model = eval_model.with_structured_output(eval_schema)
 
 
@@ -36,6 +52,47 @@ class Tweet_State(TypedDict):
 
     iteration: int
 
+    best: dict  # tweet, feedback, status and score of the best evaluated tweet so far
+    stop_reason: Literal['approved', 'max_iteration', 'near_duplicate', 'oscillation']
+    llm_calls: Annotated[int, operator.add]
+    llm_calls_avoided: Annotated[int, operator.add]
+    rounds_skipped: int  # rounds left before max_iteration when the loop stopped on a repetition
+
+
+# case, punctuation and spacing do not change a tweet -> 'Wow!!  Traffic' and 'wow, traffic' share one key
+def normalize(tweet: str) -> str:
+    return ' '.join(re.sub(r'[^\w\s#@]', ' ', tweet.casefold()).split())
+
+def tweet_key(tweet: str) -> str:
+    return hashlib.sha1(normalize(tweet).encode()).hexdigest()
+
+
+# evaluations by tweet_key, LRU bounded, shared by every run in the process
+eval_memo: OrderedDict[str, eval_schema] = OrderedDict()
+eval_memo_lock = threading.Lock()
+
+def memo_get(key: str) -> eval_schema | None:
+    with eval_memo_lock:
+        if key in eval_memo:
+            eval_memo.move_to_end(key)
+        return eval_memo.get(key)
+
+def memo_put(key: str, response: eval_schema) -> None:
+    with eval_memo_lock:
+        eval_memo[key] = response
+        if len(eval_memo) > EVAL_MEMO_SIZE:
+            eval_memo.popitem(last=False)
+
+
+# the newest tweet against the earlier ones -> None, 'near_duplicate' (of the previous tweet) or 'oscillation' (of an older one)
+def repetition(tweet_history: list[str]) -> str | None:
+    *earlier, latest = [normalize(t) for t in tweet_history]
+
+    for age, tweet in enumerate(reversed(earlier)):
+        if SequenceMatcher(None, tweet, latest).ratio() >= NEAR_DUPLICATE_RATIO:
+            return 'near_duplicate' if age == 0 else 'oscillation'
+    return None
+
 
 # define graph
 graph = StateGraph(Tweet_State)
@@ -59,7 +116,7 @@ Rules:
 
     response = generator_model.invoke(prompt).content
 
-    return {'tweet': response, 'tweet_history': [response]}
+    return {'tweet': response, 'tweet_history': [response], 'llm_calls': 1}
 
 def eval_llm(state: Tweet_State) -> Tweet_State:
     prompt = [
@@ -86,12 +143,28 @@ Auto-reject if:
 ### Respond ONLY in structured format:
 - status: "approved" or "needs_improvements"  
 - feedback: One paragraph explaining the strengths and weaknesses 
+- score: 1 to 10
 """)
     ]
 
-    response = struct_eval_model.invoke(prompt)
+    key = tweet_key(state['tweet'])
+    response = memo_get(key)
+    calls = int(response is None)
+    if response is None:
+        response = struct_eval_model.invoke(prompt)
+        memo_put(key, response)
+
+    update = {
+        'feedback': response.feedback, 'status': response.status, 'feedback_history': [response.feedback],
+        'llm_calls': calls, 'llm_calls_avoided': 1 - calls
+    }
 
-    return {'feedback': response.feedback, 'status': response.status, 'feedback_history': [response.feedback]}
+    # approved first, then the higher score
+    best = state.get('best')
+    if not best or (response.status == 'approved', response.score) > (best['status'] == 'approved', best['score']):
+        update['best'] = {'tweet': state['tweet'], 'feedback': response.feedback, 'status': response.status, 'score': response.score}
+
+    return update
 
 def optimizer_llm(state: Tweet_State) -> Tweet_State:
     prompt = [ 
@@ -112,7 +185,7 @@ Re-write it as a short, viral-worthy tweet. Avoid Q&A style and stay under 280 c
 
     iter = state['iteration'] + 1
 
-    return {'tweet': response, 'iteration': iter, 'tweet_history':[response]}
+    return {'tweet': response, 'iteration': iter, 'tweet_history':[response], 'llm_calls': 1}
 
 def condition_checker(state: Tweet_State):
     if state['status'] == 'approved' or state['iteration']>=state['max_iteration']:
@@ -120,34 +193,92 @@ def condition_checker(state: Tweet_State):
     else:
         return 'needs_improvements'
 
+# after optimize -> a rewrite that repeats an earlier tweet is not evaluated, the loop stops
+def repetition_checker(state: Tweet_State):
+    return 'repeated' if repetition(state['tweet_history']) else 'new'
+
+def finish(state: Tweet_State) -> Tweet_State:
+    best = state['best']
+    final = {'tweet': best['tweet'], 'feedback': best['feedback'], 'status': best['status']}
+
+    # the last rewrite was never evaluated -> optimize stopped the loop on a repetition
+    if len(state['tweet_history']) > len(state['feedback_history']):
+        # its evaluation is the one call certainly skipped; the rounds left might have been approved early,
+        # so they are reported on their own and not counted as avoided calls
+        return {
+            **final,
+            'stop_reason': repetition(state['tweet_history']),
+            'llm_calls_avoided': 1,
+            'rounds_skipped': state['max_iteration'] - state['iteration'],
+        }
+
+    return {**final, 'stop_reason': 'approved' if state['status'] == 'approved' else 'max_iteration'}
+
 
 # define nodes
 graph.add_node('generate', generate_llm)
 graph.add_node('evaluate', eval_llm)
 graph.add_node('optimize', optimizer_llm)
+graph.add_node('finish', finish)
 
 
 # define edges
 graph.add_edge(START, 'generate')
 graph.add_edge('generate', 'evaluate')
 
-graph.add_conditional_edges('evaluate', condition_checker, {'approved': END, 'needs_improvements': 'optimize'})
+graph.add_conditional_edges('evaluate', condition_checker, {'approved': 'finish', 'needs_improvements': 'optimize'})
 
-graph.add_edge('optimize', 'evaluate')
+graph.add_conditional_edges('optimize', repetition_checker, {'new': 'evaluate', 'repeated': 'finish'})
+graph.add_edge('finish', END)
 
 
 # complie graph
-workflow = graph.compile()
-
-
-initial_state = {
-    'topic': 'India Civic Sense',
-    'iteration': 0,
-    'max_iteration': 4
-}
-final_state = workflow.invoke(initial_state)
-print(final_state)
-
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    initial_state = {
+        'topic': 'India Civic Sense',
+        'iteration': 0,
+        'max_iteration': 4
+    }
+    final_state = workflow.invoke(initial_state)
+    print(final_state)
+
+    # same topic again -> every tweet seen before is scored from the memo
+    for run in range(2):
+        final_state = workflow.invoke(initial_state)
+        print(f"run {run + 1}: {final_state['llm_calls']} llm calls, {final_state['llm_calls_avoided']} avoided, stopped on {final_state['stop_reason']}"
+              f" with {final_state.get('rounds_skipped', 0)} rounds left")
+
+    # what ends the loop early
+    print(repetition(['Traffic rules are suggestions here', 'Lanes? Cute idea.', 'lanes... cute idea!']))
+    print(repetition(['Traffic rules are suggestions here', 'Lanes? Cute idea.', 'Traffic rules are suggestions here!!']))
+
+
+    # visualize the graph
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Memoized evaluation and early stop
+
+- The optimizer often rewrites a tweet into (almost) the same tweet, and each rewrite used to cost an evaluation
+  and another round, until max_iteration
+- evaluate is memoized on tweet_key: the sha1 of the tweet without case, punctuation and extra spaces
+    - an LRU of EVAL_MEMO_SIZE evaluations shared by every run in the process, so repeated topics are scored once
+    - unlike the LLM cache (exact prompt), 'Lanes? Cute idea.' and 'lanes... cute idea!' are one entry
+- After optimize, repetition_checker compares the rewrite with tweet_history (difflib ratio ≥ TWEET_NEAR_DUPLICATE_RATIO, default 0.9)
+    - like the previous tweet → 'near_duplicate', the optimizer has converged
+    - like an older tweet → 'oscillation', the loop is going around in circles (A → B → A)
+    - either way the rewrite is not evaluated and the loop stops
+- finish returns the best tweet so far (approved first, then the new score field), not the last one
+- Counters per run: llm_calls, llm_calls_avoided (memo hits + the evaluation of the repeated tweet an early stop skipped),
+  rounds_skipped (rounds left before max_iteration on an early stop, each could have been approved, so not counted as avoided)
+  and stop_reason
+'''
 
-# visualize the graph
-print(workflow.get_graph().print_ascii())
@@ -0,0 +1,241 @@
+from langgraph.graph import StateGraph, START, END
+from langchain_core.messages import SystemMessage, HumanMessage
+from typing import TypedDict, Literal, Annotated
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+from functools import cache
+import operator
+import asyncio
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
+
+
+load_dotenv()
+enable_llm_cache()
+api_key = os.getenv('GEMINI_API_KEY')
+
+
+# define llm models
+generator_model = get_chat_model(model='gemini-2.5-flash', api_key=api_key)
+eval_model = get_chat_model(model='gemini-2.5-flash', api_key=api_key)
+optimize_model = get_chat_model(model='gemini-2.5-flash', api_key=api_key)
+
+# same as 1_generate_funny_tweet.py plus a score, so candidates that all need improvements can still be ranked
+class eval_schema(BaseModel):
+    status: Literal['approved', 'needs_improvements'] = Field(description='status approved or needs_improvements based on feedback')
+    feedback: str = Field(description='feedback of the tweet')
+    score: int = Field(description='overall quality of the tweet from 1 to 10', ge=1, le=10)
+struct_eval_model = eval_model.with_structured_output(eval_schema)
+
+
+# define state
+class Tweet_State(TypedDict):
+    topic: str
+    max_iteration: int
+    n_candidates: int
+
+    candidates: list[str]
+    tweet: str
+    feedback: str
+    status: Literal['approved', 'needs_improvements']
+    tweet_history: Annotated[list[str], operator.add]
+    feedback_history: Annotated[list[str], operator.add]
+
+    iteration: int
+    llm_calls: Annotated[int, operator.add]
+
+
+# define graph
+graph = StateGraph(Tweet_State)
+
+
+# prompts
+def generate_prompt(topic: str, i: int) -> list:
+    return [
+        SystemMessage(content="You are a funny and clever Twitter/X influencer."),
+        HumanMessage(content=f"""
+Write a short, original, and hilarious tweet on the topic: "{topic}".
+
+Rules:
+- Do NOT use question-answer format.
+- Max 280 characters.
+- Use observational humor, irony, sarcasm, or cultural references.
+- Think in meme logic, punchlines, or relatable takes.
+- Use simple, day to day english
+
+This is candidate #{i + 1}, take a different angle than the obvious one.
+""")
+    ]
+
+def eval_prompt(tweet: str) -> list:
+    return [
+        SystemMessage(content="You are a ruthless, no-laugh-given Twitter critic. You evaluate tweets based on humor, originality, virality, and tweet format."),
+    HumanMessage(content=f"""
+Evaluate the following tweet:
+
+Tweet: "{tweet}"
+
+Use the criteria below to evaluate the tweet:
+
+1. Originality - Is this fresh, or have you seen it a hundred times before?
+2. Humor - Did it genuinely make you smile, laugh, or chuckle?
+3. Punchiness - Is it short, sharp, and scroll-stopping?
+4. Virality Potential - Would people retweet or share it?
+5. Format - Is it a well-formed tweet (not a setup-punchline joke, not a Q&A joke, and under 280 characters)?
+
+Auto-reject if:
+- It's written in question-answer format (e.g., "Why did..." or "What happens when...")
+- It exceeds 280 characters
+- It reads like a traditional setup-punchline joke
+- Dont end with generic, throwaway, or deflating lines that weaken the humor (e.g., “Masterpieces of the auntie-uncle universe” or vague summaries)
+
+### Respond ONLY in structured format:
+- status: "approved" or "needs_improvements"
+- feedback: One paragraph explaining the strengths and weaknesses
+- score: 1 to 10
+""")
+    ]
+
+def optimize_prompt(state: Tweet_State, i: int) -> list:
+    return [
+    SystemMessage(content="You punch up tweets for virality and humor based on given feedback."),
+    HumanMessage(content=f"""
+Improve the tweet based on this feedback:
+"{state['feedback']}"
+
+Topic: "{state['topic']}"
+Original Tweet:
+{state['tweet']}
+
+Re-write it as a short, viral-worthy tweet. Avoid Q&A style and stay under 280 characters.
+This is rewrite #{i + 1}, try something different from the other rewrites.
+""")
+    ]
+
+
+# functions -> N calls at once with asyncio.gather
+def check_n_candidates(n: int) -> None:
+    # 0 candidates -> nothing to evaluate and no best one to pick
+    if n < 1:
+        raise ValueError(f'n_candidates must be at least 1, got {n}')
+
+async def generate_llm(state: Tweet_State) -> Tweet_State:
+    n = state['n_candidates']
+    check_n_candidates(n)
+    responses = await asyncio.gather(*(generator_model.ainvoke(generate_prompt(state['topic'], i)) for i in range(n)))
+
+    candidates = [r.content for r in responses]
+
+    return {'candidates': candidates, 'tweet_history': candidates, 'llm_calls': n}
+
+async def eval_llm(state: Tweet_State) -> Tweet_State:
+    async def evaluate(tweet: str):
+        return tweet, await struct_eval_model.ainvoke(eval_prompt(tweet))
+
+    tasks = [asyncio.create_task(evaluate(tweet)) for tweet in state['candidates']]
+    results = []
+
+    try:
+        # take results in the order they finish and stop at the first approved one
+        for next_done in asyncio.as_completed(tasks):
+            tweet, response = await next_done
+            results.append((tweet, response))
+            if response.status == 'approved':
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    tweet, best = max(results, key=lambda r: (r[1].status == 'approved', r[1].score))
+
+    # every evaluation was sent when its task started, a cancelled one is billed all the same -> count them all
+    return {'tweet': tweet, 'feedback': best.feedback, 'status': best.status, 'feedback_history': [best.feedback], 'llm_calls': len(tasks)}
+
+async def optimizer_llm(state: Tweet_State) -> Tweet_State:
+    n = state['n_candidates']
+    responses = await asyncio.gather(*(optimize_model.ainvoke(optimize_prompt(state, i)) for i in range(n)))
+
+    candidates = [r.content for r in responses]
+
+    iter = state['iteration'] + 1
+
+    return {'candidates': candidates, 'iteration': iter, 'tweet_history': candidates, 'llm_calls': n}
+
+def condition_checker(state: Tweet_State):
+    if state['status'] == 'approved' or state['iteration']>=state['max_iteration']:
+        return 'approved'
+    else:
+        return 'needs_improvements'
+
+
+# define nodes
+graph.add_node('generate', generate_llm)
+graph.add_node('evaluate', eval_llm)
+graph.add_node('optimize', optimizer_llm)
+
+
+# define edges
+graph.add_edge(START, 'generate')
+graph.add_edge('generate', 'evaluate')
+
+graph.add_conditional_edges('evaluate', condition_checker, {'approved': END, 'needs_improvements': 'optimize'})
+
+graph.add_edge('optimize', 'evaluate')
+
+
+# complie graph
+@cache
+def get_workflow():
+    return graph.compile()
+
+
+async def run(topic: str, n_candidates: int, max_iteration: int = 4) -> tuple[Tweet_State, float]:
+    check_n_candidates(n_candidates)
+
+    start = time.perf_counter()
+    final_state = await get_workflow().ainvoke({
+        'topic': topic,
+        'iteration': 0,
+        'max_iteration': max_iteration,
+        'n_candidates': n_candidates,
+        'llm_calls': 0
+    })
+
+    return final_state, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    final_state, _ = asyncio.run(run('India Civic Sense', n_candidates=4))
+    print(final_state)
+
+
+    # trade-off between N and rounds -> N=1 is the serial loop of 1_generate_funny_tweet.py
+    print(f"\n{'N':>3} {'rounds':>7} {'llm calls':>10} {'seconds':>8}  status")
+    for n in [1, 2, 4, 8]:
+        final_state, secs = asyncio.run(run('Monday morning meetings', n_candidates=n))
+        print(f"{n:>3} {final_state['iteration'] + 1:>7} {final_state['llm_calls']:>10} {secs:>8.2f}  {final_state['status']}")
+
+
+    # visualize the graph
+    print(workflow.get_graph().print_ascii())
+
+
+'''
+Best-of-N refinement
+
+- 1_generate_funny_tweet.py makes one tweet per round, so each round costs two LLM calls one after the other
+- Here every round makes N candidates at once (asyncio.gather) and evaluates them at once
+    - evaluation stops at the first 'approved' candidate, the evaluations still running are cancelled
+      (they were already sent, so llm_calls counts them: it is what the round is billed for)
+    - otherwise only the best scored candidate (and its feedback) moves on to 'optimize'
+- A round still takes about two LLM round-trips of wall time, but has N chances to get approved, so fewer rounds are needed
+- n_candidates must be at least 1, run() and the generate node reject anything lower
+- The trade-off: more N → fewer rounds and lower wall-clock time, but more LLM calls (cost). The table above measures both
+'''
@@ -57,17 +57,24 @@
 
 from langgraph.graph import StateGraph, START, END
 from typing import TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
+from utils.history import iter_history
 
 from langgraph.checkpoint.memory import MemorySaver
+from functools import cache
 
 
 load_dotenv()
+enable_llm_cache()
 
 
-model = ChatGoogleGenerativeAI(
+model = get_chat_model(
     model = 'gemini-2.5-flash-lite',
     api_key = os.getenv('GEMINI_API_KEY')
 )
@@ -117,27 +124,35 @@ checkpointer = MemorySaver()
 
 
 # complie the graph with checkpointer
-workflow = graph.compile(checkpointer=checkpointer)
+@cache
+def get_workflow():
+    return graph.compile(checkpointer=checkpointer)
+
 
+if __name__ == '__main__':
+    workflow = get_workflow()
 
-# ḍefine threads
-config1 = {'configurable': {'thread_id': "1"}}
-config2 = {'configurable': {'thread_id': "2"}}
+    # ḍefine threads
+    config1 = {'configurable': {'thread_id': "1"}}
+    config2 = {'configurable': {'thread_id': "2"}}
 
 
-result1 = workflow.invoke({'topic': 'India civic sense'}, config=config1)
-print(result1)
+    result1 = workflow.invoke({'topic': 'India civic sense'}, config=config1)
+    print(result1)
 
-result2 = workflow.invoke({'topic': 'India in population'}, config=config2)
-print(result2)
+    result2 = workflow.invoke({'topic': 'India in population'}, config=config2)
+    print(result2)
 
 
-# get state
-print(workflow.get_state(config1))
-print(workflow.get_state(config2))
+    # get state
+    print(workflow.get_state(config1))
+    print(workflow.get_state(config2))
 
 
-# get_state_history -> it returns the sequence of state snapshots saved after each node execution
-print(list(workflow.get_state_history(config1)))
-print(list(workflow.get_state_history(config2)))
+    # get_state_history -> it returns the sequence of state snapshots saved after each node execution
+    # iter_history reads it page by page instead of decoding the whole thread at once
+    for snapshot in iter_history(workflow, config1):
+        print(snapshot)
+    for snapshot in iter_history(workflow, config2):
+        print(snapshot)
 
@@ -1,7 +1,13 @@
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import InMemorySaver
 from typing import TypedDict
+from functools import cache
 import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.history import iter_history
 
 
 # define the state
@@ -18,7 +24,7 @@ def step_1(state: CrashState) -> CrashState:
 
 def step_2(state: CrashState) -> CrashState:
     print("Step 2 hanging... now manually interrupt from the notebook toolbar (STOP button)")
-    time.sleep(10)  
+    time.sleep(float(os.getenv("STEP2_SLEEP_SECONDS", "10")))
     return {"step2": "done"}
 
 def step_3(state: CrashState) -> CrashState:
@@ -40,23 +46,28 @@ graph.add_edge("step_3", END)
 
 checkpointer = InMemorySaver()
 
-workflow = graph.compile(checkpointer=checkpointer)
+@cache
+def get_workflow():
+    return graph.compile(checkpointer=checkpointer)
 
 
-try:
-    print("Running graph: Please manually interrupt during Step 2...")
-    workflow.invoke({"input": "start"}, config={"configurable": {"thread_id": 'thread-1'}})
-except KeyboardInterrupt:
-    print("Kernel manually interrupted (crash simulated).")
+if __name__ == '__main__':
+    workflow = get_workflow()
 
+    try:
+        print("Running graph: Please manually interrupt during Step 2...")
+        workflow.invoke({"input": "start"}, config={"configurable": {"thread_id": 'thread-1'}})
+    except KeyboardInterrupt:
+        print("Kernel manually interrupted (crash simulated).")
 
-# re-run to show fault-tolerant resume
-print("\nRe-running the graph to demonstrate fault tolerance...")
-final_state = workflow.invoke(None, config={"configurable": {"thread_id": 'thread-1'}})
-print("\nFinal State:", final_state)
 
+    # re-run to show fault-tolerant resume
+    print("\nRe-running the graph to demonstrate fault tolerance...")
+    final_state = workflow.invoke(None, config={"configurable": {"thread_id": 'thread-1'}})
+    print("\nFinal State:", final_state)
 
-# state_history
-print(list(workflow.get_state_history({"configurable": {"thread_id": 'thread-1'}}))) 
 
+    # state_history -> page by page
+    for snapshot in iter_history(workflow, {"configurable": {"thread_id": 'thread-1'}}):
+        print(snapshot) 
 
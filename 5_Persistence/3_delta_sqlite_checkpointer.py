@@ -0,0 +1,130 @@
+from langgraph.graph import StateGraph, START, END
+from typing import TypedDict
+from dotenv import load_dotenv
+from functools import cache
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.llm_cache import enable_llm_cache
+from utils.models import get_chat_model
+from utils.sqlite_checkpointer import DeltaSqliteSaver
+from utils.history import iter_history
+
+
+load_dotenv()
+enable_llm_cache()
+
+
+model = get_chat_model(
+    model = 'gemini-2.5-flash-lite',
+    api_key = os.getenv('GEMINI_API_KEY')
+)
+
+
+# define state
+class JokeState(TypedDict):
+    topic: str
+
+    joke: str
+    explanation: str
+
+
+# define graph
+graph = StateGraph(JokeState)
+
+
+# define functions
+def joke(state: JokeState) -> JokeState:
+    prompt = f'Generate a joke about this topic \n {state["topic"]} \n Rules: \n 1. Use simple and easy to understand english \n 2. Joke should be as double meaning as possible'
+
+    response = model.invoke(prompt).content
+
+    return {'joke': response}
+
+def joke_explanation(state: JokeState) -> JokeState:
+    prompt = f'Generate a explanation about this joke \n {state["joke"]}'
+
+    response = model.invoke(prompt).content
+
+    return {'explanation': response}
+
+
+# define nodes
+graph.add_node('joke', joke)
+graph.add_node('joke_explanation', joke_explanation)
+
+
+# define edges
+graph.add_edge(START, 'joke')
+graph.add_edge('joke', 'joke_explanation')
+graph.add_edge('joke_explanation', END)
+
+
+# persistent checkpointer -> checkpoints survive a restart of this script
+db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'joke_checkpoints.sqlite')
+
+
+# complie the graph with checkpointer -> the sqlite file is only opened when the workflow is first needed
+@cache
+def get_workflow():
+    return graph.compile(checkpointer=DeltaSqliteSaver(db_path))
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+
+    # ḍefine threads
+    config1 = {'configurable': {'thread_id': "1"}}
+    config2 = {'configurable': {'thread_id': "2"}}
+
+
+    # on the second run of this script both threads have already reached END,
+    # so invoke returns the saved state from the sqlite file without calling the model again
+    result1 = workflow.invoke({'topic': 'India civic sense'}, config=config1)
+    print(result1)
+
+    result2 = workflow.invoke({'topic': 'India in population'}, config=config2)
+    print(result2)
+
+
+    # get state -> full state rebuilt from the stored partial updates
+    print(workflow.get_state(config1))
+    print(workflow.get_state(config2))
+
+
+    # get_state_history -> page by page, each snapshot is rebuilt only when its page is read
+    for snapshot in iter_history(workflow, config1):
+        print(snapshot)
+    for snapshot in iter_history(workflow, config2):
+        print(snapshot)
+
+
+    # storage used vs full snapshots after every node
+    print(workflow.checkpointer.stats())
+    print(workflow.checkpointer.stats(thread_id="1"))
+
+
+'''
+Delta-encoded SQLite checkpointer
+
+1. Problems with MemorySaver:
+    - Everything lives in RAM → lost when the program stops
+    - Memory grows with threads × steps × state size
+
+2. DeltaSqliteSaver (utils/sqlite_checkpointer.py):
+    - Stores checkpoints in a SQLite file → resume and history survive a restart
+    - Stores only what each node changed:
+        - after 'joke' → only {'joke': ...} is written
+        - after 'joke_explanation' → only {'explanation': ...} is written
+        - 'topic' is written once and shared by every later checkpoint
+        - a list that only grew (messages with add_messages) → only the new elements + the version they extend
+    - Every checkpoint remembers the version of each channel, and a read loads the blob of each channel at that version
+      → get_state and get_state_history still return complete states
+
+3. stats():
+    - stored_bytes → bytes really on disk for checkpoints + blobs
+    - full_snapshot_bytes → bytes the same history would take if the full state was saved after every node
+    - bytes_saved → the difference, it grows with the number of steps and the size of the unchanged fields
+    - pending_write_bytes → node outputs saved for resume, both layouts store them the same way so they are left out of the comparison
+'''
@@ -0,0 +1,119 @@
+from langgraph.graph import StateGraph, START, END
+from typing import TypedDict
+from functools import cache
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.sqlite_checkpointer import DeltaSqliteSaver
+from utils.history import read_history_page, iter_history, keep_last, keep_one_per_hour
+
+
+# define state -> one conversation turn, like a chatbot thread that keeps growing
+class Turn_State(TypedDict):
+    turn: int
+    question: str
+    answer: str
+
+
+# define graph
+graph = StateGraph(Turn_State)
+
+
+# define functions
+def think(state: Turn_State) -> Turn_State:
+    return {'question': f'question {state["turn"]}'}
+
+def answer(state: Turn_State) -> Turn_State:
+    return {'answer': f'answer to {state["question"]}'}
+
+
+# define nodes
+graph.add_node('think', think)
+graph.add_node('answer', answer)
+
+
+# define edges
+graph.add_edge(START, 'think')
+graph.add_edge('think', 'answer')
+graph.add_edge('answer', END)
+
+
+db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history_checkpoints.sqlite')
+
+
+# complie graph -> pauses before 'answer' when asked to, so a run can be left half-way and resumed later
+@cache
+def get_workflow():
+    return graph.compile(checkpointer=DeltaSqliteSaver(db_path))
+
+
+if __name__ == '__main__':
+    workflow = get_workflow()
+    config = {'configurable': {'thread_id': 'long-thread'}}
+    workflow.checkpointer.delete_thread('long-thread')
+
+
+    # a long thread: 1000 turns, ~4 checkpoints each, the last turn stops before 'answer'
+    n_turns = 1000
+    for turn in range(n_turns):
+        workflow.invoke({'turn': turn}, config=config)
+    workflow.invoke({'turn': n_turns}, config=config, interrupt_before=['answer'])
+    print(workflow.checkpointer.stats('long-thread'))
+
+
+    # whole history at once vs the first page
+    start = time.perf_counter()
+    everything = list(workflow.get_state_history(config))
+    all_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    page, cursor = read_history_page(workflow, config, page_size=10)
+    page_ms = (time.perf_counter() - start) * 1000
+
+    print(f'list(get_state_history): {len(everything)} snapshots in {all_ms:.1f} ms')
+    print(f'read_history_page:       {len(page)} snapshots in {page_ms:.1f} ms, next cursor {cursor}')
+
+    # the next page continues from the cursor, iter_history walks every page one at a time
+    page, cursor = read_history_page(workflow, config, page_size=10, cursor=cursor)
+    print('second page starts at turn', page[0].values['turn'])
+    print('iter_history:', sum(1 for _ in iter_history(workflow, config)), 'snapshots')
+
+
+    # compaction -> keep the last 10 checkpoints plus one per hour of the thread's life
+    print(workflow.checkpointer.compact('long-thread', keep_last(10), keep_one_per_hour(), vacuum=True))
+    print('history after compaction:', [s.values.get('turn') for s in iter_history(workflow, config)])
+
+
+    # resume still works -> the latest checkpoint and its pending writes were kept
+    print('Next node to run:', workflow.get_state(config).next)
+    print(workflow.invoke(None, config=config))
+
+
+    # the compaction job -> every thread with more than 100 checkpoints
+    print(workflow.checkpointer.compact_all(keep_last(10), min_checkpoints=100))
+
+
+'''
+Paginated history, retention and compaction
+
+1. list(workflow.get_state_history(config)) decodes every snapshot of the thread before the first one is used
+    - get_state_history itself reads the checkpointer's list eagerly, a long chatbot thread comes back all at once
+    - read_history_page (utils/history.py) asks it for one page only (limit + before=cursor)
+        → only the snapshots of that page are decoded, the returned cursor is where the next page starts
+    - iter_history walks the pages one after the other → drop-in for list(...) that holds one page in memory
+    - DeltaSqliteSaver.list also reads its table in keyset pages, so stopping early never loads the rest
+
+2. Retention policies (utils/history.py) → which checkpoints of a thread to keep
+    - keep_last(n) → the n newest
+    - keep_one_per_hour() / keep_one_per(seconds) → the newest checkpoint of every hour (or any bucket)
+    - several policies → a checkpoint is kept if any of them keeps it
+
+3. DeltaSqliteSaver.compact(thread_id, *policies)
+    - deletes the other checkpoints and their pending writes
+    - a kept checkpoint whose parent was deleted now points at its nearest kept ancestor → history stays a chain
+    - deletes the blobs no kept checkpoint reads anymore (blobs are shared between checkpoints by version)
+    - the latest checkpoint is always kept → get_state, resume with invoke(None, config) and new turns work as before
+    - compact_all(...) is the job: every thread with more than min_checkpoints checkpoints, vacuum=True gives the space back to the OS
+'''
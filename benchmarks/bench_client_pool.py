@@ -0,0 +1,81 @@
+'''
+Shared client pool under provider throttling: the chunked essay graph (6_chunked_essay_eval_workflow.py)
+grades several essays at once against a fake provider that answers 429 above FAKE_LLM_MAX_INFLIGHT concurrent requests.
+
+Three pools (utils/client_pool.py) are compared on the same workload:
+- pass-through: no limit, no retry → every 429 fails its essay
+- retry only: full-jitter retries, fixed concurrency → essays finish but many requests are thrown away
+- AIMD: retries + the concurrency limit converges just under what the provider accepts
+
+For each: essays done/failed, requests, 429s, retries, the final concurrency limit, queue-wait p50/p99 and throughput.
+
+    python benchmarks/bench_client_pool.py
+    FAKE_LLM_MAX_INFLIGHT=4 python benchmarks/bench_client_pool.py --essays 16 --concurrency 8
+    python benchmarks/bench_client_pool.py --rpm 600
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import essay_state
+from bench_essay_chunked import make_essay
+
+
+def bench(pool, graph, texts: list[str], concurrency: int) -> dict:
+    from utils.client_pool import set_pool
+
+    set_pool(pool)
+
+    def one(text):
+        try:
+            graph.invoke(essay_state(text))
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        done = sum(executor.map(one, texts))
+    elapsed = time.perf_counter() - start
+
+    return {'done': done, 'failed': len(texts) - done, 'essays_per_sec': round(len(texts) / elapsed, 2), **pool.stats()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='client pool modes against a throttling provider')
+    parser.add_argument('--essays', type=int, default=12)
+    parser.add_argument('--paragraphs', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=4, help='essays graded at once')
+    parser.add_argument('--rpm', type=float, default=0, help='requests per minute of the pool token bucket')
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['LLM_CACHE'] = '0'
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '200')
+    os.environ.setdefault('FAKE_LLM_MAX_INFLIGHT', '8')
+
+    from utils.client_pool import ClientPool
+    from utils.registry import get_workflow
+
+    graph = get_workflow('essay_eval_chunked')
+    texts = [f'{make_essay(args.paragraphs)} [{i}]' for i in range(args.essays)]
+
+    pools = {
+        'pass-through': ClientPool(requests_per_min=args.rpm, adaptive=False, max_retries=0),
+        'retry only': ClientPool(requests_per_min=args.rpm, adaptive=False),
+        'AIMD': ClientPool(requests_per_min=args.rpm),
+    }
+
+    print(f"provider accepts {os.environ['FAKE_LLM_MAX_INFLIGHT']} requests at once, {args.essays} essays, {args.concurrency} at a time\n")
+    print(f"{'pool':<13} {'done':>5} {'failed':>6} {'ok calls':>8} {'429s':>5} {'retries':>7} {'limit':>6} "
+          f"{'wait p50 ms':>11} {'wait p99 ms':>11} {'essays/s':>8}")
+
+    for name, pool in pools.items():
+        r = bench(pool, graph, texts, args.concurrency)
+        print(f"{name:<13} {r['done']:>5} {r['failed']:>6} {r['requests']:>8} {r['throttled']:>5} {r['retries']:>7} "
+              f"{r['concurrency_limit']:>6} {r['queue_wait_p50_ms']:>11} {r['queue_wait_p99_ms']:>11} {r['essays_per_sec']:>8}")
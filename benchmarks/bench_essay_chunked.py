@@ -0,0 +1,81 @@
+'''
+Latency vs essay length: whole-essay prompts (2_essay_eval_workflow.py) vs map-reduce chunks (6_chunked_essay_eval_workflow.py).
+
+The essay grows from 1 to 32 paragraphs. On the fake model the prompt size matters through
+FAKE_LLM_PREFILL_TOKENS_PER_SEC (time to read the prompt) and FAKE_LLM_CONTEXT_TOKENS (longer prompts fail),
+both set here to provider-like defaults. The chunked graph runs with its shipped defaults: as many branches at once
+as the shared ClientPool has slots (LLM_POOL_MAX_CONCURRENCY, default 256), the pool does the throttling.
+
+    python benchmarks/bench_essay_chunked.py
+    LLM_POOL_MAX_CONCURRENCY=16 python benchmarks/bench_essay_chunked.py --paragraphs 1 4 16
+'''
+
+import statistics
+import argparse
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import essay_state
+
+
+def make_essay(paragraphs: int) -> str:
+    from utils.loader import load_script
+    base = load_script('2_parallel_workflows/2_essay_eval_workflow.py').essay.strip().split('\n\n')
+
+    return '\n\n'.join(f'{base[i % len(base)]} ({i})' for i in range(paragraphs))
+
+
+def measure(graph, essay: str, repeats: int) -> dict:
+    from utils.instrumentation import instrument
+
+    instrumented, metrics = instrument(graph)
+    latencies = []
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            instrumented.invoke(essay_state(essay))
+            latencies.append(time.perf_counter() - start)
+    except ValueError as e:
+        return {'error': str(e).split(',')[0]}
+
+    nodes = metrics.snapshot().values()
+    calls = sum(s['model_calls'] for s in nodes)
+    return {
+        'p50_ms': round(statistics.median(latencies) * 1000),
+        'calls': calls // repeats,
+        'prompt_tokens_per_call': round(sum(s['prompt_tokens'] for s in nodes) / calls),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='essay evaluation latency vs essay length')
+    parser.add_argument('--paragraphs', type=int, nargs='*', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['LLM_CACHE'] = '0'
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '200')
+    os.environ.setdefault('FAKE_LLM_LATENCY_DIST', 'fixed')
+    os.environ.setdefault('FAKE_LLM_PREFILL_TOKENS_PER_SEC', '2000')
+    os.environ.setdefault('FAKE_LLM_CONTEXT_TOKENS', '8000')
+
+    from langchain_core.messages.utils import count_tokens_approximately
+    from utils.registry import get_workflow
+
+    whole, chunked = get_workflow('essay_eval'), get_workflow('essay_eval_chunked')
+
+    print(f"prefill {os.environ['FAKE_LLM_PREFILL_TOKENS_PER_SEC']} tok/s, context {os.environ['FAKE_LLM_CONTEXT_TOKENS']} tok, "
+          f"max concurrency {os.getenv('LLM_POOL_MAX_CONCURRENCY', '256')}\n")
+    print(f"{'paragraphs':>10} {'tokens':>7} | {'whole p50 ms':>12} {'calls':>5} {'tok/call':>8} | {'chunked p50 ms':>14} {'calls':>5} {'tok/call':>8}")
+
+    for n in args.paragraphs:
+        essay = make_essay(n)
+        a, b = measure(whole, essay, args.repeats), measure(chunked, essay, args.repeats)
+
+        left = f"{a['p50_ms']:>12} {a['calls']:>5} {a['prompt_tokens_per_call']:>8}" if 'error' not in a else f"{'context exceeded':>27}"
+        right = f"{b['p50_ms']:>14} {b['calls']:>5} {b['prompt_tokens_per_call']:>8}" if 'error' not in b else f"{'context exceeded':>29}"
+        print(f"{n:>10} {count_tokens_approximately([essay]):>7} | {left} | {right}")
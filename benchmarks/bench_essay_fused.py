@@ -0,0 +1,86 @@
+'''
+Fan-out essay grading (2_essay_eval_workflow.py, 4 model calls) vs fused grading (5_fused_essay_eval_workflow.py, 1 call).
+
+For the same essays both graphs report p50/p99 latency, model calls and prompt/completion tokens per essay
+(from utils/instrumentation.py), then the scores of the two are compared essay by essay:
+mean |Δ avg_score| and the share of essays whose avg_score is within 1 point.
+
+On the fake model the scores are random per prompt, so the agreement numbers only mean something with
+--provider google; latency and tokens are meaningful on both.
+
+    python benchmarks/bench_essay_fused.py
+    python benchmarks/bench_essay_fused.py --provider google --essays 20 --concurrency 4
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import argparse
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import SHORT_ESSAY, essay_state, percentile
+
+
+def essays(n: int) -> list[str]:
+    from utils.loader import load_script
+    long_essay = load_script('2_parallel_workflows/2_essay_eval_workflow.py').essay
+
+    # alternate short and long essays, numbered so every prompt is different
+    return [f'{SHORT_ESSAY if i % 2 else long_essay} ({i})' for i in range(n)]
+
+
+def bench(name: str, texts: list[str], concurrency: int) -> tuple[dict, list[dict]]:
+    from utils.registry import get_workflow
+    from utils.instrumentation import instrument
+
+    graph, metrics = instrument(get_workflow(name), name)
+    results = [None] * len(texts)
+
+    def one(i):
+        start = time.perf_counter()
+        results[i] = graph.invoke(essay_state(texts[i]))
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(len(texts))))
+
+    nodes = metrics.snapshot().values()
+    row = {
+        'graph': name,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'model_calls': round(sum(s['model_calls'] for s in nodes) / len(texts), 2),
+        'prompt_tokens': round(sum(s['prompt_tokens'] for s in nodes) / len(texts)),
+        'completion_tokens': round(sum(s['completion_tokens'] for s in nodes) / len(texts)),
+    }
+    return row, results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='fan-out vs fused essay grading')
+    parser.add_argument('--essays', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--provider', default='fake', choices=['fake', 'google'])
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = args.provider
+    os.environ['LLM_CACHE'] = '0'
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '200')
+
+    texts = essays(args.essays)
+
+    rows, states = [], {}
+    for name in ('essay_eval', 'essay_eval_fused'):
+        row, states[name] = bench(name, texts, args.concurrency)
+        rows.append(row)
+
+    print(f"{'graph':<18} {'p50 ms':>8} {'p99 ms':>8} {'calls':>6} {'prompt tok':>11} {'compl tok':>10}")
+    for r in rows:
+        print(f"{r['graph']:<18} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['model_calls']:>6} {r['prompt_tokens']:>11} {r['completion_tokens']:>10}")
+
+    diffs = [abs(a['avg_score'] - b['avg_score']) for a, b in zip(states['essay_eval'], states['essay_eval_fused'])]
+    print(f"\nscore agreement over {len(texts)} essays: mean |Δ avg_score| {statistics.mean(diffs):.2f}, "
+          f"within 1 point {sum(d <= 1 for d in diffs) / len(diffs):.0%}")
@@ -0,0 +1,141 @@
+'''
+Semantic cache (utils/semantic_cache.py): hit rate on reworded questions, and lookup latency as the index grows.
+
+1. Hit rate: a stream of questions drawn (Zipf) from a few hundred intents, each asked in a random rewording
+   (case, punctuation, filler words, a typo). For every threshold: hit rate, the best possible hit rate
+   (intent asked before) and false hits (the cached answer belongs to another intent).
+2. Growth: the index is filled with random unit vectors up to 1M entries; search p50/p99, index size and
+   insert rate at each size. The embedding time is measured on its own, it does not depend on the index size.
+
+--embeddings fake (default) uses FakeEmbeddings, --embeddings huggingface the local all-MiniLM-L6-v2 model.
+
+    python benchmarks/bench_semantic_cache.py
+    python benchmarks/bench_semantic_cache.py --embeddings huggingface --sizes 1000 100000
+'''
+
+import argparse
+import random
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import percentile
+
+
+CITIES = ['Delhi', 'Dubai', 'London', 'Paris', 'Tokyo', 'Mumbai', 'Singapore', 'Sydney', 'Toronto', 'Berlin', 'Rome', 'Cairo']
+TEMPLATES = [
+    'How far is {a} from {b} by air?',
+    'What is the best time of year to visit {a}?',
+    'Do I need a visa to travel from {a} to {b}?',
+    'What currency is used in {a}?',
+]
+FILLERS = ['', 'please ', 'can you tell me ', 'quick question: ']
+
+
+def intents() -> list[str]:
+    # dict -> the single-city templates once per city
+    return list(dict.fromkeys(t.format(a=a, b=b) for t in TEMPLATES for a in CITIES for b in CITIES if a != b))
+
+
+def reword(question: str, rng: random.Random) -> str:
+    text = rng.choice(FILLERS) + question
+    text = rng.choice([str.lower, str.upper, lambda s: s])(text)
+    if rng.random() < 0.5:
+        text = text.rstrip('?') + rng.choice(['', ' ?', '??'])
+    if rng.random() < 0.3:
+        i = rng.randrange(len(text) - 1)
+        text = text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text
+
+
+def hit_rate(embeddings, threshold: float, queries: int, seed: int = 0) -> dict:
+    from utils.semantic_cache import SemanticCache
+
+    rng = random.Random(seed)
+    questions = intents()
+    weights = [1 / (i + 1) for i in range(len(questions))]
+    cache = SemanticCache(embeddings, threshold=threshold)
+
+    seen, possible, false_hits = set(), 0, 0
+    for _ in range(queries):
+        intent = rng.choices(range(len(questions)), weights)[0]
+        possible += intent in seen
+        seen.add(intent)
+
+        answer = cache.get_or_call(reword(questions[intent], rng), lambda: str(intent))
+        false_hits += answer != str(intent)
+
+    stats = cache.stats()
+    return {'threshold': threshold, 'hit_rate': stats['hit_rate'], 'possible': round(possible / queries, 3),
+            'false_hits': round(false_hits / queries, 3), 'lookup_p50_ms': stats['lookup_p50_ms']}
+
+
+def growth(dim: int, sizes: list[int], probes: int = 200) -> list[dict]:
+    import numpy as np
+    from utils.semantic_cache import SemanticCache
+
+    rng = np.random.default_rng(0)
+    cache = SemanticCache(embeddings=None, max_entries=max(sizes))
+
+    def unit(n):
+        v = rng.standard_normal((n, dim), dtype=np.float32)
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+    rows = []
+    for size in sizes:
+        start, added = time.perf_counter(), size - len(cache.entries)
+        for block in range(0, added, 10_000):
+            for vector in unit(min(10_000, added - block)):
+                cache._insert(vector, '', '', '')
+        insert_seconds = time.perf_counter() - start
+
+        latencies = []
+        for vector in unit(probes):
+            start = time.perf_counter()
+            cache._search(vector, '')
+            latencies.append(time.perf_counter() - start)
+
+        rows.append({
+            'entries': len(cache.entries),
+            'index_mb': round(cache.index.nbytes / 2**20),
+            'inserts_per_sec': round(added / insert_seconds) if added else 0,
+            'search_p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'search_p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='semantic cache hit rate and lookup latency')
+    parser.add_argument('--embeddings', default='fake', choices=['fake', 'huggingface'])
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--thresholds', type=float, nargs='*', default=[0.8, 0.9, 0.93, 0.95])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    os.environ['EMBEDDINGS_PROVIDER'] = args.embeddings
+
+    from utils.models import get_embeddings
+
+    embeddings = get_embeddings()
+    texts = [reword(q, random.Random(i)) for i, q in enumerate(intents()[:200])]
+    embed_latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        dim = len(embeddings.embed_query(text))
+        embed_latencies.append(time.perf_counter() - start)
+
+    print(f'{args.embeddings} embeddings: {dim} dims, embed p50 {percentile(embed_latencies, 50) * 1000:.3f} ms, '
+          f'p99 {percentile(embed_latencies, 99) * 1000:.3f} ms\n')
+
+    print(f'{len(intents())} intents, {args.queries} reworded questions')
+    print(f"{'threshold':>9} {'hit rate':>8} {'possible':>8} {'false hits':>10} {'lookup p50 ms':>13}")
+    for threshold in args.thresholds:
+        r = hit_rate(embeddings, threshold, args.queries)
+        print(f"{r['threshold']:>9} {r['hit_rate']:>8} {r['possible']:>8} {r['false_hits']:>10} {r['lookup_p50_ms']:>13}")
+
+    print(f"\n{'entries':>9} {'index MB':>8} {'inserts/s':>9} {'search p50 ms':>13} {'search p99 ms':>13}")
+    for r in growth(dim, args.sizes):
+        print(f"{r['entries']:>9} {r['index_mb']:>8} {r['inserts_per_sec']:>9} {r['search_p50_ms']:>13} {r['search_p99_ms']:>13}")
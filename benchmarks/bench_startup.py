@@ -0,0 +1,156 @@
+'''
+Cold-start benchmark: how long a fresh process takes to import each workflow and to answer its first request.
+
+Every workflow is measured in its own subprocess, so nothing is warm:
+    - import_ms -> load the script (define state, nodes and edges; no model client, no compile)
+    - compile_ms -> first get_workflow() call (graph.compile, cached after that)
+    - first_request_ms -> first invoke, including building the model client and any lazy imports
+    - second_request_ms -> the same request again, for comparison
+    - import_all_ms -> one process importing every workflow through utils/registry.py
+
+Every run is appended to a JSONL history file (one record per run, with the git commit), and the table shows the
+change of import_ms and first_request_ms against the previous run, so start-up regressions are easy to spot.
+The default history file (benchmarks/startup_history.jsonl) is git-ignored, it belongs to the machine it was measured on.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --only llm_qa essay_eval --max-import-ms 500
+'''
+
+from datetime import datetime, timezone
+import subprocess
+import argparse
+import json
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import CASES, scratch_chat_db
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(HERE, 'startup_history.jsonl')
+
+
+def measure(case: str) -> dict:
+    # runs inside the child process
+    from utils.registry import load_module, WORKFLOWS
+
+    workflow, make_input, make_config, is_async = CASES[case]
+    factory = WORKFLOWS[workflow][1]
+
+    start = time.perf_counter()
+    module = load_module(workflow)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    graph = getattr(module, factory)()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    def request() -> float:
+        config = make_config(0) if make_config else None
+        start = time.perf_counter()
+        if is_async:
+            import asyncio
+            asyncio.run(graph.ainvoke(make_input(0), config=config))
+        else:
+            graph.invoke(make_input(0), config=config)
+        return (time.perf_counter() - start) * 1000
+
+    first_request_ms = request()
+    second_request_ms = request()
+
+    return {
+        'workflow': case,
+        'import_ms': round(import_ms, 1),
+        'compile_ms': round(compile_ms, 1),
+        'first_request_ms': round(first_request_ms, 1),
+        'second_request_ms': round(second_request_ms, 1),
+    }
+
+
+def measure_import_all() -> dict:
+    from utils.registry import load_all
+
+    start = time.perf_counter()
+    modules = load_all()
+    return {'workflows': len(modules), 'import_all_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+
+def in_subprocess(*args: str) -> dict:
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), *args], capture_output=True, text=True, check=True).stdout
+    # the result is the last line, anything a node printed comes before it
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(history_path: str) -> dict:
+    if not os.path.exists(history_path):
+        return {}
+
+    with open(history_path, encoding='utf-8') as f:
+        lines = [line for line in f if line.strip()]
+
+    return {r['workflow']: r for r in json.loads(lines[-1])['results']} if lines else {}
+
+
+def delta(now: float, before: dict, key: str) -> str:
+    return f'{now - before[key]:+.1f}' if key in before else ''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='cold import time and first-request latency of every workflow')
+    parser.add_argument('--only', nargs='*', choices=sorted(CASES), help='measure only these workflows')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSONL file every run is appended to')
+    parser.add_argument('--max-import-ms', type=float, help='exit with status 1 if any cold import is slower than this')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # the fake model answers instantly, so first_request_ms is start-up cost and not model latency
+    os.environ.setdefault('LLM_PROVIDER', 'fake')
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '0')
+    os.environ.setdefault('STEP2_SLEEP_SECONDS', '0')
+    os.environ.setdefault('LLM_CACHE', '0')
+    chat_db = scratch_chat_db()
+
+    if args.child:
+        print(json.dumps(measure_import_all() if args.child == '__all__' else measure(args.child)))
+        sys.exit(0)
+
+    before = previous_run(args.history)
+    results = []
+
+    print(f"{'workflow':<24} {'import ms':>10} {'Δ':>7} {'compile ms':>11} {'1st req ms':>11} {'Δ':>7} {'2nd req ms':>11}")
+    for case in args.only or CASES:
+        r = in_subprocess('--child', case)
+        results.append(r)
+        prev = before.get(case, {})
+        print(f"{case:<24} {r['import_ms']:>10} {delta(r['import_ms'], prev, 'import_ms'):>7} {r['compile_ms']:>11} "
+              f"{r['first_request_ms']:>11} {delta(r['first_request_ms'], prev, 'first_request_ms'):>7} {r['second_request_ms']:>11}")
+
+    all_workflows = in_subprocess('--child', '__all__')
+    print(f"\nimport all {all_workflows['workflows']} workflows in one process: {all_workflows['import_all_ms']} ms")
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'provider': os.environ['LLM_PROVIDER'],
+        'import_all_ms': all_workflows['import_all_ms'],
+        'results': results,
+    }
+    with open(args.history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+    if args.max_import_ms is not None:
+        slow = [r['workflow'] for r in results if r['import_ms'] > args.max_import_ms]
+        if slow:
+            print(f'cold import over {args.max_import_ms} ms: {", ".join(slow)}')
+            sys.exit(1)
@@ -0,0 +1,112 @@
+'''
+Scaling of queue-dispatched graphs (utils/task_queue.py): 1 to 16 worker processes (server/worker.py),
+each running 1 or several tasks at once (--concurrency of the worker, the 'tasks' column).
+
+- essay_eval: 3 parallel model calls, merge_barrier, final model call → 5 node tasks per essay on the fake model
+  (FAKE_LLM_LATENCY_MS, fixed); --concurrency essays are in flight at once
+- cricket: 4 nodes of pure arithmetic → what one queue round-trip costs per node
+
+Every row checks the reducers: each essay must come back with its 3 scores (operator.add through merge_barrier)
+and avg_score their mean. The in-process row is the same graph without the queue.
+Workers are separate interpreters, so nodes that burn CPU also scale with cores (this sandbox has one).
+
+    python benchmarks/bench_task_queue.py
+    python benchmarks/bench_task_queue.py --workers 1 4 16 --essays 64 --concurrency 32
+    python benchmarks/bench_task_queue.py --workers 1 2 --tasks-per-worker 1 16
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import argparse
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import essay_state, SHORT_ESSAY, percentile
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CRICKET = {'runs': 101, 'balls': 69, 'fours': 8, 'sixes': 4, 'sr': 0, 'bpb': 0, 'boundary_perct': 0, 'summary': ''}
+
+
+def start_workers(db: str, n: int, tasks: int) -> subprocess.Popen:
+    from utils.task_queue import TaskQueue
+
+    worker = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'server', 'worker.py'), '--db', db, '--processes', str(n),
+                               '--concurrency', str(tasks), '--preload', 'essay_eval', 'cricket'])
+
+    # ready once every process has imported the workflows and sent its first heartbeat
+    queue = TaskQueue(db)
+    while queue.stats()['workers'] < n:
+        time.sleep(0.2)
+    return worker
+
+
+def run(graph, inputs: list, concurrency: int) -> tuple[list, list[float], float]:
+    def one(state):
+        start = time.perf_counter()
+        return graph.invoke(state), time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, inputs))
+    return [r for r, _ in results], [l for _, l in results], time.perf_counter() - start
+
+
+def reducers_ok(states: list[dict]) -> bool:
+    return all(len(s['scores']) == 3 and s['avg_score'] == round(sum(s['scores']) / 3, 2) for s in states)
+
+
+def row(label: str, tasks: str, essays: tuple, cricket: tuple) -> str:
+    (states, latencies, elapsed), (_, cricket_latencies, _) = essays, cricket
+    return (f"{label:<12} {tasks:>6} {len(states) / elapsed:>8.2f} {percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f} "
+            f"{'yes' if reducers_ok(states) else 'NO':>8} {percentile(cricket_latencies, 50) * 1000:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='queue-dispatched graph nodes, 1 to 16 workers')
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--essays', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--tasks-per-worker', type=int, nargs='*', default=[1, 8], help='tasks each worker process runs at once')
+    parser.add_argument('--db', default=os.path.join(ROOT_DIR, 'benchmarks', 'task_queue.sqlite'))
+    args = parser.parse_args()
+
+    # the workers inherit the environment -> the same fake model on both sides
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['LLM_CACHE'] = '0'
+    os.environ['SEMANTIC_CACHE'] = '0'
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '100')
+    os.environ.setdefault('FAKE_LLM_LATENCY_DIST', 'fixed')
+
+    from utils.registry import get_workflow
+    from utils.task_queue import TaskQueue, remote_graph
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    essays = [essay_state(f'{SHORT_ESSAY} ({i})') for i in range(args.essays)]
+    crickets = [dict(CRICKET, runs=100 + i) for i in range(50)]
+
+    print(f"{args.essays} essays, {args.concurrency} at a time, model latency {os.environ['FAKE_LLM_LATENCY_MS']} ms\n")
+    print(f"{'workers':<12} {'tasks':>6} {'essays/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'reducers':>8} {'cricket ms':>12}")
+
+    print(row('in-process', '-', run(get_workflow('essay_eval'), essays, args.concurrency), run(get_workflow('cricket'), crickets, 1)))
+
+    queue = TaskQueue(args.db)
+    essay_graph, cricket_graph = remote_graph('essay_eval', queue), remote_graph('cricket', queue)
+    for tasks in args.tasks_per_worker:
+        for n in args.workers:
+            workers = start_workers(args.db, n, tasks)
+            try:
+                print(row(str(n), str(tasks), run(essay_graph, essays, args.concurrency), run(cricket_graph, crickets, 1)))
+            finally:
+                workers.terminate()
+                try:
+                    workers.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    workers.kill()
+                queue._conn().execute('DELETE FROM workers')
@@ -0,0 +1,81 @@
+'''
+Memory held vs hit rate of utils/tiered_checkpointer.py for a multi-user chatbot.
+
+The chatbot (chatbots/1_basic_chatbot_stm.py, fake model) gets `--turns` messages from `--users` users, the user of
+every turn is drawn from a Zipf-like distribution (a few users are very active, most come back rarely).
+The same traffic is run against MemorySaver and against TieredSaver with several max-memory settings.
+'held KB' is what the checkpointer keeps in memory (serialized); a TieredSaver can sit above its limit only when
+the single most recently used thread is larger than the limit, that thread is never evicted.
+
+    python benchmarks/bench_tiered_checkpointer.py
+    python benchmarks/bench_tiered_checkpointer.py --users 1000 --turns 5000 --max-mb 0.5 2 8
+'''
+
+import statistics
+import argparse
+import tempfile
+import random
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def memory_saver_bytes(saver) -> int:
+    # serialized bytes MemorySaver keeps for every thread it has seen
+    total = 0
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            total += sum(len(c[1]) + len(m) for c, m, _ in checkpoints.values())
+    total += sum(len(value[1]) for value in saver.blobs.values())
+    total += sum(len(w[2][1]) for writes in saver.writes.values() for w in writes.values())
+    return total
+
+
+def run(chatbot, users: int, turns: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    latencies = []
+    for i in range(turns):
+        user = int(rng.paretovariate(1.1)) % users
+        config = {'configurable': {'thread_id': f'user-{user}'}}
+
+        start = time.perf_counter()
+        chatbot.invoke({'messages': [('user', f'message {i}')]}, config=config)
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MemorySaver vs TieredSaver for many chatbot users')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--turns', type=int, default=1000)
+    parser.add_argument('--max-mb', type=float, nargs='*', default=[0.25, 1, 4])
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['LLM_CACHE'] = '0'
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '0')
+
+    from langgraph.checkpoint.memory import MemorySaver
+    from utils.loader import load_script
+    from utils.sqlite_checkpointer import DeltaSqliteSaver
+    from utils.tiered_checkpointer import TieredSaver
+
+    graph = load_script('chatbots/1_basic_chatbot_stm.py').graph
+    workdir = tempfile.mkdtemp(prefix='bench_tiered_')
+
+    print(f"{'checkpointer':<22} {'held KB':>10} {'hit rate':>9} {'evictions':>10} {'p50 ms':>8} {'p99 ms':>8}")
+
+    saver = MemorySaver()
+    latencies = run(graph.compile(checkpointer=saver), args.users, args.turns, 0)
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{'MemorySaver':<22} {memory_saver_bytes(saver) / 1024:>10.0f} {'-':>9} {'-':>10} {q[49] * 1000:>8.2f} {q[98] * 1000:>8.2f}")
+
+    for max_mb in args.max_mb:
+        saver = TieredSaver(DeltaSqliteSaver(os.path.join(workdir, f'{max_mb}.sqlite')), max_memory_bytes=int(max_mb * 2**20))
+        latencies = run(graph.compile(checkpointer=saver), args.users, args.turns, 0)
+        q = statistics.quantiles(latencies, n=100)
+        stats = saver.stats()
+        print(f"{f'TieredSaver {max_mb} MB':<22} {stats['hot_bytes'] / 1024:>10.0f} {stats['hit_rate']:>9} {stats['evictions']:>10} {q[49] * 1000:>8.2f} {q[98] * 1000:>8.2f}")
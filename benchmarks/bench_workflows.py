@@ -0,0 +1,168 @@
+'''
+End-to-end benchmark of every workflow in the repo.
+
+By default the LLM workflows run against the local FakeChatModel (LLM_PROVIDER=fake), so the numbers measure
+graph overhead and concurrency behaviour, not the provider. The fake latency distribution is set with
+FAKE_LLM_LATENCY_MS / FAKE_LLM_LATENCY_DIST / FAKE_LLM_LATENCY_SIGMA.
+
+    python benchmarks/bench_workflows.py --requests 200 --concurrency 16
+    FAKE_LLM_LATENCY_MS=0 python benchmarks/bench_workflows.py --only bmi cricket quadratic
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+import argparse
+import asyncio
+import tempfile
+import json
+import io
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+SHORT_ESSAY = (
+    'Public libraries are more important today than ever. They offer free internet, quiet places to study and '
+    'programs for children and older people. A city that closes its libraries is saving money today and paying for it tomorrow.'
+)
+
+REVIEWS = [
+    'This website is is very good, very simple to use and so lite loved it',
+    'Payment failed three times and the money was still taken from my account',
+    'The app keeps crashing when I open my orders page',
+    'Great support team, they solved my problem in minutes',
+]
+
+
+def essay_state(essay):
+    return {'essay': essay, 'cot_feedback': '', 'doa_feedback': '', 'g_feedback': '', 'summarized_feedback': '', 'scores': [], 'avg_score': 0.0}
+
+def bmi_batch_input(i):
+    import numpy as np
+    rng = np.random.default_rng(i)
+    return {'weight_kg': rng.uniform(40, 140, 100_000), 'height_m': rng.uniform(1.45, 2.05, 100_000)}
+
+
+# name -> (registry workflow, input builder, config builder, async?)
+CASES = {
+    'bmi': ('bmi', lambda i: {'weight_kg': 50 + i % 50, 'height_m': 1.75}, None, False),
+    'bmi_batch_100k': ('bmi_batch', bmi_batch_input, None, False),
+    'llm_qa': ('llm_qa', lambda i: {'question': f'How far is city {i} from Dubai by air?'}, None, False),
+    'cricket': ('cricket', lambda i: {'runs': 101 + i % 7, 'balls': 69, 'fours': 8, 'sixes': 4}, None, False),
+    'essay_eval': ('essay_eval', lambda i: essay_state(f'{SHORT_ESSAY} ({i})'), None, False),
+    'essay_eval_async': ('essay_eval_async', lambda i: essay_state(f'{SHORT_ESSAY} ({i})'), lambda i: {'configurable': {'llm_semaphore': asyncio.Semaphore(64)}}, True),
+    'quadratic': ('quadratic', lambda i: {'a': 1, 'b': i % 5, 'c': 1}, None, False),
+    'sentiment': ('sentiment', lambda i: {'review': f'{REVIEWS[i % 4]} #{i}'}, None, False),
+    'sentiment_speculative': ('sentiment_speculative', lambda i: {'review': f'{REVIEWS[i % 4]} #{i}'}, lambda i: {'configurable': {'speculative': True}}, True),
+    'tweet': ('tweet', lambda i: {'topic': f'Topic {i}', 'iteration': 0, 'max_iteration': 4}, None, False),
+    'tweet_best_of_4': ('tweet_best_of_n', lambda i: {'topic': f'Topic {i}', 'iteration': 0, 'max_iteration': 4, 'n_candidates': 4, 'llm_calls': 0}, None, True),
+    'joke_memory_saver': ('joke_memory_saver', lambda i: {'topic': f'Topic {i}'}, lambda i: {'configurable': {'thread_id': f'bench-{time.time_ns()}-{i}'}}, False),
+    'fault_tolerance': ('fault_tolerance', lambda i: {'input': 'start'}, lambda i: {'configurable': {'thread_id': f'bench-{time.time_ns()}-{i}'}}, False),
+    'joke_delta_sqlite': ('joke_delta_sqlite', lambda i: {'topic': f'Topic {i}'}, lambda i: {'configurable': {'thread_id': f'bench-{time.time_ns()}-{i}'}}, False),
+    'chatbot': ('chatbot', lambda i: {'messages': [('user', f'message {i}')]}, lambda i: {'configurable': {'thread_id': f'bench-{time.time_ns()}-{i}'}}, False),
+    'chatbot_summary_memory': ('chatbot_summary_memory', lambda i: {'messages': [('user', f'message {i}')]}, lambda i: {'configurable': {'thread_id': f'bench-{time.time_ns()}-{i}'}}, False),
+}
+
+
+# benchmark threads go to a throwaway sqlite file, never to the user's chatbots/chat_checkpoints.sqlite
+# -> keep the returned directory referenced, it is deleted when the process exits; child processes inherit the path
+def scratch_chat_db() -> tempfile.TemporaryDirectory | None:
+    if os.getenv('CHAT_DB_PATH'):
+        return None
+
+    scratch = tempfile.TemporaryDirectory(prefix='bench-chat-')
+    os.environ['CHAT_DB_PATH'] = os.path.join(scratch.name, 'chat_checkpoints.sqlite')
+    return scratch
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def run_sync(graph, make_input, make_config, requests: int, concurrency: int) -> tuple[list[float], float]:
+    def one(i):
+        start = time.perf_counter()
+        graph.invoke(make_input(i), config=make_config(i) if make_config else None)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+def run_async(graph, make_input, make_config, requests: int, concurrency: int) -> tuple[list[float], float]:
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with slots:
+                start = time.perf_counter()
+                await graph.ainvoke(make_input(i), config=make_config(i) if make_config else None)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(requests)))
+        return list(latencies), time.perf_counter() - start
+
+    return asyncio.run(main())
+
+
+def bench(name: str, requests: int, concurrency: int) -> dict:
+    from utils.registry import get_workflow
+
+    workflow, make_input, make_config, is_async = CASES[name]
+    graph = get_workflow(workflow)
+
+    run = run_async if is_async else run_sync
+
+    # nodes that print (e.g. fault_tolerance) would flood the table, so their output is dropped
+    with redirect_stdout(io.StringIO()):
+        # warm up once so one-time costs (lazy imports, first compile of the pregel loop) are not in the numbers
+        run(graph, make_input, make_config, 1, 1)
+
+        latencies, wall = run(graph, make_input, make_config, requests, concurrency)
+
+    return {
+        'workflow': name,
+        'requests': requests,
+        'concurrency': concurrency,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'throughput_rps': round(requests / wall, 1),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='p50/p99 latency and throughput of every workflow')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', nargs='*', choices=sorted(CASES), help='run only these workflows')
+    parser.add_argument('--provider', default='fake', choices=['fake', 'google'], help='LLM_PROVIDER for the LLM workflows')
+    parser.add_argument('--cache', action='store_true', help='keep the persistent LLM cache on (off by default so every call is measured)')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = args.provider
+    os.environ.setdefault('STEP2_SLEEP_SECONDS', '0')
+    chat_db = scratch_chat_db()
+    if not args.cache:
+        os.environ['LLM_CACHE'] = '0'
+
+    results = []
+    print(f"{'workflow':<24} {'p50 ms':>10} {'p99 ms':>10} {'req/s':>10}")
+    for name in args.only or CASES:
+        result = bench(name, args.requests, args.concurrency)
+        results.append(result)
+        print(f"{name:<24} {result['p50_ms']:>10} {result['p99_ms']:>10} {result['throughput_rps']:>10}")
+
+    if args.cache:
+        from utils.llm_cache import enable_llm_cache
+        print(f'\nllm cache: {enable_llm_cache().stats()}')  # the instance the workflows share
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
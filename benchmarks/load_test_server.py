@@ -0,0 +1,152 @@
+'''
+Load test of server/app.py against launching one script process per request.
+
+    python benchmarks/load_test_server.py --requests 400 --concurrency 32
+    python benchmarks/load_test_server.py --url http://localhost:8000      # against a running uvicorn
+
+Without --url the app is driven in-process through httpx.ASGITransport, so the numbers are the service itself.
+The request mix sends each workflow the same way a client would. --duplicate-rate of the requests repeat an
+earlier body (same review / essay / topic), which is where coalescing pays off.
+
+The baseline runs --baseline-requests of the same requests one after another, each in a new
+`python` process that loads the workflow and invokes it once (the old way to use the scripts).
+'''
+
+import subprocess
+import argparse
+import asyncio
+import random
+import json
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import percentile, scratch_chat_db, SHORT_ESSAY, REVIEWS
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_requests(n: int, duplicate_rate: float, seed: int = 0) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    requests = []
+
+    for i in range(n):
+        if requests and rng.random() < duplicate_rate:
+            name, body = rng.choice(requests[-50:])
+            if name != 'chatbot':
+                requests.append((name, body))
+                continue
+
+        name = rng.choice(['bmi', 'essay_eval', 'sentiment', 'tweet', 'chatbot'])
+        body = {
+            'bmi': lambda: {'weight_kg': rng.randint(45, 120), 'height_m': round(rng.uniform(1.5, 2.0), 2)},
+            'essay_eval': lambda: {'essay': f'{SHORT_ESSAY} ({i})'},
+            'sentiment': lambda: {'review': f'{rng.choice(REVIEWS)} #{i}'},
+            'tweet': lambda: {'topic': f'Topic {i}', 'n_candidates': 2, 'max_iteration': 2},
+            'chatbot': lambda: {'thread_id': f'user-{rng.randint(1, 20)}', 'message': f'message {i}'},
+        }[name]()
+        requests.append((name, body))
+
+    return requests
+
+
+async def run_service(requests: list[tuple[str, dict]], concurrency: int, url: str | None) -> dict:
+    import httpx
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=300)
+    else:
+        from server.app import app, service
+
+        service.warm_up()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://service', timeout=300)
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(name: str, body: dict):
+        nonlocal failures
+        async with slots:
+            start = time.perf_counter()
+            response = await client.post(f'/workflows/{name}', json=body)
+            latencies.append(time.perf_counter() - start)
+            failures += response.status_code != 200
+
+    async with client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(name, body) for name, body in requests))
+        wall = time.perf_counter() - start
+        stats = (await client.get('/stats')).json()
+
+    return {
+        'mode': 'service',
+        'requests': len(requests),
+        'failures': failures,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'throughput_rps': round(len(requests) / wall, 1),
+        'executions': stats['executions'],
+        'coalesced': stats['coalesced'],
+    }
+
+
+def run_scripts(requests: list[tuple[str, dict]]) -> dict:
+    latencies, failures = [], 0
+
+    start = time.perf_counter()
+    for name, body in requests:
+        t = time.perf_counter()
+        done = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', name, json.dumps(body)], capture_output=True)
+        latencies.append(time.perf_counter() - t)
+        failures += done.returncode != 0
+    wall = time.perf_counter() - start
+
+    return {
+        'mode': 'script per request',
+        'requests': len(requests),
+        'failures': failures,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'throughput_rps': round(len(requests) / wall, 1),
+        'executions': len(requests),
+        'coalesced': 0,
+    }
+
+
+def child(name: str, body: dict) -> None:
+    # a fresh process doing what one request needs: import, compile, build the clients, run once
+    from server.app import WorkflowService
+
+    asyncio.run(WorkflowService().run(name, body))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='load test of the workflow service vs one script process per request')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duplicate-rate', type=float, default=0.3, help='share of requests repeating an earlier body')
+    parser.add_argument('--baseline-requests', type=int, default=20, help='requests run as separate script processes')
+    parser.add_argument('--url', help='base URL of a running server instead of the in-process app')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault('LLM_PROVIDER', 'fake')
+    os.environ.setdefault('LLM_CACHE', '0')
+    chat_db = scratch_chat_db()
+
+    if args.child:
+        child(args.child[0], json.loads(args.child[1]))
+        sys.exit(0)
+
+    requests = make_requests(args.requests, args.duplicate_rate)
+
+    results = [asyncio.run(run_service(requests, args.concurrency, args.url))]
+    if args.baseline_requests:
+        results.append(run_scripts(requests[:args.baseline_requests]))
+
+    print(f"{'mode':<20} {'requests':>9} {'failed':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'graph runs':>11} {'coalesced':>10}")
+    for r in results:
+        print(f"{r['mode']:<20} {r['requests']:>9} {r['failures']:>7} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['throughput_rps']:>8} {r['executions']:>11} {r['coalesced']:>10}")
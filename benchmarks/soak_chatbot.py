@@ -0,0 +1,244 @@
+'''
+Multi-user soak test of the checkpointed chatbot (chatbots/1_basic_chatbot_stm.py) on the fake model.
+
+N simulated users, each on their own thread_id, talk to one compiled chatbot in one process. Each turn is a sync
+chatbot.invoke on a pool of --threads threads, the way a threaded server calls it, so the checkpointer locks see
+concurrent callers (with ainvoke only the cold-store calls leave the one event loop thread, the hot tier would never contend):
+- a session is a geometric number of turns (mean --turns-per-session), with an exponential think time
+  between turns (mean --think-seconds); after a session the user is idle (mean --idle-seconds)
+  and the next session is a new thread_id, so the number of threads keeps growing like in production
+- users start spread over the first think time, no thundering herd
+
+Every --report-seconds one line per window:
+- turns/s, turn latency p50/p99
+- checkpointer read (get_tuple) and write (put + put_writes) p50/p99
+- lock contention of the TieredSaver and DeltaSqliteSaver locks (utils/instrumentation.TimedLock): share of
+  acquisitions that had to wait, and the wait time
+- event loop lag p99 (the loop only schedules users, so lag means the GIL is busy), hot tier hit rate / threads
+- the bounded caches that fill up first: hot tier MB (CHAT_HOT_MEMORY_MB) and semantic cache index MB
+  (SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE=0 to leave it out)
+- RSS and its growth since the first window; at the end the growth rate in MB/hour from the first window in which
+  both caches were full (the hot tier has evicted, the semantic cache has evicted or is off); before that RSS is
+  still filling the caches, so a short run reports no rate
+
+The chatbot writes to a fresh sqlite file (--db, deleted first) and never to chatbots/chat_checkpoints.sqlite.
+
+    python benchmarks/soak_chatbot.py --users 200 --duration 120
+    python benchmarks/soak_chatbot.py --users 5000 --duration 14400 --report-seconds 300     # multi-hour soak
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import random
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workflows import percentile
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WORDS = 'hi can you help me with my order refund delivery late payment account password plan trip weekend recipe idea'.split()
+
+
+class Samples:
+    '''Samples of one metric: the current report window, plus a bounded reservoir for the whole run.'''
+
+    def __init__(self, reservoir: int = 100_000, seed: int = 0):
+        self.window: list[float] = []
+        self.reservoir: list[float] = []
+        self.size = reservoir
+        self.count = 0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def add(self, value: float) -> None:
+        with self.lock:
+            self.window.append(value)
+            self.count += 1
+            if len(self.reservoir) < self.size:
+                self.reservoir.append(value)
+            elif (j := self.rng.randrange(self.count)) < self.size:
+                self.reservoir[j] = value
+
+    def take_window(self) -> list[float]:
+        with self.lock:
+            window, self.window = self.window, []
+        return window
+
+
+def ms(values: list[float], q: float) -> float:
+    return round(percentile(values, q) * 1000, 2) if values else 0.0
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, not current, outside Linux
+
+
+def timed(samples: Samples, fn):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.add(time.perf_counter() - start)
+    return wrapper
+
+
+def build_chatbot(db: str, max_memory_bytes: int):
+    from utils.registry import load_module
+    from utils.sqlite_checkpointer import DeltaSqliteSaver
+    from utils.tiered_checkpointer import TieredSaver
+    from utils.instrumentation import TimedLock
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db + suffix):
+            os.remove(db + suffix)
+
+    # same graph and checkpointer stack as get_chatbot(), on its own file
+    saver = TieredSaver(DeltaSqliteSaver(db), max_memory_bytes=max_memory_bytes)
+    saver.lock, saver.cold.lock = TimedLock(), TimedLock()
+
+    reads, writes = Samples(), Samples()
+    saver.get_tuple = timed(reads, saver.get_tuple)
+    saver.put = timed(writes, saver.put)
+    saver.put_writes = timed(writes, saver.put_writes)
+
+    return load_module('chatbot').graph.compile(checkpointer=saver), saver, reads, writes
+
+
+async def pause(seconds: float, stop: float) -> None:
+    # never past the end of the run, so the soak finishes on time
+    await asyncio.sleep(max(0.0, min(seconds, stop - time.monotonic())))
+
+
+async def user(u: int, chatbot, args, turns: Samples, errors: list, stop: float) -> None:
+    from langchain_core.messages import HumanMessage
+
+    loop = asyncio.get_running_loop()
+    rng = random.Random(u)
+    await pause(rng.uniform(0, args.think_seconds), stop)
+
+    session = 0
+    while time.monotonic() < stop:
+        config = {'configurable': {'thread_id': f'soak-user-{u}-session-{session}'}}
+
+        while time.monotonic() < stop:
+            message = ' '.join(rng.choices(WORDS, k=rng.randint(5, 30)))
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, chatbot.invoke, {'messages': [HumanMessage(content=message)]}, config)
+                turns.add(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(repr(e))
+
+            # geometric session length
+            if rng.random() < 1 / args.turns_per_session:
+                break
+            await pause(rng.expovariate(1 / args.think_seconds), stop)
+
+        session += 1
+        await pause(rng.expovariate(1 / args.idle_seconds), stop)
+
+
+async def loop_lag(samples: Samples, stop: float, interval: float = 0.1) -> None:
+    # how late a 100 ms timer fires -> time the loop spent blocked (inline checkpointer calls, GIL)
+    while time.monotonic() < stop:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.add(time.perf_counter() - start - interval)
+
+
+async def soak(args) -> None:
+    from utils.semantic_cache import get_semantic_cache
+
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+
+    chatbot, saver, reads, writes = build_chatbot(args.db, int(args.hot_memory_mb * 2**20))
+    turns, lag, errors = Samples(), Samples(), []
+    stop = time.monotonic() + args.duration
+
+    tasks = [asyncio.create_task(user(u, chatbot, args, turns, errors, stop)) for u in range(args.users)]
+    tasks.append(asyncio.create_task(loop_lag(lag, stop)))
+
+    print(f"{'min':>6} {'turns/s':>7} {'turn p50':>8} {'turn p99':>8} {'read p50':>8} {'read p99':>8} {'write p50':>9} {'write p99':>9} "
+          f"{'hot lock':>8} {'cold lock':>9} {'lag p99':>7} {'hot hit':>7} {'threads':>7} {'hot MB':>6} {'sem MB':>6} {'rss MB':>7} {'growth':>7} {'errors':>6}")
+
+    start, base_rss, history, last = time.monotonic(), None, [], {'hot': (0, 0), 'cold': (0, 0)}
+    filled = None  # index in history of the first window with both caches full
+    while time.monotonic() < stop:
+        await asyncio.sleep(min(args.report_seconds, max(0.0, stop - time.monotonic())))
+
+        window = turns.take_window()
+        r, w, l = reads.take_window(), writes.take_window(), lag.take_window()
+        tier = saver.stats()
+        semantic = get_semantic_cache()
+        semantic_mb = semantic.stats()['index_bytes'] / 2**20 if semantic else 0.0
+
+        # contention of this window only: contended / acquisitions since the last report
+        contention = {}
+        for name, lock in (('hot', saver.lock), ('cold', saver.cold.lock)):
+            acquisitions, contended = lock.acquisitions, lock.contended
+            a0, c0 = last[name]
+            contention[name] = f'{(contended - c0) / (acquisitions - a0):.1%}' if acquisitions > a0 else '-'
+            last[name] = (acquisitions, contended)
+
+        rss = rss_mb()
+        base_rss = base_rss if base_rss is not None else rss
+        elapsed = time.monotonic() - start
+        history.append((elapsed, rss))
+        if filled is None and tier['evictions'] and (semantic is None or semantic.evictions):
+            filled = len(history) - 1
+
+        print(f"{elapsed / 60:>6.1f} {len(window) / args.report_seconds:>7.1f} {ms(window, 50):>8} {ms(window, 99):>8} "
+              f"{ms(r, 50):>8} {ms(r, 99):>8} {ms(w, 50):>9} {ms(w, 99):>9} {contention['hot']:>8} {contention['cold']:>9} "
+              f"{ms(l, 99):>7} {tier['hit_rate'] or 0:>7.1%} {tier['hot_threads']:>7} {tier['hot_bytes'] / 2**20:>6.1f} {semantic_mb:>6.1f} {rss:>7.0f} {rss - base_rss:>+7.0f} {len(errors):>6}")
+
+    await asyncio.gather(*tasks)
+
+    # growth rate only once the hot tier and the semantic cache are full -> before that RSS growth is the caches filling up
+    steady = history[filled:] if filled is not None else []
+    if len(steady) >= 2:
+        (t0, m0), (t1, m1) = steady[0], steady[-1]
+        growth = f'{(m1 - m0) / (t1 - t0) * 3600:+.1f} MB/hour over the last {(t1 - t0) / 60:.1f} min'
+    elif filled is None:
+        growth = 'n/a (caches not full yet, run longer or lower --hot-memory-mb / SEMANTIC_CACHE_MAX_ENTRIES)'
+    else:
+        growth = 'n/a (caches filled in the last window, run longer)'
+
+    print(f"\n{turns.count} turns, {len(errors)} errors, turn p50 {ms(turns.reservoir, 50)} ms / p99 {ms(turns.reservoir, 99)} ms, "
+          f"read p99 {ms(reads.reservoir, 99)} ms, write p99 {ms(writes.reservoir, 99)} ms")
+    print(f"locks: hot {saver.lock.stats()}\n       cold {saver.cold.lock.stats()}")
+    print(f"hot tier: {saver.stats()}")
+    print(f"rss {history[0][1]:.0f} → {history[-1][1]:.0f} MB, steady-state growth {growth}")
+    if errors:
+        print(f'first error: {errors[0]}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='multi-user soak test of the checkpointed chatbot')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=120, help='seconds')
+    parser.add_argument('--report-seconds', type=float, default=10)
+    parser.add_argument('--think-seconds', type=float, default=5, help='mean pause between turns of a session')
+    parser.add_argument('--turns-per-session', type=float, default=8)
+    parser.add_argument('--idle-seconds', type=float, default=30, help='mean pause between sessions')
+    parser.add_argument('--threads', type=int, default=64, help='threads running turns at once')
+    parser.add_argument('--hot-memory-mb', type=float, default=float(os.getenv('CHAT_HOT_MEMORY_MB', '64')))
+    parser.add_argument('--db', default=os.path.join(HERE, 'soak_checkpoints.sqlite'))
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['LLM_CACHE'] = '0'
+    os.environ.setdefault('FAKE_LLM_LATENCY_MS', '300')
+
+    asyncio.run(soak(args))
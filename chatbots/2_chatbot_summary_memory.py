@@ -0,0 +1,193 @@
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from typing import TypedDict, Annotated, Literal
+from dotenv import load_dotenv
+from functools import cache
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.models import get_chat_model
+
+
+load_dotenv()
+api_key = os.getenv('GEMINI_API_KEY')
+
+
+# memory settings
+TOKEN_BUDGET = int(os.getenv('CHAT_TOKEN_BUDGET', '2000'))  # max tokens of history sent with every turn
+KEEP_TURNS = int(os.getenv('CHAT_KEEP_TURNS', '4'))  # last N user/assistant turns always kept word for word
+SUMMARY_TARGET = int(os.getenv('CHAT_SUMMARY_TARGET', str(TOKEN_BUDGET // 2)))  # low-watermark: history tokens left after a summarize
+
+
+llm = get_chat_model(
+    model = 'gemini-2.5-flash-lite',
+    api_key = api_key
+)
+
+
+class CB_State(TypedDict):
+    messages: Annotated[list[BaseMessage], add_messages]
+    summary: str
+
+
+graph = StateGraph(CB_State)
+
+
+def history_tokens(state: CB_State) -> int:
+    return count_tokens_approximately(state['messages']) + count_tokens_approximately([state.get('summary', '')])
+
+def recent_start(messages: list[BaseMessage]) -> int:
+    # index of the first message of the last KEEP_TURNS turns (a turn starts with a HumanMessage)
+    human_idx = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+
+    if len(human_idx) <= KEEP_TURNS:
+        return 0
+
+    return human_idx[-KEEP_TURNS]
+
+def fold_start(messages: list[BaseMessage]) -> int:
+    # index of the first message summarize keeps: the last KEEP_TURNS turns, plus older whole turns while the kept
+    # messages still fit in SUMMARY_TARGET -> after a summarize the history is well under the budget, not just under it
+    cut = recent_start(messages)
+    tokens = count_tokens_approximately(messages[cut:])
+
+    for start in reversed([i for i, m in enumerate(messages[:cut]) if isinstance(m, HumanMessage)]):
+        tokens += count_tokens_approximately(messages[start:cut])
+        if tokens > SUMMARY_TARGET:
+            break
+        cut = start
+
+    return cut
+
+
+def fit_message(message: BaseMessage, max_tokens: int) -> BaseMessage:
+    # keep the end of the text (the question usually comes after what was pasted), ~4 characters per token
+    if not isinstance(message.content, str) or count_tokens_approximately([message]) <= max_tokens:
+        return message
+    keep = max(0, max_tokens - count_tokens_approximately([message.model_copy(update={'content': ''})])) * 4
+    return message.model_copy(update={'content': message.content[len(message.content) - keep:]})
+
+
+def summarize(state: CB_State) -> CB_State:
+    cut = fold_start(state['messages'])
+    old_messages = state['messages'][:cut]
+
+    transcript = '\n'.join(f'{m.type}: {m.content}' for m in old_messages)
+
+    prompt = f'''
+Update the running summary of a conversation with the new messages below.
+Keep names, facts, decisions and open questions. Be concise.
+
+Current summary:
+{state.get('summary') or '(empty)'}
+
+New messages:
+{transcript}
+'''
+
+    summary = llm.invoke(prompt).content
+
+    # RemoveMessage makes add_messages drop the folded turns, so the checkpoint stops growing too
+    return {'summary': summary, 'messages': [RemoveMessage(id=m.id) for m in old_messages]}
+
+def chat(state: CB_State) -> CB_State:
+    # the summary is sent too, so the recent turns only get what it leaves of the budget (it takes at most half)
+    summary = [fit_message(SystemMessage(content=f'Summary of the earlier conversation:\n{state["summary"]}'), TOKEN_BUDGET // 2)] if state.get('summary') else []
+    budget = TOKEN_BUDGET - count_tokens_approximately(summary)
+
+    # take query -> rolling summary + recent turns, hard-trimmed to the budget as a last guard
+    query = trim_messages(
+        state['messages'],
+        strategy='last',
+        token_counter=count_tokens_approximately,
+        max_tokens=budget,
+        start_on='human',
+        include_system=False
+    )
+
+    # the latest message alone is over the budget -> trim_messages returns [], send that message cut to the budget
+    if not query:
+        query = [fit_message(state['messages'][-1], budget)]
+
+    query = summary + query
+
+    # response
+    response = llm.invoke(query)
+
+    return {'messages': [response]}
+
+# not a node function
+def memory_checker(state: CB_State) -> Literal['summarize', 'chat']:
+    if history_tokens(state) <= TOKEN_BUDGET:
+        return 'chat'
+
+    cut = fold_start(state['messages'])
+    if cut == 0:
+        return 'chat'
+
+    # folding brings the history back under the budget -> summarize
+    kept = count_tokens_approximately(state['messages'][cut:]) + count_tokens_approximately([state.get('summary', '')])
+    if kept <= TOKEN_BUDGET:
+        return 'summarize'
+
+    # the last KEEP_TURNS turns alone are over the budget (huge messages) -> folding cannot help the prompt, chat trims it.
+    # The older turns are still folded once they add up to a whole budget, so the checkpoint stays bounded
+    # with at most one summarize call per TOKEN_BUDGET tokens of new messages
+    return 'summarize' if count_tokens_approximately(state['messages'][:cut]) >= TOKEN_BUDGET else 'chat'
+
+
+graph.add_node('summarize', summarize)
+graph.add_node('chat', chat)
+
+
+graph.add_conditional_edges(START, memory_checker)
+graph.add_edge('summarize', 'chat')
+graph.add_edge('chat', END)
+
+
+checkpointer = MemorySaver()
+
+@cache
+def get_chatbot():
+    return graph.compile(checkpointer=checkpointer)
+
+
+if __name__ == '__main__':
+    chatbot = get_chatbot()
+
+    print("********* WELCOME **********")
+    while True:
+        user_input = input('User: ')
+
+        if user_input.strip().lower() in ['exit', 'bye']:
+            break
+
+        config = {'configurable': {'thread_id': 'thread-1'}}
+        answer = chatbot.invoke({'messages': [HumanMessage(content=user_input)]}, config=config)
+
+        print(answer['messages'][-1].content)
+        print(f"[{len(answer['messages'])} messages, ~{history_tokens(answer)} tokens in memory]")
+
+
+'''
+Why summary memory?
+
+- In 1_basic_chatbot_stm.py the chat node sends the whole state['messages'] every turn and add_messages only ever appends
+- So tokens and latency per turn grow linearly with the session, and every checkpoint stores the whole history again (quadratic storage)
+- Here every turn first checks the history against TOKEN_BUDGET
+    - under budget → go straight to chat
+    - over budget → 'summarize' folds the older turns into state['summary'] and removes those messages with RemoveMessage
+        - it keeps the last KEEP_TURNS turns, plus older turns while they fit in SUMMARY_TARGET (default half the budget)
+        - low-watermark: after a summarize the history is around SUMMARY_TARGET, so the next one only comes once
+          the turns since then have filled the gap up to TOKEN_BUDGET
+    - if folding cannot bring the history under the budget (the last KEEP_TURNS turns alone are too big) it is skipped
+      until the older turns add up to TOKEN_BUDGET tokens, so the messages stay bounded without a summarize on every turn
+- The chat node sends: SystemMessage(summary) + recent turns, trimmed with trim_messages to what the summary leaves of the budget
+    - the summary takes at most half of TOKEN_BUDGET
+    - a single message over the budget is never dropped: it is sent alone, cut to the tokens left
+- So the summarize call only happens once every few turns, and per-turn latency stays near constant even after thousands of turns
+'''
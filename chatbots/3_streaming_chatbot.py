@@ -0,0 +1,135 @@
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from typing import TypedDict, Annotated
+from dotenv import load_dotenv
+from functools import cache
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.models import get_chat_model
+
+
+load_dotenv()
+api_key = os.getenv('GEMINI_API_KEY')
+
+
+llm = get_chat_model(
+    model = 'gemini-2.5-flash-lite',
+    api_key = api_key
+)
+
+
+class CB_State(TypedDict):
+    messages: Annotated[list[BaseMessage], add_messages]
+
+
+graph = StateGraph(CB_State)
+
+
+def chat(state: CB_State) -> CB_State:
+    # take query
+    query = state['messages']
+
+    # response -> plain invoke, LangGraph streams its tokens when the graph runs with stream_mode='messages'
+    response = llm.invoke(query)
+
+    return {'messages': [response]}
+
+
+graph.add_node('chat', chat)
+
+
+graph.add_edge(START, 'chat')
+graph.add_edge('chat', END)
+
+
+checkpointer = MemorySaver()
+
+@cache
+def get_chatbot():
+    return graph.compile(checkpointer=checkpointer)
+
+
+# one streamed turn -> prints tokens as they arrive and returns the timing of the turn
+def stream_turn(user_input: str, config: dict) -> dict:
+    start = time.perf_counter()
+    first_token_at = None
+    text = ''
+    output_tokens = None
+
+    for chunk, metadata in get_chatbot().stream({'messages': [HumanMessage(content=user_input)]}, config=config, stream_mode='messages'):
+        if metadata['langgraph_node'] != 'chat':
+            continue
+
+        if chunk.content and first_token_at is None:
+            first_token_at = time.perf_counter()
+
+        if isinstance(chunk.content, str):
+            text += chunk.content
+            print(chunk.content, end='', flush=True)
+
+        # providers that report usage send it on the last chunk
+        if getattr(chunk, 'usage_metadata', None):
+            output_tokens = (output_tokens or 0) + chunk.usage_metadata['output_tokens']
+
+    end = time.perf_counter()
+    print()
+
+    if output_tokens is None:
+        output_tokens = count_tokens_approximately([text])
+
+    first_token_at = first_token_at or end
+    generation_secs = end - first_token_at
+
+    return {
+        'ttft_ms': round((first_token_at - start) * 1000, 1),
+        'total_ms': round((end - start) * 1000, 1),
+        'output_tokens': output_tokens,
+        'tokens_per_sec': round(output_tokens / generation_secs, 1) if generation_secs > 0 else None,
+    }
+
+
+if __name__ == '__main__':
+    chatbot = get_chatbot()
+
+    turn_metrics = []
+    config = {'configurable': {'thread_id': 'thread-1'}}
+
+    print("********* WELCOME **********")
+    while True:
+        user_input = input('User: ')
+
+        if user_input.strip().lower() in ['exit', 'bye']:
+            break
+
+        metrics = stream_turn(user_input, config)
+        turn_metrics.append(metrics)
+
+        print(f"[ttft {metrics['ttft_ms']} ms | {metrics['output_tokens']} tokens | {metrics['tokens_per_sec']} tokens/sec]")
+
+
+    # the streamed answers are saved like invoke results -> the checkpointer has the full conversation
+    if turn_metrics:
+        print(f"{len(chatbot.get_state(config).values['messages'])} messages saved")
+
+        ttfts = sorted(m['ttft_ms'] for m in turn_metrics)
+        print(f"turns: {len(turn_metrics)} | median ttft: {ttfts[len(ttfts)//2]} ms | max ttft: {ttfts[-1]} ms")
+
+
+'''
+Why streaming?
+
+- chatbot.invoke returns only after the whole answer is generated, so the user stares at a blank line for the full generation time
+- chatbot.stream(..., stream_mode='messages') yields (message_chunk, metadata) pairs while the model is still generating
+    - metadata['langgraph_node'] tells which node produced the chunk
+    - the chat node itself does not change: LangGraph switches llm.invoke to streaming under the hood
+- When the node returns, the complete AIMessage goes through add_messages and the checkpointer as usual
+- Metrics per turn:
+    - time-to-first-token (ttft) → what the user feels as latency
+    - tokens/sec → output tokens divided by the time from first to last token
+'''
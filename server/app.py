@@ -0,0 +1,257 @@
+'''
+One async HTTP service for the compiled workflows, a plain ASGI app (no web framework needed).
+
+    uvicorn server.app:app --port 8000          # run from the repo root
+    LLM_PROVIDER=fake uvicorn server.app:app    # local fake model, no API key
+
+Routes
+    GET  /health
+    GET  /workflows                 -> exposed workflows and the fields each one needs
+    GET  /stats                     -> requests, executions, coalesced requests, in-flight, model client pool
+    GET  /metrics                   -> per-node metrics of every workflow, Prometheus text format
+    POST /workflows/{name}          -> JSON body with the input fields, returns the final state
+
+    curl -X POST localhost:8000/workflows/sentiment -d '{"review": "Payment failed twice"}'
+    curl -X POST localhost:8000/workflows/chatbot -d '{"thread_id": "u1", "message": "hi, I am Somil"}'
+'''
+
+from typing import Callable
+import asyncio
+import json
+import math
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.registry import get_workflow
+from utils.instrumentation import NodeMetrics, prometheus_text
+from utils.client_pool import get_pool
+
+
+MAX_LLM_CONCURRENCY = int(os.getenv('MAX_LLM_CONCURRENCY', '16'))
+
+
+# the builders coerce and check the domain of the fields, a ValueError becomes a 400 with its message
+def positive(body: dict, field: str) -> float:
+    value = float(body[field])
+    if not (math.isfinite(value) and value > 0):
+        raise ValueError(f'{field} must be a positive number, got {body[field]!r}')
+    return value
+
+def at_least_one(body: dict, field: str, default: int) -> int:
+    value = int(body.get(field, default))
+    if value < 1:
+        raise ValueError(f'{field} must be at least 1, got {value}')
+    return value
+
+def bmi_input(body: dict) -> dict:
+    return {'weight_kg': positive(body, 'weight_kg'), 'height_m': positive(body, 'height_m')}
+
+def essay_input(body: dict) -> dict:
+    return {'essay': body['essay'], 'cot_feedback': '', 'doa_feedback': '', 'g_feedback': '', 'summarized_feedback': '', 'scores': [], 'avg_score': 0.0}
+
+def tweet_input(body: dict) -> dict:
+    return {'topic': body['topic'], 'iteration': 0, 'max_iteration': at_least_one(body, 'max_iteration', 4), 'n_candidates': at_least_one(body, 'n_candidates', 2), 'llm_calls': 0}
+
+def chatbot_output(state: dict) -> dict:
+    return {'reply': state['messages'][-1].content, 'messages': len(state['messages'])}
+
+
+# name -> (registry workflow, required fields, input builder, output builder, coalesce?)
+# the async versions are served where they exist, so their nodes run on the event loop instead of a thread
+ENDPOINTS: dict[str, tuple[str, tuple[str, ...], Callable, Callable | None, bool]] = {
+    'bmi': ('bmi', ('weight_kg', 'height_m'), bmi_input, None, True),
+    'essay_eval': ('essay_eval_async', ('essay',), essay_input, None, True),
+    'sentiment': ('sentiment_speculative', ('review',), lambda b: {'review': b['review']}, None, True),
+    'tweet': ('tweet_best_of_n', ('topic',), tweet_input, None, True),
+    # a chat turn changes the thread's state, so two equal messages are two turns and are never merged
+    'chatbot': ('chatbot', ('thread_id', 'message'), lambda b: {'messages': [('user', b['message'])]}, chatbot_output, False),
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class WorkflowService:
+    '''
+    Runs the workflows behind the HTTP routes.
+
+    - every compiled graph comes from its script's cached factory, and the model clients behind them are shared,
+      so nothing is rebuilt per request
+    - identical requests that arrive while the first one is still running wait for that one's result
+      instead of running the graph again (keyed by workflow + canonical JSON of the body)
+    - one asyncio.Semaphore caps the LLM calls in flight of the essay graph for the whole service
+    - every run reports to a NodeMetrics per workflow (utils/instrumentation.py), served on /metrics
+    '''
+
+    def __init__(self, endpoints: dict = ENDPOINTS):
+        self.endpoints = endpoints
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.llm_semaphore: asyncio.Semaphore | None = None
+        self.counters = {'requests': 0, 'executions': 0, 'coalesced': 0, 'errors': 0}
+        self.metrics = {name: NodeMetrics(name) for name in endpoints}
+
+    def warm_up(self) -> None:
+        # import and compile everything up front, so the first request does not pay for it
+        for workflow, *_ in self.endpoints.values():
+            get_workflow(workflow)
+
+    def config_for(self, name: str, body: dict) -> dict:
+        configurable = {}
+
+        if name == 'essay_eval':
+            if self.llm_semaphore is None:
+                self.llm_semaphore = asyncio.Semaphore(MAX_LLM_CONCURRENCY)
+            configurable['llm_semaphore'] = self.llm_semaphore
+        elif name == 'sentiment':
+            configurable['speculative'] = bool(body.get('speculative', False))
+        elif name == 'chatbot':
+            configurable['thread_id'] = str(body['thread_id'])
+
+        return {'configurable': configurable, 'callbacks': [self.metrics[name]]}
+
+    async def execute(self, name: str, body: dict, graph_input: dict) -> dict:
+        workflow, _, _, make_output, _ = self.endpoints[name]
+
+        self.counters['executions'] += 1
+        state = await get_workflow(workflow).ainvoke(graph_input, config=self.config_for(name, body))
+
+        return make_output(state) if make_output else state
+
+    async def run(self, name: str, body: dict) -> dict:
+        if name not in self.endpoints:
+            raise HTTPError(404, f"unknown workflow '{name}'")
+
+        _, required, make_input, _, coalesce = self.endpoints[name]
+        missing = [field for field in required if field not in body]
+        if missing:
+            raise HTTPError(400, f'missing fields: {", ".join(missing)}')
+
+        # the input builders coerce the fields ('abc' as weight_kg, a list as max_iteration) -> a client error, not a 500
+        try:
+            graph_input = make_input(body)
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, f'invalid input: {e}')
+
+        self.counters['requests'] += 1
+
+        if not coalesce:
+            return await self.execute(name, body, graph_input)
+
+        key = name + ':' + json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+        if key in self.inflight:
+            self.counters['coalesced'] += 1
+            # shield -> a client that disconnects does not cancel the run the others are waiting on
+            return await asyncio.shield(self.inflight[key])
+
+        task = asyncio.ensure_future(self.execute(name, body, graph_input))
+        self.inflight[key] = task
+        task.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {**self.counters, 'inflight': len(self.inflight), 'llm_pool': get_pool().stats()}
+
+
+service = WorkflowService()
+
+
+async def read_json(receive) -> dict:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+
+    raw = b''.join(chunks)
+    try:
+        body = json.loads(raw) if raw else {}
+    except json.JSONDecodeError as e:
+        raise HTTPError(400, f'invalid JSON: {e}')
+
+    if not isinstance(body, dict):
+        raise HTTPError(400, 'body must be a JSON object')
+    return body
+
+
+async def send_bytes(send, status: int, data: bytes, content_type: bytes, headers: list | None = None) -> None:
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(data)).encode()), *(headers or [])],
+    })
+    await send({'type': 'http.response.body', 'body': data})
+
+
+async def send_json(send, status: int, payload, headers: list | None = None) -> None:
+    await send_bytes(send, status, json.dumps(payload, default=str).encode(), b'application/json', headers)
+
+
+async def lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            service.warm_up()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path'].rstrip('/')
+    start = time.perf_counter()
+
+    try:
+        if method == 'GET' and path == '/metrics':
+            text = prometheus_text(*service.metrics.values())
+            return await send_bytes(send, 200, text.encode(), b'text/plain; version=0.0.4')
+        elif method == 'GET' and path == '/health':
+            payload = {'status': 'ok'}
+        elif method == 'GET' and path == '/stats':
+            payload = service.stats()
+        elif method == 'GET' and path == '/workflows':
+            payload = {name: {'workflow': spec[0], 'required': list(spec[1])} for name, spec in service.endpoints.items()}
+        elif path.startswith('/workflows/'):
+            if method != 'POST':
+                raise HTTPError(405, 'use POST')
+            payload = await service.run(path.removeprefix('/workflows/'), await read_json(receive))
+        else:
+            raise HTTPError(404, f'no route {method} {path}')
+    except HTTPError as e:
+        return await send_json(send, e.status, {'error': e.detail})
+    except Exception as e:
+        service.counters['errors'] += 1
+        return await send_json(send, 500, {'error': repr(e)})
+
+    elapsed_ms = f'{(time.perf_counter() - start) * 1000:.1f}'
+    await send_json(send, 200, payload, headers=[(b'server-timing', f'total;dur={elapsed_ms}'.encode())])
+
+
+'''
+Serving the workflows
+
+- Before: every request was `python some_script.py` → a new interpreter, all imports, new model clients and a new compile
+  every time, and the run blocks until it is done
+- Here one process keeps every compiled graph and its model clients, and runs requests with ainvoke on one event loop
+    - the async graphs (essay_eval_async, speculative sentiment, best-of-n tweet) run their nodes on the loop itself
+    - the sync ones (bmi, chatbot) are run by LangGraph in a worker thread, so they do not block the loop
+- Coalescing: if the same review / essay / topic is posted again while the first run is still going,
+  the second request just awaits the first one's result → one graph run, one set of LLM calls
+- The chatbot is never coalesced: the same message twice on a thread is two turns
+- Load test against launching the scripts one by one: benchmarks/load_test_server.py
+'''
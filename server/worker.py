@@ -0,0 +1,81 @@
+'''
+Queue worker for graphs compiled with utils/task_queue.remote_graph: claims node tasks from the SQLite queue,
+runs the node as its script defines it, and writes the update back.
+
+    python server/worker.py --db tasks.sqlite                   # one worker process
+    python server/worker.py --db tasks.sqlite --processes 8     # 8 worker processes
+    python server/worker.py --db tasks.sqlite --preload essay_eval cricket
+    LLM_PROVIDER=fake python server/worker.py --db tasks.sqlite --concurrency 16
+
+--concurrency runs that many tasks at once per claim loop: sync nodes in a thread pool, async def nodes as coroutines
+on one event loop per process (for nodes that mostly wait on the model). --threads runs several claim loops per
+process, --processes forks whole interpreters (for CPU-bound nodes). --preload imports those registry workflows before the first heartbeat,
+otherwise the first task of each node pays for the import.
+
+The default WAL journal needs every worker and the graph process on one host. For workers on other hosts the queue
+file has to sit on a shared volume with working POSIX locks, and everyone, the graph process included, opens it with
+--journal-mode delete (TaskQueue(..., journal_mode='delete')); plain NFS often breaks SQLite's locking.
+'''
+
+import multiprocessing
+import threading
+import argparse
+import signal
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.task_queue import TaskQueue, preload, serve
+
+
+def run(db: str, threads: int, lease_seconds: float, journal_mode: str, workflows: list[str], concurrency: int = 1) -> None:
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    preload(workflows)
+    queue = TaskQueue(db, lease_seconds=lease_seconds, journal_mode=journal_mode)
+    loops = [threading.Thread(target=serve, args=(queue,), kwargs={'stop': stop, 'concurrency': concurrency}, daemon=True) for _ in range(threads)]
+    for loop in loops:
+        loop.start()
+
+    try:
+        while any(loop.is_alive() for loop in loops):
+            stop.wait(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='worker for queue-dispatched graph nodes')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=1, help='tasks each claim loop runs at once')
+    parser.add_argument('--lease-seconds', type=float, default=60.0, help='a task is handed to another worker after this long')
+    parser.add_argument('--journal-mode', choices=['wal', 'delete'], default='wal', help="'delete' for a queue file shared across hosts")
+    parser.add_argument('--preload', nargs='*', default=[], help='registry workflows to import before taking tasks')
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        run(args.db, args.threads, args.lease_seconds, args.journal_mode, args.preload, args.concurrency)
+    else:
+        workers = [multiprocessing.Process(target=run, args=(args.db, args.threads, args.lease_seconds, args.journal_mode, args.preload, args.concurrency)) for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+
+        # a SIGTERM to this process stops every worker: each finishes its current task, one still busy after
+        # the lease is killed and its task goes to another worker
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+        try:
+            while any(worker.is_alive() for worker in workers) and not stopping.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join(args.lease_seconds)
+            if worker.is_alive():
+                worker.kill()
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+from utils.client_pool import ClientPool, pooled, set_pool
+from utils.fake_chat_model import FakeChatModel
+
+
+def test_cancelled_acall_gives_its_slot_back():
+    pool = ClientPool(max_concurrency=2, adaptive=False)
+
+    async def main():
+        # more cancellations than slots -> a leaked slot would block the last call forever
+        for _ in range(5):
+            task = asyncio.create_task(pool.acall(lambda: asyncio.sleep(10), 1))
+            await asyncio.sleep(0.01)
+            assert pool.stats()['in_flight'] == 1
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            assert pool.stats()['in_flight'] == 0
+
+        return await asyncio.wait_for(pool.acall(lambda: asyncio.sleep(0, 'ok'), 1), timeout=1)
+
+    assert asyncio.run(main()) == 'ok'
+
+
+def test_cancelled_astream_before_first_chunk_gives_its_slot_back():
+    pool = ClientPool(max_concurrency=1, adaptive=False)
+    set_pool(pool)
+    model = pooled(FakeChatModel)(latency_ms=10_000, latency_dist='fixed')
+
+    async def consume():
+        return [chunk async for chunk in model.astream([HumanMessage(content='hello')])]
+
+    async def main():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        assert pool.stats()['in_flight'] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    try:
+        asyncio.run(main())
+        assert pool.stats()['in_flight'] == 0
+    finally:
+        set_pool(None)
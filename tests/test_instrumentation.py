@@ -0,0 +1,28 @@
+import sys
+import os
+from typing import TypedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+
+from utils.instrumentation import instrument
+
+
+class Count_State(TypedDict):
+    n: int
+
+
+def test_named_inner_runnable_is_one_node_run():
+    # the node's body is a runnable with the node's own name, like 4_speculative_diagnosis.py
+    graph = StateGraph(Count_State)
+    graph.add_node('step', RunnableLambda(lambda state: {'n': state['n'] + 1}, name='step'))
+    graph.add_edge(START, 'step')
+    graph.add_edge('step', END)
+
+    workflow, metrics = instrument(graph.compile(), 'count')
+    for i in range(3):
+        workflow.invoke({'n': i})
+
+    assert {node: s['calls'] for node, s in metrics.snapshot().items()} == {'step': 3}
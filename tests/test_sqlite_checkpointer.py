@@ -0,0 +1,84 @@
+import operator
+import sys
+import os
+from typing import Annotated, TypedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph, add_messages
+
+from utils.sqlite_checkpointer import DeltaSqliteSaver
+
+
+class Chat_State(TypedDict):
+    messages: Annotated[list, add_messages]
+    log: Annotated[list[str], operator.add]
+
+
+def reply(state: Chat_State):
+    return {'messages': [AIMessage(content=f"echo {state['messages'][-1].content}")], 'log': ['reply']}
+
+
+def build(saver):
+    graph = StateGraph(Chat_State)
+    graph.add_node('reply', reply)
+    graph.add_edge(START, 'reply')
+    graph.add_edge('reply', END)
+    return graph.compile(checkpointer=saver)
+
+
+def test_grown_lists_are_stored_as_tails_and_read_back_whole(tmp_path):
+    path = str(tmp_path / 'delta.sqlite')
+    config = {'configurable': {'thread_id': 't'}}
+    saver = DeltaSqliteSaver(path)
+    workflow = build(saver)
+    for turn in range(40):
+        workflow.invoke({'messages': [HumanMessage(content=f'm{turn}')], 'log': ['user']}, config)
+
+    stats = saver.stats('t')
+    assert stats['stored_bytes'] < stats['full_snapshot_bytes'] / 5
+    tails = saver.conn.execute('SELECT COUNT(*) FROM blobs WHERE base IS NOT NULL').fetchone()[0]
+    assert tails > 0
+
+    # a new process has no memory of the last versions -> it writes a full value and keeps reading chains
+    saver.conn.close()
+    saver = DeltaSqliteSaver(path)
+    workflow = build(saver)
+    workflow.invoke({'messages': [HumanMessage(content='m40')], 'log': ['user']}, config)
+    state = workflow.get_state(config).values
+    assert [m.content for m in state['messages'][-2:]] == ['m40', 'echo m40']
+    assert len(state['messages']) == 82
+    assert state['log'] == ['user', 'reply'] * 41
+
+    # compaction must keep every version a kept tail extends
+    saver.compact('t')
+    assert len(workflow.get_state(config).values['messages']) == 82
+
+
+class Joke_State(TypedDict):
+    topic: str
+    joke: str
+    explanation: str
+
+
+def build_joke(saver):
+    graph = StateGraph(Joke_State)
+    graph.add_node('joke', lambda state: {'joke': f"a short joke about {state['topic']} " * 4})
+    graph.add_node('joke_explanation', lambda state: {'explanation': f"why the joke works: {state['joke']}"})
+    graph.add_edge(START, 'joke')
+    graph.add_edge('joke', 'joke_explanation')
+    graph.add_edge('joke_explanation', END)
+    return graph.compile(checkpointer=saver)
+
+
+def test_demo_shaped_run_saves_bytes(tmp_path):
+    # same shape as 5_Persistence/3_delta_sqlite_checkpointer.py -> two threads of topic → joke → explanation
+    saver = DeltaSqliteSaver(str(tmp_path / 'joke.sqlite'))
+    workflow = build_joke(saver)
+    workflow.invoke({'topic': 'India civic sense'}, {'configurable': {'thread_id': '1'}})
+    workflow.invoke({'topic': 'India in population'}, {'configurable': {'thread_id': '2'}})
+
+    assert saver.stats()['bytes_saved'] > 0
+    assert saver.stats('1')['bytes_saved'] > 0
+    assert saver.stats('1')['pending_write_bytes'] > 0
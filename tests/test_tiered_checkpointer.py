@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+from utils.sqlite_checkpointer import DeltaSqliteSaver
+from utils.tiered_checkpointer import TieredSaver
+from test_sqlite_checkpointer import build
+
+
+class Thread_Recording_Saver(DeltaSqliteSaver):
+    # remembers which threads the cold-store calls ran on
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get_tuple(self, config):
+        self.threads.add(threading.get_ident())
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self.threads.add(threading.get_ident())
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=''):
+        self.threads.add(threading.get_ident())
+        return super().put_writes(config, writes, task_id, task_path)
+
+
+def test_async_cold_store_calls_leave_the_event_loop(tmp_path):
+    cold = Thread_Recording_Saver(str(tmp_path / 'tiered.sqlite'))
+    saver = TieredSaver(cold)
+    workflow = build(saver)
+    config = {'configurable': {'thread_id': 't'}}
+
+    async def run():
+        await workflow.ainvoke({'messages': [HumanMessage(content='m0')], 'log': ['user']}, config)
+        # a thread that is not hot any more -> the miss is read from the cold store and paged in
+        saver.hot.clear()
+        saver.hot_bytes = 0
+        await workflow.ainvoke({'messages': [HumanMessage(content='m1')], 'log': ['user']}, config)
+        return threading.get_ident(), [item async for item in saver.alist(config)]
+
+    loop_thread, history = asyncio.run(run())
+
+    assert cold.threads and loop_thread not in cold.threads
+    assert saver.stats()['page_ins'] == 1
+    assert len(history) == 6
+    assert [m.content for m in workflow.get_state(config).values['messages']] == ['m0', 'echo m0', 'm1', 'echo m1']
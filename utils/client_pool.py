@@ -0,0 +1,368 @@
+from langchain_core.exceptions import ModelRateLimitError
+from langchain_core.messages.utils import count_tokens_approximately
+from collections import deque
+from functools import cache
+import threading
+import asyncio
+import random
+import time
+import os
+
+
+def is_throttle(error: BaseException) -> bool:
+    # langchain's provider-neutral 429, or an SDK error that carries the status code
+    return isinstance(error, ModelRateLimitError) or 429 in (getattr(error, 'code', None), getattr(error, 'status_code', None))
+
+
+class TokenBucket:
+    '''
+    Token bucket that can go into debt: reserve() always succeeds and returns how long the caller has to wait,
+    so threads and coroutines share one bucket without a blocking primitive.
+    '''
+
+    def __init__(self, per_minute: float, burst: float | None = None):
+        self.rate = per_minute / 60
+        self.capacity = burst if burst is not None else per_minute / 60 * 5  # 5 seconds of traffic
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self.lock:
+            self._refill()
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        # the request used `amount` more (or, if negative, fewer) tokens than were reserved for it
+        with self.lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+
+class AdaptiveLimiter:
+    '''
+    Concurrency limit with AIMD (additive increase, multiplicative decrease), shared by threads and coroutines.
+
+    - on_success: limit += 1 / limit, i.e. about +1 per full window of successful requests
+    - on_throttle: limit *= backoff, at most once per recent request latency, so one burst of 429s is one decrease
+    - waiters are served FIFO, a released slot is handed straight to the next waiter (a thread Event or an asyncio future)
+    '''
+
+    def __init__(self, max_limit: int, *, min_limit: int = 1, initial: int | None = None, backoff: float = 0.5, adaptive: bool = True):
+        self.max_limit, self.min_limit = max_limit, min_limit
+        self.limit = float(initial or max_limit)
+        self.backoff = backoff
+        self.adaptive = adaptive
+
+        self.in_flight = 0
+        self.waiters: deque[dict] = deque()
+        self.latency = 0.0  # EWMA of request latency
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    # called with the lock held
+    def _grant(self) -> None:
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            waiter['granted'] = True
+            self.in_flight += 1
+            waiter['wake']()
+
+    def _enter(self, wake) -> dict | None:
+        with self.lock:
+            if not self.waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return None
+            waiter = {'wake': wake, 'granted': False}
+            self.waiters.append(waiter)
+            return waiter
+
+    def acquire(self) -> None:
+        event = threading.Event()
+        if self._enter(event.set):
+            event.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = self._enter(lambda: loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None)))
+        if not waiter:
+            return
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # a slot handed to a cancelled waiter goes to the next one
+            with self.lock:
+                if waiter['granted']:
+                    self.in_flight -= 1
+                    self._grant()
+                else:
+                    self.waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            self._grant()
+
+    def on_success(self, latency: float) -> None:
+        with self.lock:
+            self.latency = latency if not self.latency else 0.8 * self.latency + 0.2 * latency
+            if self.adaptive:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self._grant()
+
+    def on_throttle(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            if self.adaptive and now - self.last_decrease >= self.latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+
+
+class ClientPool:
+    '''
+    Process-wide gate in front of every model request.
+
+    - requests_per_min / tokens_per_min: token buckets (0 = no limit); a request reserves its estimated tokens
+      before it goes out and the bucket is corrected with the real usage afterwards
+    - an AdaptiveLimiter caps the requests in flight and shrinks the cap when the provider answers 429
+    - a 429 is retried here, with full-jitter exponential backoff, after the slot was given back
+      → the provider SDK should not retry on its own (see utils/models.py), or retries multiply
+    - queue wait (bucket wait + slot wait) of every request is recorded, stats() gives p50/p99/max
+    '''
+
+    def __init__(
+        self,
+        *,
+        requests_per_min: float = 0,
+        tokens_per_min: float = 0,
+        max_concurrency: int = 256,
+        min_concurrency: int = 1,
+        adaptive: bool = True,
+        max_retries: int = 6,
+        base_backoff: float = 0.25,
+        expected_output_tokens: int = 256,
+    ):
+        self.requests = TokenBucket(requests_per_min) if requests_per_min else None
+        self.tokens = TokenBucket(tokens_per_min) if tokens_per_min else None
+        self.limiter = AdaptiveLimiter(max_concurrency, min_limit=min_concurrency, adaptive=adaptive)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.expected_output_tokens = expected_output_tokens
+
+        self.lock = threading.Lock()
+        self.waits: deque[float] = deque(maxlen=10_000)
+        self.counters = {'requests': 0, 'throttled': 0, 'retries': 0, 'errors': 0, 'tokens': 0, 'queue_wait_seconds': 0.0, 'max_queue_wait_seconds': 0.0}
+
+    def estimate(self, messages) -> int:
+        return count_tokens_approximately(messages) + self.expected_output_tokens
+
+    def _bucket_delay(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests:
+            delays.append(self.requests.reserve(1))
+        if self.tokens:
+            delays.append(self.tokens.reserve(tokens))
+        return max(delays)
+
+    def _record_wait(self, wait: float) -> None:
+        with self.lock:
+            self.waits.append(wait)
+            self.counters['queue_wait_seconds'] += wait
+            self.counters['max_queue_wait_seconds'] = max(self.counters['max_queue_wait_seconds'], wait)
+
+    def _done(self, reserved: int, used: int | None, latency: float) -> None:
+        self.limiter.on_success(latency)
+        if self.tokens and used is not None:
+            self.tokens.adjust(used - reserved)
+        with self.lock:
+            self.counters['requests'] += 1
+            self.counters['tokens'] += used or 0
+
+    def _failed(self, error: BaseException, attempt: int) -> float | None:
+        # seconds to back off before the next attempt, None -> give up and raise
+        with self.lock:
+            if not is_throttle(error):
+                self.counters['errors'] += 1
+                return None
+            self.counters['throttled'] += 1
+            if attempt >= self.max_retries:
+                self.counters['errors'] += 1
+                return None
+            self.counters['retries'] += 1
+
+        self.limiter.on_throttle()
+        return random.uniform(0, self.base_backoff * 2**attempt)
+
+    # keep_slot -> the caller keeps the concurrency slot after a success and releases it itself (streams)
+    def call(self, fn, tokens: int, usage=lambda result: None, keep_slot: bool = False):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            time.sleep(self._bucket_delay(tokens))
+            self.limiter.acquire()
+            self._record_wait(time.perf_counter() - start)
+
+            sent = time.perf_counter()
+            try:
+                result = fn()
+            except Exception as e:
+                self.limiter.release()
+                if (backoff := self._failed(e, attempt)) is None:
+                    raise
+                time.sleep(backoff)
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+
+            if not keep_slot:
+                self.limiter.release()
+            self._done(tokens, usage(result), time.perf_counter() - sent)
+            return result
+
+    async def acall(self, fn, tokens: int, usage=lambda result: None, keep_slot: bool = False):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            await asyncio.sleep(self._bucket_delay(tokens))
+            await self.limiter.aacquire()
+            self._record_wait(time.perf_counter() - start)
+
+            sent = time.perf_counter()
+            try:
+                result = await fn()
+            except Exception as e:
+                self.limiter.release()
+                if (backoff := self._failed(e, attempt)) is None:
+                    raise
+                await asyncio.sleep(backoff)
+                continue
+            except BaseException:
+                # cancelled while in flight (a losing speculation, a cancelled evaluation) -> the slot goes back,
+                # otherwise it is lost for good and the pool ends up with every slot taken by nobody
+                self.limiter.release()
+                raise
+
+            if not keep_slot:
+                self.limiter.release()
+            self._done(tokens, usage(result), time.perf_counter() - sent)
+            return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters, waits = dict(self.counters), sorted(self.waits)
+        with self.limiter.lock:
+            limit, in_flight, waiting = self.limiter.limit, self.limiter.in_flight, len(self.limiter.waiters)
+
+        def pct(q):
+            return round(waits[min(len(waits) - 1, int(q / 100 * len(waits)))] * 1000, 2) if waits else 0.0
+
+        return {
+            **counters,
+            'concurrency_limit': round(limit, 2),
+            'in_flight': in_flight,
+            'waiting': waiting,
+            'queue_wait_p50_ms': pct(50),
+            'queue_wait_p99_ms': pct(99),
+        }
+
+
+# the process-wide pool -> built from the environment on first use, set_pool replaces it (tests, benchmarks)
+_pool: ClientPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ClientPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ClientPool(
+                    requests_per_min=float(os.getenv('LLM_POOL_RPM', '0')),
+                    tokens_per_min=float(os.getenv('LLM_POOL_TPM', '0')),
+                    max_concurrency=int(os.getenv('LLM_POOL_MAX_CONCURRENCY', '256')),
+                    max_retries=int(os.getenv('LLM_POOL_MAX_RETRIES', '6')),
+                )
+    return _pool
+
+def set_pool(pool: ClientPool) -> None:
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def _usage(result) -> int | None:
+    # ChatResult -> total tokens reported by the provider
+    usage = getattr(result.generations[0].message, 'usage_metadata', None) if result.generations else None
+    return usage['total_tokens'] if usage else None
+
+
+class PooledChatModel:
+    '''
+    Mixin for a chat model class: every provider request goes through the process-wide ClientPool.
+
+    It overrides the provider hooks (_generate, _agenerate, _stream, _astream), so LLM cache hits never take a slot,
+    and with_structured_output / bind_tools keep working because they bind this same instance.
+    A stream holds its slot until the last chunk, a 429 is only retried before the first chunk.
+    '''
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        pool = get_pool()
+        return pool.call(lambda: super(PooledChatModel, self)._generate(messages, stop, run_manager, **kwargs), pool.estimate(messages), _usage)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        pool = get_pool()
+        return await pool.acall(lambda: super(PooledChatModel, self)._agenerate(messages, stop, run_manager, **kwargs), pool.estimate(messages), _usage)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        pool = get_pool()
+        stream = pool.call(
+            lambda: self._first_chunk(super(PooledChatModel, self)._stream(messages, stop, run_manager, **kwargs)),
+            pool.estimate(messages),
+            keep_slot=True,
+        )
+        try:
+            yield from stream
+        finally:
+            pool.limiter.release()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        pool = get_pool()
+
+        async def first():
+            iterator = super(PooledChatModel, self)._astream(messages, stop, run_manager, **kwargs).__aiter__()
+            return await anext(iterator, None), iterator
+
+        chunk, iterator = await pool.acall(first, pool.estimate(messages), keep_slot=True)
+        try:
+            if chunk is not None:
+                yield chunk
+            async for chunk in iterator:
+                yield chunk
+        finally:
+            pool.limiter.release()
+
+    @staticmethod
+    def _first_chunk(iterator):
+        # pull the first chunk inside the pooled call, so a 429 raised before any output is retried there
+        iterator = iter(iterator)
+        first = next(iterator, None)
+
+        def rest():
+            if first is not None:
+                yield first
+            yield from iterator
+
+        return rest()
+
+
+@cache
+def pooled(cls: type) -> type:
+    # same name and module as the provider class -> LLM cache keys and serialization do not change
+    return type(cls.__name__, (PooledChatModel, cls), {'__module__': cls.__module__, '__qualname__': cls.__qualname__})
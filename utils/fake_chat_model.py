@@ -0,0 +1,213 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.callbacks import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
+from langchain_core.exceptions import ModelRateLimitError
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, AsyncIterator, Iterator, Literal
+import threading
+import asyncio
+import hashlib
+import random
+import json
+import time
+
+
+WORDS = (
+    'the quick answer depends on context but in short it is mostly about clarity depth and simple english '
+    'people often forget that good structure matters as much as good ideas so keep it short and honest'
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    '''
+    Deterministic local stand-in for ChatGoogleGenerativeAI.
+
+    - Same prompt → same reply (the text is derived from a hash of the messages), so runs are reproducible
+    - Latency is drawn from a configurable distribution (fixed, uniform, exponential, lognormal) around latency_ms
+    - invoke / ainvoke / stream / astream all work; streaming yields one word per chunk after the first-token latency
+    - with_structured_output(schema) returns a valid instance of the pydantic schema (Literal values, int ranges, ...)
+    - usage_metadata is filled with approximate token counts, like a real provider
+    - optional prompt-size effects: prefill time per input token and a context limit
+    - optional throttling: 429s (ModelRateLimitError) above max_inflight concurrent requests or at a random throttle_rate
+    '''
+
+    model: str = 'fake-chat-model'
+    latency_ms: float = 200.0
+    latency_dist: Literal['fixed', 'uniform', 'exponential', 'lognormal'] = 'lognormal'
+    latency_sigma: float = 0.5  # spread of the lognormal / half width of uniform as a fraction of latency_ms
+    tokens_per_sec: float = 0.0  # streaming speed after the first token, 0 = no pacing
+    prefill_tokens_per_sec: float = 0.0  # prompt reading speed, adds input_tokens / rate to the latency, 0 = free
+    context_tokens: int = 0  # max input tokens, a longer prompt raises like a provider would, 0 = no limit
+    max_inflight: int = 0  # provider-side concurrency, a request above it is answered with a 429, 0 = no limit
+    throttle_rate: float = 0.0  # share of requests answered with a 429 at random
+    reply_words: int = 40
+    seed: int | None = None
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _inflight: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-chat-model'
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {'model': self.model, 'latency_ms': self.latency_ms, 'latency_dist': self.latency_dist, 'reply_words': self.reply_words}
+
+    # latency
+    def sample_latency(self) -> float:
+        mean = self.latency_ms / 1000
+        with self._rng_lock:
+            if self.latency_dist == 'fixed':
+                return mean
+            if self.latency_dist == 'uniform':
+                return self._rng.uniform(mean * (1 - self.latency_sigma), mean * (1 + self.latency_sigma))
+            if self.latency_dist == 'exponential':
+                return self._rng.expovariate(1 / mean) if mean > 0 else 0.0
+            return self._rng.lognormvariate(0, self.latency_sigma) * mean if mean > 0 else 0.0
+
+    # prompt size -> extra latency for reading the prompt, error past the context window
+    def prompt_seconds(self, messages: list[BaseMessage]) -> float:
+        if not (self.prefill_tokens_per_sec or self.context_tokens):
+            return 0.0
+
+        input_tokens = count_tokens_approximately(messages)
+        if self.context_tokens and input_tokens > self.context_tokens:
+            raise ValueError(f'prompt has ~{input_tokens} tokens, the context window of {self.model} is {self.context_tokens}')
+        return input_tokens / self.prefill_tokens_per_sec if self.prefill_tokens_per_sec else 0.0
+
+    # throttling -> a request is admitted or answered with a 429 straight away, like a provider's rate limiter
+    def _admit(self) -> None:
+        with self._rng_lock:
+            throttled = bool(
+                (self.max_inflight and self._inflight >= self.max_inflight)
+                or (self.throttle_rate and self._rng.random() < self.throttle_rate)
+            )
+            if not throttled:
+                self._inflight += 1
+
+        if throttled:
+            raise ModelRateLimitError(f'429 Too Many Requests: {self.model} is over its rate limit')
+
+    def _leave(self) -> None:
+        with self._rng_lock:
+            self._inflight -= 1
+
+    # deterministic content
+    @staticmethod
+    def _digest(messages: list[BaseMessage], salt: str = '') -> int:
+        text = salt + '\x00'.join(f'{m.type}:{m.content}' for m in messages)
+        return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], 'big')
+
+    def _reply_text(self, messages: list[BaseMessage]) -> str:
+        rng = random.Random(self._digest(messages))
+        return ' '.join(rng.choice(WORDS) for _ in range(self.reply_words))
+
+    def _fake_value(self, schema: dict, defs: dict, rng: random.Random) -> Any:
+        if '$ref' in schema:
+            return self._fake_value(defs[schema['$ref'].split('/')[-1]], defs, rng)
+        if 'anyOf' in schema:
+            return self._fake_value(schema['anyOf'][0], defs, rng)
+        if 'const' in schema:
+            return schema['const']
+        if 'enum' in schema:
+            return rng.choice(schema['enum'])
+
+        kind = schema.get('type', 'string')
+        if kind == 'object':
+            return {name: self._fake_value(prop, defs, rng) for name, prop in schema.get('properties', {}).items()}
+        if kind == 'array':
+            return [self._fake_value(schema.get('items', {}), defs, rng)]
+        if kind == 'integer':
+            return rng.randint(int(schema.get('minimum', 0)), int(schema.get('maximum', 10)))
+        if kind == 'number':
+            return round(rng.uniform(schema.get('minimum', 0.0), schema.get('maximum', 1.0)), 3)
+        if kind == 'boolean':
+            return rng.random() < 0.5
+        return ' '.join(rng.choice(WORDS) for _ in range(12))
+
+    def _make_message(self, messages: list[BaseMessage], response_schema: dict | None) -> AIMessage:
+        if response_schema is not None:
+            rng = random.Random(self._digest(messages, json.dumps(response_schema, sort_keys=True)))
+            content = json.dumps(self._fake_value(response_schema, response_schema.get('$defs', {}), rng))
+        else:
+            content = self._reply_text(messages)
+
+        input_tokens = count_tokens_approximately(messages)
+        output_tokens = count_tokens_approximately([content])
+        return AIMessage(
+            content=content,
+            response_metadata={'model_name': self.model},
+            usage_metadata={'input_tokens': input_tokens, 'output_tokens': output_tokens, 'total_tokens': input_tokens + output_tokens},
+        )
+
+    # invoke / ainvoke
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: CallbackManagerForLLMRun | None = None, **kwargs: Any) -> ChatResult:
+        self._admit()
+        try:
+            time.sleep(self.prompt_seconds(messages) + self.sample_latency())
+            return ChatResult(generations=[ChatGeneration(message=self._make_message(messages, kwargs.get('response_schema')))])
+        finally:
+            self._leave()
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: AsyncCallbackManagerForLLMRun | None = None, **kwargs: Any) -> ChatResult:
+        self._admit()
+        try:
+            await asyncio.sleep(self.prompt_seconds(messages) + self.sample_latency())
+            return ChatResult(generations=[ChatGeneration(message=self._make_message(messages, kwargs.get('response_schema')))])
+        finally:
+            self._leave()
+
+    # stream / astream -> first chunk after the sampled latency, then one word per chunk
+    def _chunks(self, messages: list[BaseMessage], **kwargs: Any) -> list[ChatGenerationChunk]:
+        message = self._make_message(messages, kwargs.get('response_schema'))
+        words = message.content.split(' ')
+        chunks = [ChatGenerationChunk(message=AIMessageChunk(content=w if i == 0 else ' ' + w)) for i, w in enumerate(words)]
+        chunks.append(ChatGenerationChunk(message=AIMessageChunk(content='', usage_metadata=message.usage_metadata, chunk_position='last')))
+        return chunks
+
+    def _stream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: CallbackManagerForLLMRun | None = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._admit()
+        try:
+            time.sleep(self.prompt_seconds(messages) + self.sample_latency())
+            for i, chunk in enumerate(self._chunks(messages, **kwargs)):
+                if i and self.tokens_per_sec:
+                    time.sleep(1 / self.tokens_per_sec)
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        finally:
+            self._leave()
+
+    async def _astream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: AsyncCallbackManagerForLLMRun | None = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._admit()
+        try:
+            await asyncio.sleep(self.prompt_seconds(messages) + self.sample_latency())
+            for i, chunk in enumerate(self._chunks(messages, **kwargs)):
+                if i and self.tokens_per_sec:
+                    await asyncio.sleep(1 / self.tokens_per_sec)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        finally:
+            self._leave()
+
+    # structured output -> the JSON schema is bound as a call kwarg (so it is part of the cache key) and the reply is parsed back
+    def with_structured_output(self, schema: dict | type, *, include_raw: bool = False, **kwargs: Any):
+        is_model = isinstance(schema, type) and issubclass(schema, BaseModel)
+        json_schema = schema.model_json_schema() if is_model else schema
+
+        def parse(message: AIMessage):
+            return schema.model_validate_json(message.content) if is_model else json.loads(message.content)
+
+        llm = self.bind(response_schema=json_schema)
+        if include_raw:
+            return llm | RunnableLambda(lambda message: {'raw': message, 'parsed': parse(message), 'parsing_error': None})
+        return llm | RunnableLambda(parse)
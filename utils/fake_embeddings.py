@@ -0,0 +1,39 @@
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel
+import numpy as np
+import zlib
+import re
+
+
+class FakeEmbeddings(BaseModel, Embeddings):
+    '''
+    Deterministic local stand-in for HuggingFaceEmbeddings (no model download, no torch).
+
+    - feature hashing of the words, word pairs and character trigrams of the text into `size` dimensions, L2-normalized
+    - texts that share most of their words land close together (cosine), so rewordings, typos and punctuation
+      changes match while different questions do not; a real embedding model also matches synonyms
+    - same text → same vector in every process (crc32, not the salted hash())
+    '''
+
+    size: int = 384
+
+    def _features(self, text: str) -> list[str]:
+        words = re.findall(r'\w+', text.casefold())
+        padded = f" {' '.join(words)} "
+        bigrams = [f'{a} {b}' for a, b in zip(words, words[1:])]
+        return words + bigrams + [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode())
+            vector[h % self.size] += 1.0 if h & 0x80000000 else -1.0
+
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
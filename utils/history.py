@@ -0,0 +1,58 @@
+from langgraph.types import StateSnapshot
+from datetime import datetime
+from typing import Callable, Iterator
+
+
+# (checkpoint_id, ts) of one checkpoint namespace, newest first -> ids to keep
+RetentionPolicy = Callable[[list[tuple[str, datetime]]], set[str]]
+
+
+# paginated history -> get_state_history decodes every snapshot it is asked for up front,
+# so it is only ever asked for one page, and the next page starts before the last checkpoint of this one
+def read_history_page(workflow, config: dict, *, page_size: int = 20, cursor: str | None = None) -> tuple[list[StateSnapshot], str | None]:
+    '''
+    One page of a thread's history, newest first.
+
+    cursor is the checkpoint_id the previous page ended at (None for the first page), the returned cursor is
+    None once the oldest checkpoint has been read.
+    '''
+    configurable = {k: v for k, v in config['configurable'].items() if k != 'checkpoint_id'}
+    before = {'configurable': {**configurable, 'checkpoint_id': cursor}} if cursor else None
+
+    page = list(workflow.get_state_history({**config, 'configurable': configurable}, before=before, limit=page_size))
+    next_cursor = page[-1].config['configurable']['checkpoint_id'] if len(page) == page_size else None
+
+    return page, next_cursor
+
+def iter_history(workflow, config: dict, *, page_size: int = 20) -> Iterator[StateSnapshot]:
+    # drop-in for list(workflow.get_state_history(config)) that holds at most one page in memory
+    cursor = None
+    while True:
+        page, cursor = read_history_page(workflow, config, page_size=page_size, cursor=cursor)
+        yield from page
+        if cursor is None:
+            return
+
+
+# retention policies -> used by DeltaSqliteSaver.compact, several policies keep the union of their ids
+def keep_last(n: int) -> RetentionPolicy:
+    def policy(checkpoints: list[tuple[str, datetime]]) -> set[str]:
+        return {checkpoint_id for checkpoint_id, _ in checkpoints[:n]}
+
+    return policy
+
+def keep_one_per(seconds: float) -> RetentionPolicy:
+    # newest checkpoint of every time bucket
+    def policy(checkpoints: list[tuple[str, datetime]]) -> set[str]:
+        keep, seen = set(), set()
+        for checkpoint_id, ts in checkpoints:
+            bucket = int(ts.timestamp() // seconds)
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(checkpoint_id)
+        return keep
+
+    return policy
+
+def keep_one_per_hour() -> RetentionPolicy:
+    return keep_one_per(3600)
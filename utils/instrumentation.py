@@ -0,0 +1,294 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from collections import OrderedDict, defaultdict, deque
+from typing import Any
+from uuid import UUID
+import threading
+import bisect
+import json
+import time
+
+
+# failed tasks remembered to recognise their RetryPolicy re-run; a retry follows within one run,
+# so only the most recent ones are kept and a failure that is never retried cannot pile up
+MAX_FAILED_TASKS = 1024
+
+# finished node runs are queued without a lock and folded into the per-node stats in batches of this size
+# (or when the stats are read) -> the hot path is one deque append, not a lock plus a dozen dict updates
+FOLD_EVERY = 256
+
+# upper bounds (seconds) of the node wall-time histogram
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+
+def new_node_stats() -> dict:
+    return {
+        'calls': 0,
+        'errors': 0,
+        'retries': 0,
+        'wall_seconds': 0.0,
+        'max_wall_seconds': 0.0,
+        'model_calls': 0,
+        'model_seconds': 0.0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'buckets': [0] * len(BUCKETS),
+    }
+
+
+class NodeMetrics(BaseCallbackHandler):
+    '''
+    Per-node metrics of a compiled graph, collected from LangChain callbacks.
+
+    - wall time -> from the node's own chain run (the run named like its 'langgraph_node' metadata)
+    - model time and tokens -> every chat model call inside the node (usage_metadata of the reply)
+    - retries -> a node run starting again for a task that just failed (RetryPolicy), plus model client retries
+    - to_json() / to_prometheus() export the totals, report() prints a table
+
+    One instance can be shared by any number of runs and threads, pass it with instrument(workflow) or
+    config={'callbacks': [metrics]}.
+    '''
+
+    # called in the thread of the event, no executor hop for async runs
+    run_inline = True
+
+    def __init__(self, graph: str = 'workflow'):
+        self.graph = graph
+        self.nodes: dict[str, dict] = defaultdict(new_node_stats)
+        self._node_runs: dict[UUID, tuple[str, str, float]] = {}
+        self._model_runs: dict[UUID, tuple[str, float]] = {}
+        self._failed_tasks: OrderedDict[str, None] = OrderedDict()
+        self._finished: deque[tuple[str, float, bool]] = deque()  # (node, elapsed, error) not folded into nodes yet
+        self._lock = threading.Lock()
+
+    # node runs
+    def on_chain_start(
+        self, serialized: dict, inputs: Any, *, run_id: UUID, parent_run_id: UUID | None = None, metadata: dict | None = None, name: str | None = None, **kwargs: Any
+    ) -> None:
+        # the graph itself, channel writes and runnables inside a node are not node runs -> leave before any other work
+        if name is None or metadata is None or metadata.get('langgraph_node') != name:
+            return
+        # a runnable inside the node that carries the node's name -> the node run is already open, count it once
+        if parent_run_id in self._node_runs:
+            return
+
+        task = metadata.get('langgraph_checkpoint_ns', '')
+        # a retry is rare -> the lock is only taken for a task that failed before
+        if task in self._failed_tasks:
+            with self._lock:
+                if self._failed_tasks.pop(task, False) is None:
+                    self.nodes[name]['retries'] += 1
+        self._node_runs[run_id] = (name, task, time.perf_counter())
+
+    def _end_node(self, run_id: UUID, error: bool) -> None:
+        run = self._node_runs.pop(run_id, None)
+        if run is None:
+            return
+
+        node, task, start = run
+        self._finished.append((node, time.perf_counter() - start, error))
+
+        if error:
+            with self._lock:
+                self._failed_tasks[task] = None
+                if len(self._failed_tasks) > MAX_FAILED_TASKS:
+                    self._failed_tasks.popitem(last=False)
+        if len(self._finished) >= FOLD_EVERY:
+            self._fold()
+
+    def _fold(self) -> None:
+        # deque appends and pops are thread safe -> runs finishing while this folds wait for the next fold
+        with self._lock:
+            finished = self._finished
+            for _ in range(len(finished)):
+                node, elapsed, error = finished.popleft()
+                stats = self.nodes[node]
+                stats['calls'] += 1
+                stats['errors'] += error
+                stats['wall_seconds'] += elapsed
+                if elapsed > stats['max_wall_seconds']:
+                    stats['max_wall_seconds'] = elapsed
+                stats['buckets'][bisect.bisect_left(BUCKETS, elapsed)] += 1
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, error=False)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, error=True)
+
+    # model calls
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, metadata: dict | None = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get('langgraph_node')
+        if node is not None:
+            self._model_runs[run_id] = (node, time.perf_counter())
+
+    def on_llm_start(self, serialized: dict, prompts: list[str], *, run_id: UUID, metadata: dict | None = None, **kwargs: Any) -> None:
+        self.on_chat_model_start(serialized, [], run_id=run_id, metadata=metadata)
+
+    def _end_model(self, run_id: UUID, response: LLMResult | None) -> None:
+        run = self._model_runs.pop(run_id, None)
+        if run is None:
+            return
+
+        node, start = run
+        elapsed = time.perf_counter() - start
+        prompt_tokens = completion_tokens = 0
+
+        for generation in (response.generations[0] if response and response.generations else []):
+            usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}
+            prompt_tokens += usage.get('input_tokens', 0)
+            completion_tokens += usage.get('output_tokens', 0)
+
+        with self._lock:
+            stats = self.nodes[node]
+            stats['model_calls'] += 1
+            stats['model_seconds'] += elapsed
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_model(run_id, response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_model(run_id, None)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        # retries done inside a model client (tenacity) are reported on the model run
+        run = self._model_runs.get(run_id)
+        if run is not None:
+            with self._lock:
+                self.nodes[run[0]]['retries'] += 1
+
+    # export
+    def reset(self) -> None:
+        with self._lock:
+            self.nodes.clear()
+            self._failed_tasks.clear()
+            self._finished.clear()
+
+    def snapshot(self) -> dict:
+        self._fold()
+        with self._lock:
+            nodes = {node: {**stats, 'buckets': list(stats['buckets'])} for node, stats in self.nodes.items()}
+
+        for stats in nodes.values():
+            stats['avg_wall_ms'] = round(stats['wall_seconds'] / stats['calls'] * 1000, 3) if stats['calls'] else 0.0
+            stats['model_share'] = round(stats['model_seconds'] / stats['wall_seconds'], 3) if stats['wall_seconds'] else 0.0
+
+        return nodes
+
+    def to_json(self, **kwargs: Any) -> str:
+        nodes = self.snapshot()
+        for stats in nodes.values():
+            stats.pop('buckets')
+        return json.dumps({'graph': self.graph, 'nodes': nodes}, **kwargs)
+
+    def to_prometheus(self) -> str:
+        return prometheus_text(self)
+
+    def report(self) -> str:
+        rows = [f"{'node':<20} {'calls':>6} {'avg ms':>9} {'max ms':>9} {'model %':>8} {'llm calls':>10} {'prompt tok':>11} {'compl tok':>10} {'retries':>8}"]
+        for node, s in sorted(self.snapshot().items(), key=lambda item: -item[1]['wall_seconds']):
+            rows.append(
+                f"{node:<20} {s['calls']:>6} {s['avg_wall_ms']:>9} {round(s['max_wall_seconds'] * 1000, 1):>9} {round(s['model_share'] * 100, 1):>8} "
+                f"{s['model_calls']:>10} {s['prompt_tokens']:>11} {s['completion_tokens']:>10} {s['retries']:>8}"
+            )
+        return '\n'.join(rows)
+
+
+COUNTERS = [
+    ('calls', 'langgraph_node_calls_total', 'Finished node runs'),
+    ('errors', 'langgraph_node_errors_total', 'Node runs that raised'),
+    ('retries', 'langgraph_node_retries_total', 'Node and model client retries'),
+    ('model_calls', 'langgraph_node_model_calls_total', 'Chat model calls made inside the node'),
+    ('model_seconds', 'langgraph_node_model_seconds_total', 'Time spent inside chat model calls'),
+    ('prompt_tokens', 'langgraph_node_prompt_tokens_total', 'Prompt tokens sent by the node'),
+    ('completion_tokens', 'langgraph_node_completion_tokens_total', 'Completion tokens received by the node'),
+]
+
+
+def prometheus_text(*all_metrics: NodeMetrics) -> str:
+    # one exposition for any number of graphs, every metric family is declared once with a graph label per sample
+    snapshots = [(m.graph, m.snapshot()) for m in all_metrics]
+    lines = []
+
+    for key, metric, help_text in COUNTERS:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for graph, nodes in snapshots:
+            lines += [f'{metric}{{graph="{graph}",node="{node}"}} {stats[key]}' for node, stats in nodes.items()]
+
+    metric = 'langgraph_node_wall_seconds'
+    lines += [f'# HELP {metric} Wall time of node runs', f'# TYPE {metric} histogram']
+    for graph, nodes in snapshots:
+        for node, stats in nodes.items():
+            labels = f'graph="{graph}",node="{node}"'
+            total = 0
+            for bound, count in zip(BUCKETS, stats['buckets']):
+                total += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {total}')
+            lines.append(f'{metric}_sum{{{labels}}} {stats["wall_seconds"]}')
+            lines.append(f'{metric}_count{{{labels}}} {stats["calls"]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class TimedLock:
+    '''
+    Drop-in for threading.Lock that measures contention: acquisitions, how many of them had to wait, and for how long.
+
+    Swap it in for a component's lock (e.g. a checkpointer's `lock`) to see whether callers queue on it under load.
+    The counters are updated while the lock is held, so they need no lock of their own.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(blocking=False):
+            self.acquisitions += 1
+            return True
+        if not blocking:
+            return False
+
+        start = time.perf_counter()
+        if not self._lock.acquire(timeout=timeout):
+            return False
+
+        waited = time.perf_counter() - start
+        self.acquisitions += 1
+        self.contended += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return True
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+    def stats(self) -> dict:
+        return {
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contended_share': round(self.contended / self.acquisitions, 4) if self.acquisitions else 0.0,
+            'wait_seconds': round(self.wait_seconds, 6),
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+def instrument(workflow, graph: str | None = None):
+    # same graph with the metrics handler bound to every call -> (instrumented workflow, metrics)
+    metrics = NodeMetrics(graph or workflow.get_name())
+    return workflow.with_config(callbacks=[metrics]), metrics
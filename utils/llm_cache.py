@@ -0,0 +1,207 @@
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from typing import Any
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(ROOT_DIR, '.llm_cache.sqlite')
+
+
+class SQLiteLLMCache(BaseCache):
+    '''
+    Disk-backed LLM response cache shared by every workflow.
+
+    - key -> sha256 of (llm_string, prompt). For chat models LangChain puts the model name, its parameters
+      and the bound structured-output schema in llm_string, and the serialized messages in prompt
+    - LRU -> every hit refreshes accessed_at, the least recently used rows are evicted first
+    - TTL -> rows older than ttl_seconds are treated as a miss and deleted
+    - size cap -> max_entries rows and max_bytes of stored values
+    - the row count and byte total live in a one-row llm_cache_stats table kept up to date by triggers, in the same
+      transaction as the insert / update / delete -> checking the caps is one row read, not a scan of the cache,
+      and it stays right when several processes share the file
+    '''
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float | None = 7 * 24 * 3600,
+                 max_entries: int = 100_000, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)')
+
+        # one transaction -> a second process opening the same file at the same time sees all of it or none of it
+        self._conn.executescript('''
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                entries INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            -- a file from before the stats table -> counted once here, by the triggers from then on
+            INSERT OR IGNORE INTO llm_cache_stats SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_insert AFTER INSERT ON llm_cache BEGIN
+                UPDATE llm_cache_stats SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_update AFTER UPDATE OF size ON llm_cache BEGIN
+                UPDATE llm_cache_stats SET bytes = bytes - old.size + new.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_delete AFTER DELETE ON llm_cache BEGIN
+                UPDATE llm_cache_stats SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0;
+            END;
+            COMMIT;
+        ''')
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f'{llm_string}\x00{prompt}'.encode()).hexdigest()
+
+    @staticmethod
+    def _dumps(return_val: RETURN_VAL_TYPE) -> str:
+        generations = []
+        for gen in return_val:
+            if isinstance(gen, ChatGeneration):
+                generations.append({'message': message_to_dict(gen.message), 'generation_info': gen.generation_info})
+            else:
+                generations.append({'text': gen.text, 'generation_info': gen.generation_info})
+        return json.dumps(generations)
+
+    @staticmethod
+    def _loads(value: str) -> RETURN_VAL_TYPE:
+        generations = []
+        for gen in json.loads(value):
+            if 'message' in gen:
+                message = messages_from_dict([gen['message']])[0]
+                generations.append(ChatGeneration(message=message, generation_info=gen['generation_info']))
+            else:
+                generations.append(Generation(text=gen['text'], generation_info=gen['generation_info']))
+        return generations
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute('SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += 1
+
+        return self._loads(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        value = self._dumps(return_val)
+        now = time.time()
+
+        with self._lock:
+            # an upsert, not INSERT OR REPLACE -> the replaced row goes through the update trigger
+            # (REPLACE deletes it without firing delete triggers)
+            self._conn.execute(
+                'INSERT INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                'created_at = excluded.created_at, accessed_at = excluded.accessed_at',
+                (key, value, len(value), now, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute('SELECT entries, bytes FROM llm_cache_stats WHERE id = 0').fetchone()
+
+        # drop least recently used rows until both caps hold again
+        while count > self.max_entries or total > self.max_bytes:
+            n = max(count - self.max_entries, 1)
+            rows = self._conn.execute('SELECT key, size FROM llm_cache ORDER BY accessed_at LIMIT ?', (n,)).fetchall()
+            # the stats row says over the cap but the table is empty -> they disagree, stop instead of spinning under the lock
+            if not rows:
+                break
+            self._conn.executemany('DELETE FROM llm_cache WHERE key = ?', [(k,) for k, _ in rows])
+
+            self.evictions += len(rows)
+            count -= len(rows)
+            total -= sum(size for _, size in rows)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache')
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute('SELECT entries, bytes FROM llm_cache_stats WHERE id = 0').fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': total,
+        }
+
+
+# path -> cache already enabled in this process
+_enabled: dict[str, SQLiteLLMCache] = {}
+
+
+def enable_llm_cache(path: str | None = None) -> SQLiteLLMCache | None:
+    # LLM_CACHE=0 turns the cache off, e.g. when sampling fresh outputs on purpose
+    # the caller prints .stats() if it wants them, a library module does not write to stdout
+    if os.getenv('LLM_CACHE', '1') == '0':
+        return None
+
+    # every workflow script calls this on import -> when one process loads many of them they share one cache
+    path = path or os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+    if path in _enabled:
+        set_llm_cache(_enabled[path])
+        return _enabled[path]
+
+    ttl = os.getenv('LLM_CACHE_TTL_SECONDS')
+    cache = SQLiteLLMCache(
+        path=path,
+        ttl_seconds=float(ttl) if ttl else 7 * 24 * 3600,
+        max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '100000')),
+        max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB', '512')) * 1024 * 1024),
+    )
+    set_llm_cache(cache)
+
+    _enabled[path] = cache
+    return cache
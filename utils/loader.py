@@ -0,0 +1,26 @@
+import importlib.util
+import sys
+import os
+import re
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# the workflow scripts live in folders like '2_parallel_workflows' and cannot be imported by name,
+# so they are loaded from their file path (their demo code sits under `if __name__ == '__main__'`)
+def load_script(relative_path: str):
+    name = 'wf_' + re.sub(r'\W', '_', relative_path[:-3])
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+
+    return module
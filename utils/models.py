@@ -0,0 +1,100 @@
+from functools import cache
+import threading
+import os
+
+
+# LLM_PROVIDER=fake swaps every workflow's Gemini client for the local FakeChatModel (no network, no API key)
+# LLM_POOL=0 takes the clients out of the process-wide ClientPool (utils/client_pool.py)
+@cache
+def _build_chat_model(provider: str, model: str, kwargs: tuple):
+    from utils.client_pool import pooled
+
+    kwargs = dict(kwargs)
+    wrap = pooled if os.getenv('LLM_POOL', '1') != '0' else (lambda cls: cls)
+
+    if provider == 'fake':
+        from utils.fake_chat_model import FakeChatModel
+
+        seed = os.getenv('FAKE_LLM_SEED')
+        return wrap(FakeChatModel)(
+            model=model,
+            latency_ms=float(os.getenv('FAKE_LLM_LATENCY_MS', '200')),
+            latency_dist=os.getenv('FAKE_LLM_LATENCY_DIST', 'lognormal'),
+            latency_sigma=float(os.getenv('FAKE_LLM_LATENCY_SIGMA', '0.5')),
+            tokens_per_sec=float(os.getenv('FAKE_LLM_TOKENS_PER_SEC', '0')),
+            prefill_tokens_per_sec=float(os.getenv('FAKE_LLM_PREFILL_TOKENS_PER_SEC', '0')),
+            context_tokens=int(os.getenv('FAKE_LLM_CONTEXT_TOKENS', '0')),
+            max_inflight=int(os.getenv('FAKE_LLM_MAX_INFLIGHT', '0')),
+            throttle_rate=float(os.getenv('FAKE_LLM_429_RATE', '0')),
+            seed=int(seed) if seed else None,
+        )
+
+    if provider == 'google':
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        # the pool retries 429s itself -> one attempt in the SDK (0 would mean the SDK default of 6)
+        if wrap is pooled:
+            kwargs.setdefault('max_retries', 1)
+        return wrap(ChatGoogleGenerativeAI)(model=model, **kwargs)
+
+    raise ValueError(f"Unknown LLM_PROVIDER '{provider}', expected 'google' or 'fake'")
+
+
+class LazyModel:
+    '''Stands in for a chat model (or a runnable made from one) and builds it the first time it is used.'''
+
+    def __init__(self, build):
+        self._build = build
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._build()
+        return self._model
+
+    def with_structured_output(self, schema, **kwargs) -> 'LazyModel':
+        return LazyModel(lambda: self.get().with_structured_output(schema, **kwargs))
+
+    def __getattr__(self, name: str):
+        # private names are never forwarded, so copy/pickle probing cannot trigger a build
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        return f'LazyModel({self._model!r})' if self._model is not None else 'LazyModel(<not built>)'
+
+
+def get_chat_model(model: str, **kwargs) -> LazyModel:
+    # nothing is imported or constructed here -> importing a workflow script stays cheap and needs no API key.
+    # The client is built on the first call, and scripts asking for the same model share one client per process
+    return LazyModel(lambda: _build_chat_model(os.getenv('LLM_PROVIDER', 'google'), model, tuple(sorted(kwargs.items()))))
+
+
+# EMBEDDINGS_PROVIDER=fake swaps the local HuggingFace model for FakeEmbeddings, the default follows LLM_PROVIDER
+@cache
+def _build_embeddings(provider: str, model: str):
+    if provider == 'fake':
+        from utils.fake_embeddings import FakeEmbeddings
+
+        return FakeEmbeddings()
+
+    if provider == 'huggingface':
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        # CPU, unit-length vectors -> a dot product is the cosine similarity
+        return HuggingFaceEmbeddings(model_name=model, model_kwargs={'device': 'cpu'}, encode_kwargs={'normalize_embeddings': True})
+
+    raise ValueError(f"Unknown EMBEDDINGS_PROVIDER '{provider}', expected 'huggingface' or 'fake'")
+
+
+def embeddings_provider() -> str:
+    return os.getenv('EMBEDDINGS_PROVIDER', 'fake' if os.getenv('LLM_PROVIDER') == 'fake' else 'huggingface')
+
+
+def get_embeddings(model: str = 'sentence-transformers/all-MiniLM-L6-v2') -> LazyModel:
+    # built on first use like the chat models -> sentence-transformers / torch are only imported when a text is embedded
+    return LazyModel(lambda: _build_embeddings(embeddings_provider(), model))
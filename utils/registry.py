@@ -0,0 +1,46 @@
+from utils.loader import load_script
+
+
+# name -> (script, factory). Loading a script only defines its graph: the model clients are built on the first
+# call and the graph is compiled on the first factory call, so one process can hold every workflow cheaply
+WORKFLOWS: dict[str, tuple[str, str]] = {
+    'bmi': ('1_sequential_workflows/1_bmi_workflow.py', 'get_workflow'),
+    'llm_qa': ('1_sequential_workflows/2_llm_workflow.py', 'get_workflow'),
+    'bmi_batch': ('1_sequential_workflows/3_bmi_batch_workflow.py', 'get_workflow'),
+    'cricket': ('2_parallel_workflows/1_simple_cricket_workflow.py', 'get_workflow'),
+    'cricket_season': ('2_parallel_workflows/4_cricket_season_workflow.py', 'get_workflow'),
+    'essay_eval': ('2_parallel_workflows/2_essay_eval_workflow.py', 'get_workflow'),
+    'essay_eval_async': ('2_parallel_workflows/3_async_essay_eval_workflow.py', 'get_workflow'),
+    'essay_eval_fused': ('2_parallel_workflows/5_fused_essay_eval_workflow.py', 'get_workflow'),
+    'essay_eval_chunked': ('2_parallel_workflows/6_chunked_essay_eval_workflow.py', 'get_workflow'),
+    'quadratic': ('3_conditional_workflows/1_quadric_eq.py', 'get_workflow'),
+    'quadratic_batch': ('3_conditional_workflows/5_quadric_eq_batch.py', 'get_workflow'),
+    'sentiment': ('3_conditional_workflows/2_senti_response.py', 'get_workflow'),
+    'review_triage': ('3_conditional_workflows/3_bulk_review_triage.py', 'get_workflow'),
+    'sentiment_speculative': ('3_conditional_workflows/4_speculative_diagnosis.py', 'get_workflow'),
+    'tweet': ('4_iteratitive_workflows/1_generate_funny_tweet.py', 'get_workflow'),
+    'tweet_best_of_n': ('4_iteratitive_workflows/2_best_of_n_tweet.py', 'get_workflow'),
+    'joke_memory_saver': ('5_Persistence/1_basic_idea.py', 'get_workflow'),
+    'fault_tolerance': ('5_Persistence/2_fault_tolerance.py', 'get_workflow'),
+    'joke_delta_sqlite': ('5_Persistence/3_delta_sqlite_checkpointer.py', 'get_workflow'),
+    'durable_fault_tolerance': ('5_Persistence/4_durable_fault_tolerance.py', 'get_workflow'),
+    'history_retention': ('5_Persistence/5_history_retention.py', 'get_workflow'),
+    'chatbot': ('chatbots/1_basic_chatbot_stm.py', 'get_chatbot'),
+    'chatbot_summary_memory': ('chatbots/2_chatbot_summary_memory.py', 'get_chatbot'),
+    'chatbot_streaming': ('chatbots/3_streaming_chatbot.py', 'get_chatbot'),
+}
+
+
+def load_module(name: str):
+    return load_script(WORKFLOWS[name][0])
+
+
+def get_workflow(name: str):
+    # the compiled graph, cached by the script's own factory
+    script, factory = WORKFLOWS[name]
+    return getattr(load_script(script), factory)()
+
+
+def load_all(names: list[str] | None = None) -> dict:
+    # imports the scripts only, nothing is compiled and no model client is created
+    return {name: load_module(name) for name in names or WORKFLOWS}
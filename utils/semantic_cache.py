@@ -0,0 +1,241 @@
+from collections import OrderedDict, Counter, deque
+import numpy as np
+import importlib.util
+import threading
+import warnings
+import time
+import os
+
+from utils.models import embeddings_provider, get_embeddings
+
+
+class VectorIndex:
+    '''
+    Flat in-process vector index: exact cosine search over one numpy matrix of unit vectors.
+
+    - one matrix-vector product per search, so latency grows linearly with the entries (benchmarks/bench_semantic_cache.py)
+    - the matrix doubles when full, a removed vector is zeroed and its slot reused
+    - every vector carries a namespace id, search only returns matches from the caller's namespace
+    '''
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.namespaces = np.full(capacity, -1, dtype=np.int32)
+        self.size = 0  # slots ever used, free ones included
+        self.free: list[int] = []
+
+    def __len__(self) -> int:
+        return self.size - len(self.free)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.namespaces.nbytes
+
+    def _grow(self) -> None:
+        capacity = len(self.vectors) * 2
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        namespaces = np.full(capacity, -1, dtype=np.int32)
+        vectors[:self.size], namespaces[:self.size] = self.vectors[:self.size], self.namespaces[:self.size]
+        self.vectors, self.namespaces = vectors, namespaces
+
+    def add(self, vector: np.ndarray, namespace: int) -> int:
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.size == len(self.vectors):
+                self._grow()
+            slot = self.size
+            self.size += 1
+
+        self.vectors[slot] = vector
+        self.namespaces[slot] = namespace
+        return slot
+
+    def remove(self, slot: int) -> None:
+        # a zero vector scores 0 against anything -> never above a positive threshold
+        self.vectors[slot] = 0
+        self.namespaces[slot] = -1
+        self.free.append(slot)
+
+    def search(self, vector: np.ndarray, namespace: int) -> tuple[int, float]:
+        # best (slot, cosine) in the namespace, (-1, 0.0) when it is empty
+        if not self.size:
+            return -1, 0.0
+
+        scores = self.vectors[:self.size] @ vector
+        scores[self.namespaces[:self.size] != namespace] = -1.0
+        slot = int(scores.argmax())
+        return (slot, float(scores[slot])) if scores[slot] > -1.0 else (-1, 0.0)
+
+
+class SemanticCache:
+    '''
+    Answers for questions close enough to one already answered, matched by embedding similarity.
+
+    - lookup -> embed the text, best match in its namespace; cosine ≥ threshold returns the stored answer
+    - namespaces keep apart answers that must never mix (another model, another conversation so far);
+      a namespace id lives as long as it has entries, so short-lived namespaces do not pile up
+    - LRU -> a hit refreshes the entry, past max_entries the least recently used one is evicted
+    - TTL -> entries older than ttl_seconds are treated as a miss and dropped
+    - stats() -> hit rate, entries, evictions, lookup latency p50/p99 (embedding + search) and the search alone
+    '''
+
+    def __init__(self, embeddings, *, threshold: float = 0.95, max_entries: int = 100_000, ttl_seconds: float | None = None):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.index: VectorIndex | None = None  # built on the first vector, when the dimension is known
+        self.entries: OrderedDict[int, tuple[str, str, float]] = OrderedDict()  # slot -> (text, answer, created_at), LRU order
+        self.namespace_ids: dict[str, int] = {}
+        self.namespace_names: dict[int, str] = {}
+        self.namespace_sizes: Counter[int] = Counter()  # namespace id -> entries
+        self._next_namespace = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.lookup_seconds: deque[float] = deque(maxlen=10_000)
+        self.search_seconds: deque[float] = deque(maxlen=10_000)
+
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> np.ndarray:
+        return np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+
+    # called with the lock held
+    def _namespace(self, namespace: str) -> int:
+        if namespace not in self.namespace_ids:
+            self.namespace_ids[namespace] = self._next_namespace
+            self.namespace_names[self._next_namespace] = namespace
+            self._next_namespace += 1
+        return self.namespace_ids[namespace]
+
+    def _search(self, vector: np.ndarray, namespace: str) -> str | None:
+        start = time.perf_counter()
+
+        with self._lock:
+            # an unknown namespace has no entries -> a miss without registering it
+            namespace_id = self.namespace_ids.get(namespace)
+            slot, score = self.index.search(vector, namespace_id) if self.index and namespace_id is not None else (-1, 0.0)
+            answer = None
+
+            if slot >= 0 and score >= self.threshold:
+                _, answer, created_at = self.entries[slot]
+                if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                    self._remove(slot)
+                    self.expired += 1
+                    answer = None
+                else:
+                    self.entries.move_to_end(slot)
+
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self.search_seconds.append(time.perf_counter() - start)
+
+        return answer
+
+    def _insert(self, vector: np.ndarray, text: str, answer: str, namespace: str) -> None:
+        with self._lock:
+            if self.index is None:
+                self.index = VectorIndex(len(vector))
+
+            namespace_id = self._namespace(namespace)
+            slot = self.index.add(vector, namespace_id)
+            self.entries[slot] = (text, answer, time.time())
+            self.namespace_sizes[namespace_id] += 1
+
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    # called with the lock held
+    def _remove(self, slot: int) -> None:
+        namespace_id = int(self.index.namespaces[slot])
+        del self.entries[slot]
+        self.index.remove(slot)
+
+        # last entry of its namespace -> forget the namespace too
+        self.namespace_sizes[namespace_id] -= 1
+        if not self.namespace_sizes[namespace_id]:
+            del self.namespace_sizes[namespace_id]
+            del self.namespace_ids[self.namespace_names.pop(namespace_id)]
+
+    def lookup(self, text: str, namespace: str = '') -> str | None:
+        start = time.perf_counter()
+        answer = self._search(self.embed(text), namespace)
+        self.lookup_seconds.append(time.perf_counter() - start)
+        return answer
+
+    def update(self, text: str, answer: str, namespace: str = '') -> None:
+        self._insert(self.embed(text), text, answer, namespace)
+
+    def get_or_call(self, text: str, call, namespace: str = '') -> str:
+        # one embedding for both the lookup and, on a miss, the insert of call()'s answer
+        start = time.perf_counter()
+        vector = self.embed(text)
+        answer = self._search(vector, namespace)
+        self.lookup_seconds.append(time.perf_counter() - start)
+
+        if answer is None:
+            answer = call()
+            self._insert(vector, text, answer, namespace)
+        return answer
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups, searches = sorted(self.lookup_seconds), sorted(self.search_seconds)
+            entries, nbytes = len(self.entries), self.index.nbytes if self.index else 0
+
+        def pct(values, q):
+            return round(values[min(len(values) - 1, int(q / 100 * len(values)))] * 1000, 3) if values else 0.0
+
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': entries,
+            'namespaces': len(self.namespace_ids),
+            'index_bytes': nbytes,
+            'lookup_p50_ms': pct(lookups, 50),
+            'lookup_p99_ms': pct(lookups, 99),
+            'search_p50_ms': pct(searches, 50),
+            'search_p99_ms': pct(searches, 99),
+        }
+
+
+# one semantic cache per process, shared by every workflow that asks for it
+_semantic_cache: SemanticCache | None = None
+_semantic_cache_lock = threading.Lock()
+_semantic_cache_missing = False
+
+
+def get_semantic_cache() -> SemanticCache | None:
+    # SEMANTIC_CACHE=0 turns it off, e.g. when every answer has to come from the model
+    if os.getenv('SEMANTIC_CACHE', '1') == '0':
+        return None
+
+    global _semantic_cache, _semantic_cache_missing
+    if _semantic_cache is None and not _semantic_cache_missing:
+        with _semantic_cache_lock:
+            # the local embedding model needs sentence-transformers -> without it run uncached instead of failing every lookup
+            if _semantic_cache is None and embeddings_provider() == 'huggingface' and importlib.util.find_spec('sentence_transformers') is None:
+                _semantic_cache_missing = True
+                warnings.warn('sentence-transformers is not installed, the semantic cache is off (pip install sentence-transformers, or SEMANTIC_CACHE=0)')
+            if _semantic_cache is None and not _semantic_cache_missing:
+                ttl = os.getenv('SEMANTIC_CACHE_TTL_SECONDS')
+                _semantic_cache = SemanticCache(
+                    get_embeddings(os.getenv('SEMANTIC_CACHE_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')),
+                    threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95')),
+                    max_entries=int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '100000')),
+                    ttl_seconds=float(ttl) if ttl else None,
+                )
+
+    return _semantic_cache
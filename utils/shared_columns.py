@@ -0,0 +1,99 @@
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing import resource_tracker
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+class SharedColumns:
+    '''
+    Named numpy columns, each in its own multiprocessing shared-memory block.
+
+    - create() copies the columns in once, empty() allocates output columns
+    - spec is a small picklable dict {name: (block name, dtype, length)}: it is what goes into the graph state
+      and to the worker processes, never the data itself
+    - attach(spec) in any process gives numpy views on the same memory, no copy
+    - the creating process unlinks the blocks on close (use it as a context manager)
+    '''
+
+    def __init__(self, spec: dict[str, tuple[str, str, int]], owner: bool = False):
+        self.spec = spec
+        self.owner = owner
+        self.blocks = {name: SharedMemory(name=block) for name, (block, _, _) in spec.items()}
+
+    @classmethod
+    def create(cls, columns: dict[str, np.ndarray]) -> 'SharedColumns':
+        shared = cls.empty({name: (np.asarray(values).dtype, len(values)) for name, values in columns.items()})
+        for name, values in columns.items():
+            shared[name][:] = values
+        return shared
+
+    @classmethod
+    def empty(cls, columns: dict[str, tuple]) -> 'SharedColumns':
+        spec, blocks = {}, {}
+        for name, (dtype, length) in columns.items():
+            dtype = np.dtype(dtype)
+            block = SharedMemory(create=True, size=max(dtype.itemsize * length, 1))
+            spec[name] = (block.name, dtype.str, length)
+            blocks[name] = block
+
+        shared = cls.__new__(cls)
+        shared.spec, shared.owner, shared.blocks = spec, True, blocks
+        return shared
+
+    @classmethod
+    def attach(cls, spec: dict) -> 'SharedColumns':
+        return cls(spec)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        _, dtype, length = self.spec[name]
+        return np.ndarray((length,), dtype=np.dtype(dtype), buffer=self.blocks[name].buf)
+
+    def close(self) -> None:
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = {}
+
+    def __enter__(self) -> 'SharedColumns':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    # the resource tracker must run before the workers start, so they share it with this process.
+    # Otherwise every forked worker starts its own tracker, which thinks the blocks it attached leaked
+    # and unlinks them when the worker exits
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+def _apply(kernel, source: SharedColumns, target: SharedColumns, columns: list[str], output: str):
+    # the views only live in this frame, so the blocks can be closed once it returns
+    return kernel(*(source[name] for name in columns), out=target[output])
+
+
+def run_kernel(script: str, function: str, inputs: dict, columns: list[str], outputs: dict, output: str):
+    '''
+    Runs kernel(*input columns, out=output column) in a worker process, on shared memory only.
+
+    The workflow scripts cannot be imported by name, so the worker loads the script from its path and looks the
+    kernel up there (works with fork, spawn and forkserver alike). Only the specs travel through the pool.
+    '''
+    from utils.loader import load_script
+
+    kernel = getattr(load_script(script), function)
+    source, target = SharedColumns.attach(inputs), SharedColumns.attach(outputs)
+
+    try:
+        return _apply(kernel, source, target, columns, output)
+    finally:
+        # one try per segment -> a view still held on one of them does not keep the other open
+        for shared in (source, target):
+            try:
+                shared.close()
+            except BufferError:
+                # a traceback can still hold a view, the mapping then goes away with the process
+                pass
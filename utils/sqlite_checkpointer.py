@@ -0,0 +1,462 @@
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langchain_core.runnables import RunnableConfig
+from utils.history import RetentionPolicy
+from typing import Any, AsyncIterator, Iterator, Sequence
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import hashlib
+import sqlite3
+
+
+class DeltaSqliteSaver(BaseCheckpointSaver):
+    '''
+    Persistent SQLite checkpointer that stores deltas instead of full snapshots.
+
+    - A checkpoint row keeps only the bookkeeping (channel_versions, versions_seen, metadata, parent id)
+    - Channel values go to the blobs table keyed by (thread_id, checkpoint_ns, channel, version),
+      and a blob is written only for the channels in new_versions, i.e. the channels the node that just ran
+      changed ({'joke': ...} after 'joke', {'explanation': ...} after 'joke_explanation')
+    - A list channel that only grew (add_messages, operator.add) is stored as its new tail plus the version it
+      extends, so a chat turn writes the new messages and not the whole conversation again; every
+      MAX_TAIL_CHAIN tails a full value is written so a read never follows a long chain
+    - On read the full state is rebuilt by loading, for every channel, the blob at the version
+      recorded in channel_versions (a tail with the chain it extends, in one query),
+      so get_state and get_state_history see complete states
+    - stats() compares the bytes really stored (checkpoints, blobs and pending writes) with what full
+      snapshots after every step would take
+    - list() reads the table in keyset pages, compact() / compact_all() apply retention policies (utils/history.py)
+      and drop the blobs and pending writes nothing points at anymore
+    '''
+
+    LIST_PAGE_ROWS = 50
+    MAX_TAIL_CHAIN = 32  # tails in a row before a list channel is written in full again
+    MAX_CACHED_THREADS = 10_000  # threads whose last list versions are remembered for tail writes
+
+    def __init__(self, path: str, *, serde: SerializerProtocol | None = None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                snapshot_bytes INTEGER NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                base TEXT,
+                full_bytes INTEGER,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+        ''')
+
+        # files written before tails existed -> every old blob is a full value
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(blobs)')}
+        if 'base' not in columns:
+            self.conn.execute('ALTER TABLE blobs ADD COLUMN base TEXT')
+            self.conn.execute('ALTER TABLE blobs ADD COLUMN full_bytes INTEGER')
+
+        # thread_id -> {(checkpoint_ns, channel): (version, element digests, chain length, full_bytes)}
+        # of the last list value written, LRU by thread; a thread that is not here gets a full blob
+        self._lists: OrderedDict[str, dict[tuple[str, str], tuple[str, list[bytes], int, int]]] = OrderedDict()
+
+    # helpers
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            # the blob and, for a tail, the blobs it extends, oldest (the full value) first
+            rows = self.conn.execute(
+                '''
+                WITH RECURSIVE chain(type, value, base, depth) AS (
+                    SELECT type, value, base, 0 FROM blobs
+                    WHERE thread_id = ?1 AND checkpoint_ns = ?2 AND channel = ?3 AND version = ?4
+                    UNION ALL
+                    SELECT b.type, b.value, b.base, chain.depth + 1 FROM blobs b JOIN chain
+                    ON b.thread_id = ?1 AND b.checkpoint_ns = ?2 AND b.channel = ?3 AND b.version = chain.base
+                )
+                SELECT type, value, base FROM chain ORDER BY depth DESC
+                ''',
+                (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchall()
+            if not rows or rows[-1][0] == 'empty':
+                continue
+            if rows[0][2] is not None:
+                raise ValueError(f'blob {channel}@{version} of thread {thread_id} extends a version that is not stored')
+
+            value = self.serde.loads_typed(rows[0][:2])
+            for type_, tail, _ in rows[1:]:
+                value = value + self.serde.loads_typed((type_, tail))
+            values[channel] = value
+        return values
+
+    def _digests(self, value: list) -> list[bytes]:
+        return [hashlib.blake2b(self.serde.dumps_typed(item)[1], digest_size=16).digest() for item in value]
+
+    # called with the lock held -> (type, value, base, full_bytes) of the blob to write for a list channel
+    def _list_blob(self, thread_id: str, checkpoint_ns: str, channel: str, value: list, digests: list[bytes]) -> tuple[str, bytes, str | None, int]:
+        last = self._lists.get(thread_id, {}).get((checkpoint_ns, channel))
+
+        if last is not None:
+            base, base_digests, chain, base_bytes = last
+            # only appended to, and the chain is still short -> store the new elements and the version they extend
+            if chain < self.MAX_TAIL_CHAIN and len(digests) >= len(base_digests) and digests[:len(base_digests)] == base_digests:
+                type_, tail = self.serde.dumps_typed(value[len(base_digests):])
+                return type_, tail, base, base_bytes + len(tail)
+
+        type_, full = self.serde.dumps_typed(value)
+        return type_, full, None, len(full)
+
+    # called with the lock held, after the commit -> the next put of this channel can extend this version
+    def _remember_list(self, thread_id: str, checkpoint_ns: str, channel: str, version: str, digests: list[bytes], base: str | None, full_bytes: int) -> None:
+        lists = self._lists.setdefault(thread_id, {})
+        self._lists.move_to_end(thread_id)
+        chain = lists[(checkpoint_ns, channel)][2] + 1 if base is not None else 0
+        lists[(checkpoint_ns, channel)] = (version, digests, chain, full_bytes)
+
+        while len(self._lists) > self.MAX_CACHED_THREADS:
+            self._lists.popitem(last=False)
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list[tuple[str, str, Any]]:
+        rows = self.conn.execute(
+            'SELECT task_id, idx, channel, type, value, task_path FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?',
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, value))) for task_id, _, channel, type_, value, _ in rows]
+
+    def _make_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple, metadata: CheckpointMetadata | None = None) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b, metadata_type, metadata_b = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+
+        return CheckpointTuple(
+            config={'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint_id}},
+            checkpoint={**checkpoint, 'channel_values': self._load_blobs(thread_id, checkpoint_ns, checkpoint['channel_versions'])},
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_b)),
+            parent_config=(
+                {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': parent_checkpoint_id}}
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    # read
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        columns = 'checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata'
+
+        with self.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f'SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?',
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f'SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1',
+                    (thread_id, checkpoint_ns)
+                ).fetchone()
+
+            if row is None:
+                return None
+
+            return self._make_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        columns = 'thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata'
+        where, params = [], []
+
+        if config:
+            where.append('thread_id = ?')
+            params.append(config['configurable']['thread_id'])
+            if (checkpoint_ns := config['configurable'].get('checkpoint_ns')) is not None:
+                where.append('checkpoint_ns = ?')
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append('checkpoint_id = ?')
+                params.append(checkpoint_id)
+
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append('checkpoint_id < ?')
+            params.append(before_id)
+
+        # keyset pages -> only LIST_PAGE_ROWS rows are fetched at a time, a consumer that stops early
+        # (limit, or a history reader that only wants one page) never loads the rest of a long thread
+        key = None
+        while True:
+            page_where = where + ['(checkpoint_id, thread_id, checkpoint_ns) < (?, ?, ?)'] if key else where
+            query = f'SELECT {columns} FROM checkpoints'
+            if page_where:
+                query += ' WHERE ' + ' AND '.join(page_where)
+            query += f' ORDER BY checkpoint_id DESC, thread_id DESC, checkpoint_ns DESC LIMIT {self.LIST_PAGE_ROWS}'
+
+            with self.lock:
+                rows = self.conn.execute(query, params + list(key or ())).fetchall()
+
+            for thread_id, checkpoint_ns, *row in rows:
+                # filter by metadata
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+
+                if limit is not None and limit <= 0:
+                    return
+                elif limit is not None:
+                    limit -= 1
+
+                with self.lock:
+                    item = self._make_tuple(thread_id, checkpoint_ns, tuple(row), metadata)
+                yield item
+
+            if len(rows) < self.LIST_PAGE_ROWS:
+                return
+            key = (rows[-1][2], rows[-1][0], rows[-1][1])
+
+    # write
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        parent_checkpoint_id = config['configurable'].get('checkpoint_id')
+
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop('channel_values')
+
+        # list values are compared element by element with the last version written -> digests outside the lock
+        digests = {channel: self._digests(values[channel]) for channel in new_versions if isinstance(values.get(channel), list)}
+
+        type_, checkpoint_b = self.serde.dumps_typed(c)
+        metadata_type, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.lock:
+            # only the channels written in this step get a new blob, a grown list only its tail
+            blobs = []
+            for channel, version in new_versions.items():
+                if channel in digests:
+                    blob_type, blob, base, full_bytes = self._list_blob(thread_id, checkpoint_ns, channel, values[channel], digests[channel])
+                else:
+                    blob_type, blob = self.serde.dumps_typed(values[channel]) if channel in values else ('empty', b'')
+                    base, full_bytes = None, len(blob)
+                blobs.append((thread_id, checkpoint_ns, channel, str(version), blob_type, blob, base, full_bytes))
+
+            with self.conn:
+                self.conn.executemany('INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, type, value, base, full_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', blobs)
+
+                # size a full snapshot of this step would have taken: every current channel value
+                snapshot_bytes = len(checkpoint_b) + len(metadata_b)
+                for channel, version in c['channel_versions'].items():
+                    row = self.conn.execute(
+                        'SELECT COALESCE(full_bytes, LENGTH(value)) FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?',
+                        (thread_id, checkpoint_ns, channel, str(version))
+                    ).fetchone()
+                    snapshot_bytes += (row[0] or 0) if row else 0
+
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (thread_id, checkpoint_ns, checkpoint['id'], parent_checkpoint_id, type_, checkpoint_b, metadata_type, metadata_b, snapshot_bytes)
+                )
+
+            for _, _, channel, version, _, _, base, full_bytes in blobs:
+                if channel in digests:
+                    self._remember_list(thread_id, checkpoint_ns, channel, version, digests[channel], base, full_bytes)
+
+        return {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint['id']}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = config['configurable']['checkpoint_id']
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, value_b = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, type_, value_b, task_path))
+
+        # special channels (errors, interrupts) have a negative idx and may be overwritten, regular writes are kept once
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [r for r in rows if r[4] < 0])
+            self.conn.executemany('INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [r for r in rows if r[4] >= 0])
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock, self.conn:
+            for table in ('checkpoints', 'blobs', 'writes'):
+                self.conn.execute(f'DELETE FROM {table} WHERE thread_id = ?', (thread_id,))
+            self._lists.pop(thread_id, None)
+
+    # retention -> drop the checkpoints no policy keeps, then every blob no remaining checkpoint points at
+    def compact(self, thread_id: str, *policies: RetentionPolicy, vacuum: bool = False) -> dict:
+        stored_before = self.stats(thread_id)['stored_bytes']
+        removed_checkpoints = removed_writes = removed_blobs = 0
+
+        with self.lock, self.conn:
+            namespaces = [r[0] for r in self.conn.execute('SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?', (thread_id,))]
+
+            for checkpoint_ns in namespaces:
+                rows = self.conn.execute(
+                    'SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC',
+                    (thread_id, checkpoint_ns)
+                ).fetchall()
+                checkpoints = {checkpoint_id: self.serde.loads_typed((type_, b)) for checkpoint_id, _, type_, b in rows}
+                parents = {checkpoint_id: parent_id for checkpoint_id, parent_id, _, _ in rows}
+                newest_first = [(checkpoint_id, datetime.fromisoformat(checkpoints[checkpoint_id]['ts'])) for checkpoint_id, *_ in rows]
+
+                # the latest checkpoint and its pending writes are what a resume starts from -> always kept
+                keep = {rows[0][0]}.union(*(policy(newest_first) for policy in policies))
+                drop = [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in parents if checkpoint_id not in keep]
+
+                # a kept checkpoint whose parent is dropped points at its nearest kept ancestor, so history stays a chain
+                relink = []
+                for checkpoint_id in keep:
+                    parent_id = parents[checkpoint_id]
+                    while parent_id is not None and parent_id not in keep:
+                        parent_id = parents.get(parent_id)
+                    if parent_id != parents[checkpoint_id]:
+                        relink.append((parent_id, thread_id, checkpoint_ns, checkpoint_id))
+
+                self.conn.executemany('UPDATE checkpoints SET parent_checkpoint_id = ? WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?', relink)
+                removed_checkpoints += self.conn.executemany('DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?', drop).rowcount
+                removed_writes += self.conn.executemany('DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?', drop).rowcount
+
+                # blobs are shared between checkpoints by version -> keep every version a kept checkpoint still reads,
+                # and for a tail every version of the chain it extends
+                bases = {
+                    (channel, version): base
+                    for channel, version, base in self.conn.execute('SELECT channel, version, base FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?', (thread_id, checkpoint_ns))
+                }
+                referenced = {(channel, str(version)) for checkpoint_id in keep for channel, version in checkpoints[checkpoint_id]['channel_versions'].items()}
+                stack = list(referenced)
+                while stack:
+                    channel, version = stack.pop()
+                    base = bases.get((channel, version))
+                    if base is not None and (channel, base) not in referenced:
+                        referenced.add((channel, base))
+                        stack.append((channel, base))
+                orphans = [(thread_id, checkpoint_ns, channel, version) for channel, version in bases if (channel, version) not in referenced]
+                removed_blobs += self.conn.executemany('DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?', orphans).rowcount
+
+        if vacuum:
+            with self.lock:
+                self.conn.execute('VACUUM')
+
+        return {
+            'thread_id': thread_id,
+            'removed_checkpoints': removed_checkpoints,
+            'removed_writes': removed_writes,
+            'removed_blobs': removed_blobs,
+            'stored_bytes_before': stored_before,
+            'stored_bytes_after': self.stats(thread_id)['stored_bytes'],
+        }
+
+    # compaction job -> every thread longer than min_checkpoints, one transaction per thread so writers are not blocked for long
+    def compact_all(self, *policies: RetentionPolicy, min_checkpoints: int = 0, vacuum: bool = False) -> 'list[dict]':
+        with self.lock:
+            threads = [r[0] for r in self.conn.execute('SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING COUNT(*) > ?', (min_checkpoints,))]
+
+        results = [self.compact(thread_id, *policies) for thread_id in threads]
+        if vacuum:
+            with self.lock:
+                self.conn.execute('VACUUM')
+
+        return results
+
+    # async versions -> sqlite calls are short, so they run inline like InMemorySaver does
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = '') -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    # bytes stored for checkpoints + blobs vs bytes full snapshots after every step would need
+    # -> pending writes are stored the same way by both, so they are reported on their own and kept out of the comparison
+    def stats(self, thread_id: str | None = None) -> dict:
+        where, params = ('WHERE thread_id = ?', (thread_id,)) if thread_id else ('', ())
+
+        with self.lock:
+            checkpoints, checkpoint_bytes, snapshot_bytes = self.conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0), COALESCE(SUM(snapshot_bytes), 0) FROM checkpoints {where}', params
+            ).fetchone()
+            blob_bytes = self.conn.execute(f'SELECT COALESCE(SUM(LENGTH(value)), 0) FROM blobs {where}', params).fetchone()[0]
+            write_bytes = self.conn.execute(f'SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes {where}', params).fetchone()[0]
+
+        stored_bytes = checkpoint_bytes + blob_bytes
+        return {
+            'checkpoints': checkpoints,
+            'stored_bytes': stored_bytes,
+            'full_snapshot_bytes': snapshot_bytes,
+            'bytes_saved': snapshot_bytes - stored_bytes,
+            'pending_write_bytes': write_bytes,
+        }
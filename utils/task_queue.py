@@ -0,0 +1,313 @@
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langchain_core.runnables import RunnableLambda
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from functools import cache
+import traceback
+import threading
+import sqlite3
+import asyncio
+import socket
+import copy
+import time
+import os
+
+from utils.registry import load_module
+
+
+class RemoteTaskError(RuntimeError):
+    '''A node raised inside a worker, the message carries the worker's traceback.'''
+
+
+class TaskQueue:
+    '''
+    Durable node-task queue in one SQLite file, shared by the process running the graph and any number of workers.
+
+    - enqueue -> a 'queued' row with the workflow name, node name and serialized node input
+    - claim -> a worker takes the oldest queued task, or a running one whose lease ran out (its worker died),
+      and leases it for lease_seconds; a task handed out more than max_attempts times fails
+    - complete / fail -> the serialized update or the error; result() polls for it and deletes the row
+    - a worker renews the lease of its task while the node runs, so a slow node is never handed out twice
+    - every state change is a committed row, so queued and leased tasks survive a crash of any process
+    - one connection per thread
+    - journal_mode='wal' (default) -> readers never wait for the writer, but WAL keeps its index in shared memory,
+      so every process has to be on the same host
+    - journal_mode='delete' -> rollback journal, only file locks; workers on other hosts can open the file on a
+      shared volume whose filesystem implements POSIX locks correctly (many NFS setups do not, and then SQLite
+      can corrupt the file). Anything looser needs a networked backend behind these same methods
+    '''
+
+    def __init__(self, path: str, *, lease_seconds: float = 60.0, max_attempts: int = 3, journal_mode: str = 'wal'):
+        if journal_mode not in ('wal', 'delete'):
+            raise ValueError(f"journal_mode must be 'wal' or 'delete', not {journal_mode!r}")
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.journal_mode = journal_mode
+        self.serde = JsonPlusSerializer()
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                workflow TEXT NOT NULL,
+                node TEXT NOT NULL,
+                payload_type TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                result_type TEXT,
+                result BLOB,
+                error TEXT,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                tasks INTEGER NOT NULL DEFAULT 0,
+                started_at REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+        ''')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # graph side
+    def enqueue(self, workflow: str, node: str, state) -> int:
+        payload_type, payload = self.serde.dumps_typed(state)
+        cursor = self._conn().execute(
+            'INSERT INTO tasks (workflow, node, payload_type, payload, created_at) VALUES (?, ?, ?, ?, ?)',
+            (workflow, node, payload_type, payload, time.time())
+        )
+        return cursor.lastrowid
+
+    def result(self, task_id: int, timeout: float | None = None):
+        # poll with a growing pause: ~1 ms while the task is short, at most 10 ms for long ones
+        conn = self._conn()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        pause = 0.001
+
+        while True:
+            row = conn.execute('SELECT status, result_type, result, error FROM tasks WHERE id = ?', (task_id,)).fetchone()
+            if row is None:
+                raise KeyError(f'task {task_id} does not exist')
+
+            status, result_type, result, error = row
+            if status in ('done', 'failed'):
+                conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+                if status == 'failed':
+                    raise RemoteTaskError(error)
+                return self.serde.loads_typed((result_type, result))
+
+            if deadline is not None and time.monotonic() > deadline:
+                # nobody will read it any more -> a queued task is never run, a running one is dropped when it completes
+                conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+                raise TimeoutError(f'task {task_id} still {status} after {timeout}s')
+            time.sleep(pause)
+            pause = min(pause * 2, 0.01)
+
+    # worker side
+    def claim(self, worker: str) -> tuple[int, str, str, object] | None:
+        conn = self._conn()
+
+        while True:
+            now = time.time()
+            # read first, then take it with a conditional update -> no write lock while the queue is empty
+            row = conn.execute(
+                "SELECT id, attempts FROM tasks WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            task_id, attempts = row
+            if attempts >= self.max_attempts:
+                self.fail(task_id, f'task handed out {attempts} times, its workers never finished it')
+                continue
+
+            taken = conn.execute(
+                "UPDATE tasks SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?, started_at = ? "
+                "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND lease_until < ?))",
+                (worker, now + self.lease_seconds, now, task_id, now)
+            ).rowcount
+            if not taken:
+                continue  # another worker was faster
+
+            workflow, node, payload_type, payload = conn.execute(
+                'SELECT workflow, node, payload_type, payload FROM tasks WHERE id = ?', (task_id,)
+            ).fetchone()
+            return task_id, workflow, node, self.serde.loads_typed((payload_type, payload))
+
+    def renew(self, task_id: int, worker: str) -> bool:
+        # False -> the lease ran out and another worker has the task
+        return bool(self._conn().execute(
+            "UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + self.lease_seconds, task_id, worker)
+        ).rowcount)
+
+    def complete(self, task_id: int, update) -> None:
+        result_type, result = self.serde.dumps_typed(update)
+        self._conn().execute(
+            "UPDATE tasks SET status = 'done', result_type = ?, result = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+            (result_type, result, time.time(), task_id)
+        )
+
+    def fail(self, task_id: int, error: str) -> None:
+        self._conn().execute(
+            "UPDATE tasks SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+            (error, time.time(), task_id)
+        )
+
+    def heartbeat(self, worker: str, tasks: int = 0) -> None:
+        now = time.time()
+        self._conn().execute(
+            'INSERT INTO workers (worker, host, pid, tasks, started_at, last_seen) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (worker) DO UPDATE SET tasks = tasks + excluded.tasks, last_seen = excluded.last_seen',
+            (worker, socket.gethostname(), os.getpid(), tasks, now, now)
+        )
+
+    def stats(self, alive_seconds: float = 10.0) -> dict:
+        conn = self._conn()
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+        workers = conn.execute('SELECT COUNT(*) FROM workers WHERE last_seen > ?', (time.time() - alive_seconds,)).fetchone()[0]
+        return {status: counts.get(status, 0) for status in ('queued', 'running', 'done', 'failed')} | {'workers': workers}
+
+
+# the node as the script defines it, loaded once per worker process
+@cache
+def _node_runnable(workflow: str, node: str):
+    return load_module(workflow).graph.nodes[node].runnable
+
+
+def preload(workflows: list[str]) -> None:
+    # import the scripts and their models before the first task -> no cold start inside a caller's latency
+    for workflow in workflows:
+        for node in load_module(workflow).graph.nodes:
+            _node_runnable(workflow, node)
+
+
+@cache
+def _event_loop() -> asyncio.AbstractEventLoop:
+    # one event loop per worker process, in its own thread -> async def nodes share it instead of a new loop per task
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name='task-queue-loop', daemon=True).start()
+    return loop
+
+
+def _is_async(runnable) -> bool:
+    # async def nodes only have an async path
+    return getattr(runnable, 'func', None) is None and getattr(runnable, 'afunc', None) is not None
+
+
+def serve(queue: TaskQueue, *, worker: str | None = None, stop: threading.Event | None = None, idle_pause: float = 0.02, concurrency: int = 1) -> None:
+    '''
+    Worker loop: claim tasks, run their nodes, store the updates; runs until stop is set, then finishes the tasks it holds.
+
+    Up to `concurrency` tasks run at once: sync nodes in a thread pool of that size, async def nodes as coroutines on
+    the process's shared event loop (no thread is held while they wait on the model). The loop renews the lease of
+    every task it holds three times per lease, so a slow node is never handed out twice and a dead worker still loses them.
+    '''
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    stop = stop or threading.Event()
+    slots = threading.BoundedSemaphore(concurrency)
+    running: set[int] = set()
+    lock = threading.Lock()  # running and finished, updated from the pool and loop threads
+    finished = 0
+    pause, last_beat, last_renew = 0.001, 0.0, time.monotonic()
+
+    def store(task_id: int, future: Future) -> None:
+        nonlocal finished
+        try:
+            update = future.result()
+        except Exception:
+            queue.fail(task_id, traceback.format_exc())
+        else:
+            queue.complete(task_id, update)
+        finally:
+            with lock:
+                running.discard(task_id)
+                finished += 1
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task') as pool:
+        # after stop -> no new claims, but the tasks already held are finished (and their leases kept) first
+        while not stop.is_set() or running:
+            now = time.monotonic()
+            if now - last_beat > 1.0:
+                with lock:
+                    done, finished = finished, 0
+                queue.heartbeat(worker, done)
+                last_beat = now
+
+            if now - last_renew > queue.lease_seconds / 3:
+                with lock:
+                    held = list(running)
+                for task_id in held:
+                    queue.renew(task_id, worker)
+                last_renew = now
+
+            if stop.is_set():
+                time.sleep(0.01)
+                continue
+            # all slots busy -> back to the top now and then, for the heartbeat and the lease renewals
+            if not slots.acquire(timeout=0.05):
+                continue
+
+            task = queue.claim(worker)
+            if task is None:
+                slots.release()
+                stop.wait(pause)
+                pause = min(pause * 2, idle_pause)
+                continue
+
+            task_id, workflow, node, state = task
+            pause = 0.001
+            with lock:
+                running.add(task_id)
+
+            runnable = _node_runnable(workflow, node)
+            if _is_async(runnable):
+                # the SQLite write happens in the pool, not on the event loop the other coroutines share
+                future = asyncio.run_coroutine_threadsafe(runnable.ainvoke(state), _event_loop())
+                future.add_done_callback(lambda f, task_id=task_id: pool.submit(store, task_id, f))
+            else:
+                future = pool.submit(runnable.invoke, state)
+                future.add_done_callback(lambda f, task_id=task_id: store(task_id, f))
+
+
+def remote_graph(workflow: str, queue: TaskQueue, *, nodes: list[str] | None = None, timeout: float | None = 600.0, **compile_kwargs):
+    '''
+    The registry workflow compiled with its nodes (all, or only `nodes`) running in queue workers.
+
+    The graph itself still runs here: edges, merge_barrier joins, Send fan-out and reducers like operator.add
+    are applied by LangGraph in this process, exactly as before. Only the body of a node moves: it is called
+    with the same input in a worker, and the update it returns comes back to this process.
+    '''
+    original = load_module(workflow).graph
+
+    def remote(node: str):
+        def run(state):
+            return queue.result(queue.enqueue(workflow, node, state), timeout)
+        return RunnableLambda(run, name=node)
+
+    # a shallow copy of the builder with new node specs -> the script's own graph is left as it is
+    builder = copy.copy(original)
+    builder.nodes = {
+        name: replace(spec, runnable=remote(name)) if nodes is None or name in nodes else spec
+        for name, spec in original.nodes.items()
+    }
+    return builder.compile(**compile_kwargs)
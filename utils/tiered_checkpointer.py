@@ -0,0 +1,269 @@
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langchain_core.runnables import RunnableConfig
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Sequence
+import threading
+import asyncio
+
+
+class TieredSaver(BaseCheckpointSaver):
+    '''
+    Two-tier checkpointer: a bounded in-memory hot set of threads in front of a persistent cold store.
+
+    - every put / put_writes goes to the cold store first (write-through), so dropping a thread from memory never loses data
+    - the hot set keeps, per active thread, only what a new turn reads: the latest checkpoint of each namespace
+      and its pending writes, serialized (that is also what its size is measured in)
+    - threads are kept in LRU order, when the hot set is over max_memory_bytes the least recently used threads are evicted
+    - get_tuple of a thread that is not hot is a miss: the latest checkpoint is read from the cold store and paged in
+    - history (list) and reads of older checkpoints go straight to the cold store
+    '''
+
+    def __init__(self, cold: BaseCheckpointSaver, *, max_memory_bytes: int = 64 * 2**20, serde: SerializerProtocol | None = None):
+        super().__init__(serde=serde)
+        self.cold = cold
+        self.max_memory_bytes = max_memory_bytes
+
+        # thread_id -> checkpoint_ns -> entry, least recently used first
+        self.hot: OrderedDict[str, dict[str, dict]] = OrderedDict()
+        self.hot_bytes = 0
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'page_ins': 0, 'cold_reads': 0, 'evictions': 0, 'evicted_bytes': 0}
+
+    # hot set helpers, called with the lock held
+    def _entry(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, parent_config: RunnableConfig | None) -> dict:
+        entry = {
+            'config': config,
+            'checkpoint': self.serde.dumps_typed(checkpoint),
+            'metadata': self.serde.dumps_typed(metadata),
+            'parent_config': parent_config,
+            'writes': {},
+        }
+        entry['bytes'] = len(entry['checkpoint'][1]) + len(entry['metadata'][1])
+        return entry
+
+    def _set_entry(self, thread_id: str, checkpoint_ns: str, entry: dict) -> None:
+        namespaces = self.hot.setdefault(thread_id, {})
+        if old := namespaces.get(checkpoint_ns):
+            self.hot_bytes -= old['bytes']
+        namespaces[checkpoint_ns] = entry
+        self.hot_bytes += entry['bytes']
+
+        self.hot.move_to_end(thread_id)
+        self._evict()
+
+    def _evict(self) -> None:
+        # the most recently used thread always stays, even if it alone is over the limit
+        while self.hot_bytes > self.max_memory_bytes and len(self.hot) > 1:
+            _, namespaces = self.hot.popitem(last=False)
+            freed = sum(entry['bytes'] for entry in namespaces.values())
+            self.hot_bytes -= freed
+            self.counters['evictions'] += 1
+            self.counters['evicted_bytes'] += freed
+
+    def _make_tuple(self, entry: dict) -> CheckpointTuple:
+        return CheckpointTuple(
+            config=entry['config'],
+            checkpoint=self.serde.loads_typed(entry['checkpoint']),
+            metadata=self.serde.loads_typed(entry['metadata']),
+            parent_config=entry['parent_config'],
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value, _ in entry['writes'].values()],
+        )
+
+    # read -> (hot tuple or None, whether the cold store's answer should be paged in)
+    def _get_hot(self, config: RunnableConfig) -> tuple[CheckpointTuple | None, bool]:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self.lock:
+            entry = self.hot.get(thread_id, {}).get(checkpoint_ns)
+            if entry and (not checkpoint_id or checkpoint_id == entry['config']['configurable']['checkpoint_id']):
+                self.hot.move_to_end(thread_id)
+                self.counters['hits'] += 1
+                return self._make_tuple(entry), False
+
+            # an older checkpoint of a hot thread (time travel) -> cold store, not cached
+            if entry:
+                self.counters['cold_reads'] += 1
+            else:
+                self.counters['misses'] += 1
+
+        return None, not checkpoint_id
+
+    def _page_in(self, config: RunnableConfig, item: CheckpointTuple) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+
+        # page the thread's latest checkpoint in, unless a put made it hot in the meantime
+        with self.lock:
+            if checkpoint_ns not in self.hot.get(thread_id, {}):
+                entry = self._entry(item.config, item.checkpoint, item.metadata, item.parent_config)
+                # the cold store returns each task's writes in idx order -> count per task to get put_writes' idx back,
+                # so a retried put_writes after the page-in hits the same keys instead of adding duplicates
+                task_idx: dict[str, int] = {}
+                for task_id, channel, value in item.pending_writes or []:
+                    if channel in WRITES_IDX_MAP:
+                        idx = WRITES_IDX_MAP[channel]
+                    else:
+                        idx = task_idx.get(task_id, 0)
+                        task_idx[task_id] = idx + 1
+                    type_, value_b = self.serde.dumps_typed(value)
+                    entry['writes'][(task_id, idx)] = (task_id, channel, (type_, value_b), '')
+                    entry['bytes'] += len(value_b)
+                self.counters['page_ins'] += 1
+                self._set_entry(thread_id, checkpoint_ns, entry)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        item, page_in = self._get_hot(config)
+        if item is not None:
+            return item
+
+        item = self.cold.get_tuple(config)
+        if item is not None and page_in:
+            self._page_in(config, item)
+        return item
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        # write-through -> the cold store has every checkpoint
+        return self.cold.list(config, filter=filter, before=before, limit=limit)
+
+    # write
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = self.cold.put(config, checkpoint, metadata, new_versions)
+        self._put_hot(config, next_config, checkpoint, metadata)
+        return next_config
+
+    def _put_hot(self, config: RunnableConfig, next_config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        parent_checkpoint_id = config['configurable'].get('checkpoint_id')
+        parent_config = (
+            {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': parent_checkpoint_id}}
+            if parent_checkpoint_id
+            else None
+        )
+
+        # the new checkpoint replaces the thread's hot entry, its pending writes start empty
+        entry = self._entry(next_config, checkpoint, get_checkpoint_metadata(config, metadata), parent_config)
+        with self.lock:
+            self._set_entry(thread_id, checkpoint_ns, entry)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        self.cold.put_writes(config, writes, task_id, task_path)
+        self._put_writes_hot(config, writes, task_id, task_path)
+
+    def _put_writes_hot(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = config['configurable']['checkpoint_id']
+
+        with self.lock:
+            entry = self.hot.get(thread_id, {}).get(checkpoint_ns)
+            if not entry or entry['config']['configurable']['checkpoint_id'] != checkpoint_id:
+                return
+
+            # same rule as the cold store: special channels (errors, interrupts) may be overwritten, regular writes are kept once
+            for idx, (channel, value) in enumerate(writes):
+                key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                if key[1] >= 0 and key in entry['writes']:
+                    continue
+                type_, value_b = self.serde.dumps_typed(value)
+                if old := entry['writes'].get(key):
+                    entry['bytes'] -= len(old[2][1])
+                    self.hot_bytes -= len(old[2][1])
+                entry['writes'][key] = (task_id, channel, (type_, value_b), task_path)
+                entry['bytes'] += len(value_b)
+                self.hot_bytes += len(value_b)
+
+            self._evict()
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.cold.delete_thread(thread_id)
+
+        with self.lock:
+            if namespaces := self.hot.pop(thread_id, None):
+                self.hot_bytes -= sum(entry['bytes'] for entry in namespaces.values())
+
+    def get_next_version(self, current, channel):
+        # versions must match the cold store's format, it is the one that keeps them
+        return self.cold.get_next_version(current, channel)
+
+    # async versions -> the hot set is a dict lookup and runs inline, every cold-store call (a SQLite read or a
+    # write-through commit) runs in a worker thread so a slow or contended disk never blocks the event loop
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        item, page_in = self._get_hot(config)
+        if item is not None:
+            return item
+
+        item = await asyncio.to_thread(self.cold.get_tuple, config)
+        if item is not None and page_in:
+            self._page_in(config, item)
+        return item
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        # one item per thread hop -> a page read stays lazy
+        items = self.list(config, filter=filter, before=before, limit=limit)
+        while (item := await asyncio.to_thread(next, items, None)) is not None:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        next_config = await asyncio.to_thread(self.cold.put, config, checkpoint, metadata, new_versions)
+        self._put_hot(config, next_config, checkpoint, metadata)
+        return next_config
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = '') -> None:
+        await asyncio.to_thread(self.cold.put_writes, config, writes, task_id, task_path)
+        self._put_writes_hot(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            hot_threads, hot_bytes = len(self.hot), self.hot_bytes
+
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else None,
+            'hot_threads': hot_threads,
+            'hot_bytes': hot_bytes,
+            'max_memory_bytes': self.max_memory_bytes,
+        }
@@ -0,0 +1,323 @@
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    SerializerProtocol,
+    get_checkpoint_metadata,
+)
+from langchain_core.runnables import RunnableConfig
+from typing import Any, Callable, Literal, Sequence
+import threading
+import struct
+import zlib
+import time
+import os
+
+
+# record frame: payload length, crc32 of the payload, then the payload
+HEADER = struct.Struct('>II')
+
+
+class WalSaver(InMemorySaver):
+    '''
+    Durable checkpointer: InMemorySaver for reads, plus an append-only write-ahead log on disk.
+
+    - every put / put_writes / delete_thread is appended to the log as one framed record (length + crc32)
+      before it is applied in memory, so a caller that got its return value knows the record is in the log
+    - on open the log is replayed into memory, a torn or corrupt tail (crash in the middle of a write) is cut off
+      → a process killed with kill -9 comes back with every checkpoint it had finished
+    - put records keep only the channel values of new_versions (the node's partial update), like DeltaSqliteSaver
+    - once the log passes compact_bytes it is rewritten as a snapshot: the latest checkpoint of every thread and
+      namespace (all its channel values) plus its pending writes, written to a new file, fsynced and renamed over
+      the log. Memory is rebuilt from the same records, so older checkpoints (history) are dropped from both
+      → the log, the replay on open and the memory stay bounded by the live threads, not by the steps ever taken
+
+    durability:
+        'none'   -> write() only; survives a killed process (the OS still has the data), not a power loss
+        'batch'  -> group commit: concurrent writers append, then one of them fsyncs for all of them
+                    while the others wait; group_commit_ms lets the leader wait a little for more writers
+        'always' -> one fsync per record, under the append lock
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        durability: Literal['none', 'batch', 'always'] = 'batch',
+        group_commit_ms: float = 0.0,
+        compact_bytes: int | None = 64 * 2**20,
+        serde: SerializerProtocol | None = None,
+    ):
+        super().__init__(serde=serde)
+        if durability not in ('none', 'batch', 'always'):
+            raise ValueError(f"durability must be 'none', 'batch' or 'always', got {durability!r}")
+
+        self.path = path
+        self.durability = durability
+        self.group_commit_ms = group_commit_ms
+        self.compact_bytes = compact_bytes  # None -> never compact
+
+        # append state, group-commit state and compaction state share one condition
+        self.cond = threading.Condition()
+        self.written = 0  # records appended
+        self.synced = 0  # records known to be on disk
+        self.syncing = False
+        self.applying = 0  # records appended but not applied in memory yet
+        self.compacting = False
+        self.counters = {'records': 0, 'bytes': 0, 'fsyncs': 0, 'fsync_seconds': 0.0, 'compactions': 0}
+
+        self.recovered = self._replay()
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.log_bytes = os.fstat(self.fd).st_size
+        self.snapshot_bytes = 0  # size of the log right after the last compaction
+        self._maybe_compact()
+
+    # log
+    def _encode(self, record: dict) -> bytes:
+        type_, data = self.serde.dumps_typed(record)
+        payload = bytes([len(type_)]) + type_.encode() + data
+        return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _decode(self, payload: bytes) -> dict:
+        n = payload[0]
+        return self.serde.loads_typed((payload[1:1 + n].decode(), payload[1 + n:]))
+
+    def _replay(self) -> dict:
+        if not os.path.exists(self.path):
+            return {'records': 0, 'truncated_bytes': 0}
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        offset = records = 0
+        while offset + HEADER.size <= len(data):
+            length, crc = HEADER.unpack_from(data, offset)
+            payload = data[offset + HEADER.size:offset + HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+
+            self._apply(self._decode(payload))
+            offset += HEADER.size + length
+            records += 1
+
+        # everything after the last complete record is a half-written append from a crash
+        if offset < len(data):
+            with open(self.path, 'rb+') as f:
+                f.truncate(offset)
+                os.fsync(f.fileno())
+
+        return {'records': records, 'truncated_bytes': len(data) - offset}
+
+    def _log(self, record: dict, apply: Callable[[], Any]) -> Any:
+        # append, make durable, then apply in memory; a compaction never sees a record that is logged but not applied
+        frame = self._encode(record)
+
+        with self.cond:
+            while self.compacting:
+                self.cond.wait()
+            os.write(self.fd, frame)
+            self.written += 1
+            seq = self.written
+            self.applying += 1
+            self.log_bytes += len(frame)
+            self.counters['records'] += 1
+            self.counters['bytes'] += len(frame)
+
+            if self.durability == 'always':
+                self._fsync()
+                self.synced = seq
+
+        try:
+            if self.durability == 'batch':
+                self._group_commit(seq)
+            return apply()
+        finally:
+            with self.cond:
+                self.applying -= 1
+                self.cond.notify_all()
+            self._maybe_compact()
+
+    def _fsync(self) -> None:
+        start = time.perf_counter()
+        os.fsync(self.fd)
+        self.counters['fsyncs'] += 1
+        self.counters['fsync_seconds'] += time.perf_counter() - start
+
+    def _group_commit(self, seq: int) -> None:
+        with self.cond:
+            while self.synced < seq:
+                if self.syncing:
+                    # someone else's fsync is running, it (or the next one) covers this record
+                    self.cond.wait()
+                    continue
+
+                # leader: one fsync for every record appended so far
+                self.syncing = True
+                self.cond.release()
+                try:
+                    if self.group_commit_ms:
+                        time.sleep(self.group_commit_ms / 1000)
+                    target = self.written
+                    self._fsync()
+                finally:
+                    self.cond.acquire()
+                    self.syncing = False
+
+                self.synced = max(self.synced, target)
+                self.cond.notify_all()
+
+    # compaction
+    def _maybe_compact(self) -> None:
+        with self.cond:
+            # at least twice the last snapshot too -> live state close to compact_bytes does not compact on every append
+            if self.compact_bytes is None or self.compacting or self.log_bytes <= max(self.compact_bytes, 2 * self.snapshot_bytes):
+                return
+            self.compacting = True  # new appends wait from here on
+            try:
+                # every logged record applied and no fsync running on the old file -> memory is exactly the log
+                while self.applying or self.syncing:
+                    self.cond.wait()
+                self._compact()
+            finally:
+                self.compacting = False
+                self.cond.notify_all()
+
+    def _snapshot(self) -> list[dict]:
+        # the latest checkpoint of every thread and namespace with all its values, and its pending writes
+        records = []
+        for thread_id, namespaces in self.storage.items():
+            for checkpoint_ns in namespaces:
+                item = super().get_tuple({'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns}})
+                if item is None:
+                    continue
+
+                checkpoint = item.checkpoint
+                config = {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': None}}
+                records.append({'op': 'put', 'config': config, 'checkpoint': checkpoint, 'metadata': item.metadata, 'new_versions': checkpoint['channel_versions']})
+
+                # per task: regular writes in idx order (put_writes numbers them by position again), special channels apart
+                tasks: dict[tuple[str, str, bool], list] = {}
+                for (task_id, idx), (_, channel, value, task_path) in sorted(self.writes.get((thread_id, checkpoint_ns, checkpoint['id']), {}).items()):
+                    tasks.setdefault((task_id, task_path, channel in WRITES_IDX_MAP), []).append([channel, self.serde.loads_typed(value)])
+                for (task_id, task_path, _), writes in tasks.items():
+                    records.append({
+                        'op': 'put_writes',
+                        'config': {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint['id']}},
+                        'writes': writes,
+                        'task_id': task_id,
+                        'task_path': task_path,
+                    })
+        return records
+
+    def _compact(self) -> None:
+        # called with the condition held and no append in flight
+        records = self._snapshot()
+        frames = b''.join(self._encode(record) for record in records)
+
+        # new file first, fsynced, then renamed over the log -> a crash leaves either the old log or the new one
+        tmp = self.path + '.compact'
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, frames)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, self.path)
+        dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        os.close(self.fd)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.log_bytes = self.snapshot_bytes = len(frames)
+        self.synced = self.written
+        self.counters['compactions'] += 1
+
+        # memory = the snapshot, so it drops the same history the log did; built aside and swapped in,
+        # so a concurrent read sees the old or the new state, never an empty one
+        fresh = InMemorySaver(serde=self.serde)
+        for record in records:
+            self._apply(record, fresh)
+        self.storage, self.writes, self.blobs = fresh.storage, fresh.writes, fresh.blobs
+
+    def _apply(self, record: dict, target: InMemorySaver | None = None) -> None:
+        target = target or self
+        op = record['op']
+        if op == 'put':
+            InMemorySaver.put(target, record['config'], record['checkpoint'], record['metadata'], record['new_versions'])
+        elif op == 'put_writes':
+            InMemorySaver.put_writes(target, record['config'], record['writes'], record['task_id'], record['task_path'])
+        elif op == 'delete_thread':
+            InMemorySaver.delete_thread(target, record['thread_id'])
+
+    # write -> log first, memory second
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config['configurable']
+        record = {
+            'op': 'put',
+            'config': {'configurable': {
+                'thread_id': configurable['thread_id'],
+                'checkpoint_ns': configurable.get('checkpoint_ns', ''),
+                'checkpoint_id': configurable.get('checkpoint_id'),
+            }},
+            # only the values the replayed put will store
+            'checkpoint': {**checkpoint, 'channel_values': {k: v for k, v in checkpoint['channel_values'].items() if k in new_versions}},
+            'metadata': get_checkpoint_metadata(config, metadata),
+            'new_versions': new_versions,
+        }
+
+        return self._log(record, lambda: super(WalSaver, self).put(record['config'], checkpoint, record['metadata'], new_versions))
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        configurable = config['configurable']
+        record = {
+            'op': 'put_writes',
+            'config': {'configurable': {
+                'thread_id': configurable['thread_id'],
+                'checkpoint_ns': configurable.get('checkpoint_ns', ''),
+                'checkpoint_id': configurable['checkpoint_id'],
+            }},
+            'writes': [list(w) for w in writes],
+            'task_id': task_id,
+            'task_path': task_path,
+        }
+
+        self._log(record, lambda: super(WalSaver, self).put_writes(record['config'], writes, task_id, task_path))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._log({'op': 'delete_thread', 'thread_id': thread_id}, lambda: super(WalSaver, self).delete_thread(thread_id))
+
+    def close(self) -> None:
+        with self.cond:
+            if self.durability != 'none' and self.synced < self.written:
+                self._fsync()
+                self.synced = self.written
+            os.close(self.fd)
+
+    def stats(self) -> dict:
+        with self.cond:
+            counters = dict(self.counters)
+
+        return {
+            **counters,
+            'durability': self.durability,
+            'records_per_fsync': round(counters['records'] / counters['fsyncs'], 2) if counters['fsyncs'] else None,
+            'log_bytes': os.path.getsize(self.path),
+            'recovered': self.recovered,
+        }